@@ -0,0 +1,161 @@
+import os
+import numpy as np
+from typing import List, Tuple, Optional
+from .topk import top_k
+from ..cache_manifest import save_array, load_array
+
+
+ANN_METRICS = ("cosine", "l2")
+
+
+def _assign_to_centroids(X: np.ndarray, centroids: np.ndarray, metric: str,
+                         block_size: int = 8192) -> np.ndarray:
+    assignments = np.zeros(X.shape[0], dtype=np.int32)
+    centroid_sq = np.sum(centroids * centroids, axis=1)
+
+    for start in range(0, X.shape[0], block_size):
+        block = X[start:start + block_size]
+        products = block @ centroids.T
+        if metric == "cosine":
+            assignments[start:start + block_size] = np.argmax(products, axis=1)
+        else:
+            # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, ||x||^2 konstan per baris
+            assignments[start:start + block_size] = np.argmin(centroid_sq - 2 * products, axis=1)
+
+    return assignments
+
+
+def kmeans(X: np.ndarray, n_clusters: int, n_iter: int = 20, metric: str = "l2",
+           random_state: Optional[int] = 0) -> Tuple[np.ndarray, np.ndarray]:
+    # Lloyd k-means, untuk metric cosine centroid dinormalisasi (spherical k-means)
+    rng = np.random.default_rng(random_state)
+    n = X.shape[0]
+    n_clusters = min(n_clusters, n)
+
+    centroids = X[rng.choice(n, n_clusters, replace=False)].astype(np.float64)
+    assignments = np.zeros(n, dtype=np.int32)
+
+    for iteration in range(n_iter):
+        new_assignments = _assign_to_centroids(X, centroids, metric)
+        if iteration > 0 and np.array_equal(new_assignments, assignments):
+            break
+        assignments = new_assignments
+
+        counts = np.bincount(assignments, minlength=n_clusters)
+        empty = counts == 0
+
+        # jumlah per cluster lewat reduceat di data yang sudah diurutkan per cluster
+        order = np.argsort(assignments, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.zeros_like(centroids)
+        sums[~empty] = np.add.reduceat(X[order], starts[~empty], axis=0)
+
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # cluster kosong diisi ulang dengan titik acak
+        if np.any(empty):
+            centroids[empty] = X[rng.choice(n, int(np.sum(empty)), replace=False)]
+
+        if metric == "cosine":
+            lengths = np.linalg.norm(centroids, axis=1)
+            lengths[lengths < 1e-12] = 1.0
+            centroids /= lengths[:, None]
+
+    return centroids, assignments
+
+
+class IVFIndex:
+    # Inverted file index: k-means coarse quantizer, hanya n_probe list terdekat yang di-scan
+    FILES = ('ivf_centroids.npy', 'ivf_list_offsets.npy', 'ivf_list_ids.npy')
+
+    def __init__(self, metric: str = "cosine", n_lists: Optional[int] = None, n_probe: int = 8,
+                 max_train_points: int = 256):
+        if metric not in ANN_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        self.metric = metric
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.max_train_points = max_train_points
+        self.centroids = None
+        self.list_offsets = None
+        self.list_ids = None
+        self.vectors = None
+
+    def build(self, vectors: np.ndarray, random_state: Optional[int] = 0):
+        n = vectors.shape[0]
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+
+        # training k-means di subsample, lalu assign semua vektor
+        rng = np.random.default_rng(random_state)
+        train_size = min(n, n_lists * self.max_train_points)
+        train_idx = rng.choice(n, train_size, replace=False) if train_size < n else np.arange(n)
+        centroids, _ = kmeans(vectors[train_idx], n_lists, metric=self.metric, random_state=random_state)
+        assignments = _assign_to_centroids(vectors, centroids, self.metric)
+
+        order = np.argsort(assignments, kind='stable').astype(np.int32)
+        counts = np.bincount(assignments, minlength=centroids.shape[0])
+
+        self.centroids = centroids.astype(np.float32)
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.list_ids = order
+        self.n_lists = centroids.shape[0]
+        self.vectors = vectors
+        return self
+
+    def attach(self, vectors: np.ndarray):
+        # index yang di-load dari disk hanya menyimpan struktur list, vektornya dari model
+        self.vectors = vectors
+        return self
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        products = self.centroids @ query
+        if self.metric == "cosine":
+            centroid_scores = -products
+        else:
+            centroid_scores = np.sum(self.centroids * self.centroids, axis=1) - 2 * products
+
+        n_probe = min(self.n_probe, self.n_lists)
+        probe = np.argpartition(centroid_scores, n_probe - 1)[:n_probe]
+        return np.concatenate([self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probe])
+
+    def search(self, query: np.ndarray, k: int = 5, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        # cosine: skor = inner product (besar = mirip), l2: skor = jarak euclidean (kecil = mirip)
+        candidates = self._candidates(query)
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+
+        candidate_vectors = self.vectors[candidates]
+        if self.metric == "cosine":
+            scores = candidate_vectors @ query
+            order, top_scores = top_k(scores, k)
+        else:
+            diff = candidate_vectors - query
+            scores = np.sqrt(np.sum(diff * diff, axis=1))
+            order, top_scores = top_k(scores, k, largest=False)
+
+        return [(int(candidates[i]), float(score)) for i, score in zip(order, top_scores)]
+
+    def save(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        save_array(os.path.join(output_dir, 'ivf_centroids.npy'), self.centroids)
+        save_array(os.path.join(output_dir, 'ivf_list_offsets.npy'), self.list_offsets)
+        save_array(os.path.join(output_dir, 'ivf_list_ids.npy'), self.list_ids)
+
+    def load(self, input_dir: str, mmap_mode: Optional[str] = None):
+        self.centroids = load_array(os.path.join(input_dir, 'ivf_centroids.npy'), mmap_mode)
+        self.list_offsets = load_array(os.path.join(input_dir, 'ivf_list_offsets.npy'), mmap_mode)
+        self.list_ids = load_array(os.path.join(input_dir, 'ivf_list_ids.npy'), mmap_mode)
+        self.n_lists = self.centroids.shape[0]
+        return self
+
+    @classmethod
+    def exists(cls, input_dir: str) -> bool:
+        return all(os.path.exists(os.path.join(input_dir, f)) for f in cls.FILES)
+
+    @classmethod
+    def remove(cls, output_dir: str):
+        # hapus index lama supaya tidak ter-load untuk model baru
+        for f in cls.FILES:
+            path = os.path.join(output_dir, f)
+            if os.path.exists(path):
+                os.remove(path)
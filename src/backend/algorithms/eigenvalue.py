@@ -1,5 +1,6 @@
+import math
 import numpy as np
-from typing import Tuple
+from typing import Tuple, Dict
 
 
 # def vector_length(v: np.ndarray) -> float:
@@ -12,14 +13,14 @@ def vector_length(v: np.ndarray) -> float:
 def create_diagonal_matrix(diagonal_values: np.ndarray) -> np.ndarray:
     n = len(diagonal_values)
     matrix = np.zeros((n, n))
-    for i in range(n):
-        matrix[i, i] = diagonal_values[i]
+    idx = np.arange(n)
+    matrix[idx, idx] = diagonal_values
     return matrix
 
 
 def extract_diagonal(matrix: np.ndarray) -> np.ndarray:
-    n = matrix.shape[0]
-    return np.array([matrix[i, i] for i in range(n)])
+    idx = np.arange(matrix.shape[0])
+    return matrix[idx, idx].copy()
 
 
 def qr_decomposition(A: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
@@ -28,11 +29,8 @@ def qr_decomposition(A: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     R = np.zeros((n, n))
 
     for j in range(n):
-        v = A[:, j].copy()
-
-        for i in range(j):
-            R[i, j] = np.dot(Q[:, i], A[:, j])
-            v = v - R[i, j] * Q[:, i]
+        R[:j, j] = Q[:, :j].T @ A[:, j]
+        v = A[:, j] - Q[:, :j] @ R[:j, j]
 
         R[j, j] = vector_length(v)
         if R[j, j] > 1e-7:
@@ -53,9 +51,7 @@ def qr_algorithm(A: np.ndarray, max_iter: int = 1000, tol: float = 1e-7) -> Tupl
         A_k_new = R @ Q
         Q_total = Q_total @ Q
 
-        diag_elements = extract_diagonal(A_k_new)
-        diag_matrix = create_diagonal_matrix(diag_elements)
-        off_diag = np.sum(np.abs(A_k_new - diag_matrix))
+        off_diag = np.sum(np.abs(A_k_new)) - np.sum(np.abs(extract_diagonal(A_k_new)))
         if off_diag < tol:
             break
 
@@ -67,3 +63,131 @@ def qr_algorithm(A: np.ndarray, max_iter: int = 1000, tol: float = 1e-7) -> Tupl
     return eigenvalues, eigenvectors
 
 
+def householder_tridiagonalize(A: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # A = Q * T * Q^T, T tridiagonal (diagonal d, subdiagonal e)
+    n = A.shape[0]
+    T = np.array(A, dtype=np.float64)
+    Q = np.eye(n)
+
+    for k in range(n - 2):
+        x = T[k + 1:, k]
+        alpha = vector_length(x)
+        if alpha < 1e-300:
+            continue
+        if x[0] > 0:
+            alpha = -alpha
+
+        v = x.copy()
+        v[0] -= alpha
+        v_length = vector_length(v)
+        if v_length < 1e-300:
+            continue
+        v /= v_length
+
+        # H = I - 2vv^T, T22 <- H * T22 * H (rank-2 update)
+        T22 = T[k + 1:, k + 1:]
+        p = T22 @ v
+        w = p - (v @ p) * v
+        T22 -= 2 * (np.outer(v, w) + np.outer(w, v))
+
+        T[k + 1:, k] = 0.0
+        T[k, k + 1:] = 0.0
+        T[k + 1, k] = alpha
+        T[k, k + 1] = alpha
+
+        Q[:, k + 1:] -= 2 * np.outer(Q[:, k + 1:] @ v, v)
+
+    d = extract_diagonal(T)
+    e = np.zeros(n)
+    idx = np.arange(n - 1)
+    e[:n - 1] = T[idx + 1, idx]
+
+    return d, e, Q
+
+
+def tridiagonal_qr(d: np.ndarray, e: np.ndarray, Z: np.ndarray, max_iter: int = 30,
+                   tol: float = np.finfo(np.float64).eps) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    # implicit QL dengan Wilkinson shift + deflation (cf. tqli)
+    # e[i] menghubungkan d[i] dan d[i+1], e[n-1] = 0
+    # list Python untuk operasi skalar (jauh lebih cepat dari indexing numpy)
+    d = [float(x) for x in d]
+    e = [float(x) for x in e]
+    # simpan transpose supaya rotasi bekerja di baris yang contiguous
+    Zt = np.array(Z.T, order='C')
+    n = len(d)
+    total_iterations = 0
+    converged = True
+
+    for l in range(n):
+        iteration = 0
+        while True:
+            # deflation: cari blok tak tereduksi [l, m]
+            m = l
+            while m < n - 1:
+                dd = abs(d[m]) + abs(d[m + 1])
+                if abs(e[m]) <= tol * dd:
+                    break
+                m += 1
+            if m == l:
+                break
+
+            if iteration >= max_iter:
+                converged = False
+                break
+            iteration += 1
+            total_iterations += 1
+
+            # Wilkinson shift dari blok 2x2 teratas
+            g = (d[l + 1] - d[l]) / (2.0 * e[l])
+            r = math.hypot(g, 1.0)
+            g = d[m] - d[l] + e[l] / (g + (r if g >= 0 else -r))
+
+            s = c = 1.0
+            p = 0.0
+            i = m - 1
+            while i >= l:
+                f = s * e[i]
+                b = c * e[i]
+                r = math.hypot(f, g)
+                e[i + 1] = r
+                if r == 0.0:
+                    d[i + 1] -= p
+                    e[m] = 0.0
+                    break
+                s = f / r
+                c = g / r
+                g = d[i + 1] - p
+                r = (d[i] - g) * s + 2.0 * c * b
+                p = s * r
+                d[i + 1] = g + p
+                g = c * r - b
+
+                # Givens rotation ke eigenvector
+                Zt[i:i + 2] = np.array(((c, -s), (s, c))) @ Zt[i:i + 2]
+                i -= 1
+
+            if r == 0.0 and i >= l:
+                continue
+
+            d[l] -= p
+            e[l] = g
+            e[m] = 0.0
+
+    stats = {
+        'iterations': total_iterations,
+        'converged': converged,
+        'max_off_diagonal': max((abs(x) for x in e), default=0.0),
+    }
+    return np.array(d), Zt.T, stats
+
+
+def symmetric_qr_algorithm(A: np.ndarray, max_iter: int = 30, tol: float = np.finfo(np.float64).eps,
+                           return_stats: bool = False):
+    # Householder tridiagonalization -> shifted QR dengan deflation
+    # max_iter = batas iterasi QR per eigenvalue
+    d, e, Q = householder_tridiagonalize(A)
+    eigenvalues, eigenvectors, stats = tridiagonal_qr(d, e, Q, max_iter=max_iter, tol=tol)
+
+    if return_stats:
+        return eigenvalues, eigenvectors, stats
+    return eigenvalues, eigenvectors
@@ -0,0 +1,143 @@
+import os
+import numpy as np
+from typing import List, Optional, Tuple
+from .topk import top_k, batch_top_k
+from ..cache_manifest import save_array, load_array
+
+
+QUANTIZED_METRICS = ("cosine", "l2")
+
+
+class ScalarQuantizer:
+    # int8 per dimensi: x ~ offset + scale * code, code uint8 0..255
+    def __init__(self):
+        self.offset = None
+        self.scale = None
+
+    def fit(self, vectors: np.ndarray):
+        lo = np.asarray(vectors.min(axis=0), dtype=np.float32)
+        hi = np.asarray(vectors.max(axis=0), dtype=np.float32)
+        scale = (hi - lo) / 255
+        scale[scale < 1e-12] = 1.0
+        self.offset = lo
+        self.scale = scale
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((np.asarray(vectors, dtype=np.float32) - self.offset) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale + self.offset
+
+    def inner_products(self, codes: np.ndarray, queries: np.ndarray, block_size: int = 8192) -> np.ndarray:
+        # asimetris: query tetap float, kode tidak di-decode ke matriks N x dim
+        # q . x = (q * scale) . code + q . offset
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        weights = (queries * self.scale).T
+        bias = queries @ self.offset
+
+        products = np.zeros((codes.shape[0], queries.shape[0]), dtype=np.float32)
+        for start in range(0, codes.shape[0], block_size):
+            block = codes[start:start + block_size]
+            products[start:start + block.shape[0]] = block.astype(np.float32) @ weights
+        return (products + bias).T
+
+
+class QuantizedIndex:
+    # Embedding disimpan sebagai kode int8 (1/4 ukuran float32), skor aproksimasi asimetris,
+    # lalu top (k * rerank_factor) kandidat di-rerank dengan vektor float asli (boleh memmap:
+    # hanya baris kandidat yang dibaca). Hasil sama seperti IVFIndex.search:
+    # cosine -> inner product (besar = mirip), l2 -> jarak euclidean (kecil = mirip)
+    FILES = ('sq_codes.npy', 'sq_offset.npy', 'sq_scale.npy', 'sq_norms.npy')
+
+    def __init__(self, metric: str = "cosine", rerank_factor: int = 4):
+        if metric not in QUANTIZED_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        self.metric = metric
+        # 0 = tanpa rerank, skor aproksimasi langsung dipakai
+        self.rerank_factor = rerank_factor
+        self.quantizer = ScalarQuantizer()
+        self.codes = None
+        self.norms = None  # ||x_hat||^2 per vektor, untuk l2
+        self.vectors = None
+
+    def build(self, vectors: np.ndarray):
+        self.quantizer.fit(vectors)
+        self.codes = self.quantizer.encode(vectors)
+        decoded = self.quantizer.decode(self.codes)
+        self.norms = np.sum(decoded * decoded, axis=1)
+        self.vectors = vectors
+        return self
+
+    def attach(self, vectors: Optional[np.ndarray]):
+        self.vectors = vectors
+        return self
+
+    def approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        # (Q x N); l2 dalam jarak kuadrat
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        products = self.quantizer.inner_products(self.codes, queries)
+        if self.metric == "cosine":
+            return products
+        return np.maximum(np.sum(queries * queries, axis=1)[:, None] - 2 * products + self.norms[None, :], 0)
+
+    def _rerank(self, query: np.ndarray, candidates: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        # index terurut: baca memmap lebih berurutan
+        candidates = np.sort(candidates)
+        candidate_vectors = np.asarray(self.vectors[candidates])
+        query = np.asarray(query, dtype=candidate_vectors.dtype)
+        if self.metric == "cosine":
+            order, scores = top_k(candidate_vectors @ query, k)
+        else:
+            diff = candidate_vectors - query
+            order, scores = top_k(np.sqrt(np.sum(diff * diff, axis=1)), k, largest=False)
+        return [(int(candidates[i]), float(score)) for i, score in zip(order, scores)]
+
+    def search_batch(self, queries: np.ndarray, k: int = 5,
+                     exclude: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        queries = np.atleast_2d(queries)
+        largest = self.metric == "cosine"
+        rerank = self.rerank_factor > 0 and self.vectors is not None
+        n_candidates = k * self.rerank_factor if rerank else k
+
+        scores = self.approximate_scores(queries)
+        indices, values = batch_top_k(scores, n_candidates, largest=largest, exclude=exclude)
+
+        results = []
+        for query, row_indices, row_values in zip(queries, indices, values):
+            valid = row_indices >= 0
+            if rerank:
+                results.append(self._rerank(query, row_indices[valid], k))
+            else:
+                row_values = row_values[valid] if largest else np.sqrt(row_values[valid])
+                results.append([(int(idx), float(score)) for idx, score in zip(row_indices[valid], row_values)])
+        return results
+
+    def search(self, query: np.ndarray, k: int = 5, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        return self.search_batch(query, k, exclude=None if exclude is None else np.array([exclude]))[0]
+
+    def save(self, output_dir: str):
+        os.makedirs(output_dir, exist_ok=True)
+        save_array(os.path.join(output_dir, 'sq_codes.npy'), self.codes)
+        save_array(os.path.join(output_dir, 'sq_offset.npy'), self.quantizer.offset)
+        save_array(os.path.join(output_dir, 'sq_scale.npy'), self.quantizer.scale)
+        save_array(os.path.join(output_dir, 'sq_norms.npy'), self.norms)
+
+    def load(self, input_dir: str, mmap_mode: Optional[str] = None):
+        self.codes = load_array(os.path.join(input_dir, 'sq_codes.npy'), mmap_mode)
+        self.quantizer.offset = load_array(os.path.join(input_dir, 'sq_offset.npy'), mmap_mode)
+        self.quantizer.scale = load_array(os.path.join(input_dir, 'sq_scale.npy'), mmap_mode)
+        self.norms = load_array(os.path.join(input_dir, 'sq_norms.npy'), mmap_mode)
+        return self
+
+    @classmethod
+    def exists(cls, input_dir: str) -> bool:
+        return all(os.path.exists(os.path.join(input_dir, f)) for f in cls.FILES)
+
+    @classmethod
+    def remove(cls, output_dir: str):
+        for f in cls.FILES:
+            path = os.path.join(output_dir, f)
+            if os.path.exists(path):
+                os.remove(path)
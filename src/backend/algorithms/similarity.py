@@ -1,5 +1,6 @@
 import numpy as np
 from typing import List, Tuple
+from .topk import top_k, batch_top_k
 
 
 def find_top_k_similar(query_idx: int, all_embeddings: np.ndarray, k: int = 5) -> List[Tuple[int, float]]:
@@ -7,9 +8,39 @@ def find_top_k_similar(query_idx: int, all_embeddings: np.ndarray, k: int = 5) -
 
     similarities = all_embeddings @ query_embedding
 
-    similarities[query_idx] = -1.0
-
-    top_k_indices = np.argsort(similarities)[::-1][:k]
-    top_k_scores = similarities[top_k_indices]
+    top_k_indices, top_k_scores = top_k(similarities, k, exclude=query_idx)
 
     return [(int(idx), float(score)) for idx, score in zip(top_k_indices, top_k_scores)]
+
+
+def find_top_k_similar_batch(query_embeddings: np.ndarray, all_embeddings: np.ndarray, k: int = 5,
+                             exclude: np.ndarray = None) -> List[List[Tuple[int, float]]]:
+    # query_embeddings (Q x dim), satu matmul untuk semua query
+    # query di-cast ke dtype embedding supaya matriks N x dim tidak di-upcast
+    query_embeddings = np.asarray(query_embeddings, dtype=all_embeddings.dtype)
+    similarities = query_embeddings @ all_embeddings.T
+
+    top_k_indices, top_k_scores = batch_top_k(similarities, k, exclude=exclude)
+
+    return [
+        [(int(idx), float(score)) for idx, score in zip(row_indices, row_scores) if idx >= 0]
+        for row_indices, row_scores in zip(top_k_indices, top_k_scores)
+    ]
+
+
+def build_neighbor_table(all_embeddings: np.ndarray, m: int = 20,
+                         block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    # top-m tetangga untuk setiap dokumen, matmul per blok supaya memory O(block_size x N)
+    n = all_embeddings.shape[0]
+    m = max(0, min(m, n - 1))
+    neighbor_indices = np.zeros((n, m), dtype=np.int32)
+    neighbor_scores = np.zeros((n, m), dtype=np.float32)
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        similarities = all_embeddings[start:end] @ all_embeddings.T
+        indices, scores = batch_top_k(similarities, m, exclude=np.arange(start, end))
+        neighbor_indices[start:end] = indices
+        neighbor_scores[start:end] = scores
+
+    return neighbor_indices, neighbor_scores
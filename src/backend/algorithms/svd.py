@@ -1,6 +1,9 @@
 import numpy as np
-from typing import Tuple
-from .eigenvalue import qr_algorithm, create_diagonal_matrix
+from typing import Tuple, Optional
+from .eigenvalue import symmetric_qr_algorithm, create_diagonal_matrix, vector_length
+
+
+SVD_METHODS = ("full", "randomized", "lanczos")
 
 
 def svd(A: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
@@ -8,7 +11,7 @@ def svd(A: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
 
     ATA = A.T @ A
 
-    eigenvalues, eigenvectors = qr_algorithm(ATA)
+    eigenvalues, eigenvectors = symmetric_qr_algorithm(ATA)
 
     idx = np.argsort(eigenvalues)[::-1]
     eigenvalues = eigenvalues[idx]
@@ -37,7 +40,161 @@ def svd(A: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     return U, sigma_matrix, V.T
 
 
-def truncated_svd(A: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+def orthonormalize(Y: np.ndarray, basis: Optional[np.ndarray] = None) -> np.ndarray:
+    # Gram-Schmidt klasik 2x per kolom (CGS2), cukup stabil untuk power iteration
+    m, n = Y.shape
+    Q = np.zeros((m, n), dtype=np.result_type(Y.dtype, np.float32))
+    cols = 0
+
+    for j in range(n):
+        v = Y[:, j].copy()
+        for _ in range(2):
+            if basis is not None:
+                v -= basis @ (basis.T @ v)
+            if cols > 0:
+                v -= Q[:, :cols] @ (Q[:, :cols].T @ v)
+
+        length = vector_length(v)
+        if length > 1e-10:
+            Q[:, cols] = v / length
+            cols += 1
+
+    return Q[:, :cols]
+
+
+def _small_svd(B: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # SVD matriks kecil B (l x n, l << n) lewat eigen B * B^T (l x l)
+    # eigen solver selalu float64, B boleh float32
+    BBT = np.asarray(B @ B.T, dtype=np.float64)
+    BBT = (BBT + BBT.T) / 2
+
+    eigenvalues, eigenvectors = symmetric_qr_algorithm(BBT)
+
+    idx = np.argsort(eigenvalues)[::-1]
+    eigenvalues = np.maximum(eigenvalues[idx], 0)
+    U_b = eigenvectors[:, idx]
+
+    singular_values = np.sqrt(eigenvalues)
+    rank = int(np.sum(singular_values > 1e-7))
+
+    U_b = U_b[:, :rank]
+    singular_values = singular_values[:rank]
+    # V^T = Sigma^(-1) * U^T * B
+    VT = (U_b.T @ B) / singular_values[:, None]
+
+    return U_b, singular_values, VT
+
+
+def randomized_svd(A, k: int, n_oversamples: int = 10, n_power_iter: int = 4,
+                   random_state: Optional[int] = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Halko-Martinsson-Tropp: range finder + power iteration
+    # A boleh dense atau scipy.sparse, hanya dipakai lewat A @ X dan A.T @ X
+    m, n = A.shape
+    k = min(k, m, n)
+    l = min(k + n_oversamples, m, n)
+
+    # float32 tetap float32: A tidak pernah di-upcast (disalin) ke float64
+    dtype = np.float32 if A.dtype == np.float32 else np.float64
+    rng = np.random.default_rng(random_state)
+    omega = rng.standard_normal((n, l), dtype=dtype)
+
+    Q = orthonormalize(np.asarray(A @ omega))
+    for _ in range(n_power_iter):
+        Z = orthonormalize(np.asarray(A.T @ Q))
+        Q = orthonormalize(np.asarray(A @ Z))
+
+    # B = Q^T * A  (l x n)
+    B = np.asarray(A.T @ Q).T
+
+    U_b, singular_values, VT = _small_svd(B)
+    U = Q @ U_b
+
+    k = min(k, len(singular_values))
+    return U[:, :k], create_diagonal_matrix(singular_values[:k]), VT[:k, :]
+
+
+def _restart_vector(rng: np.random.Generator, basis: np.ndarray) -> np.ndarray:
+    # vektor acak baru yang ortogonal terhadap kolom basis (dipakai saat Lanczos breakdown)
+    v = rng.standard_normal(basis.shape[0])
+    v /= vector_length(v)
+    for _ in range(2):
+        v -= basis @ (basis.T @ v)
+    return v / vector_length(v)
+
+
+def lanczos_svd(A, k: int, n_extra: int = 20,
+                random_state: Optional[int] = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Golub-Kahan-Lanczos bidiagonalization dengan reortogonalisasi penuh
+    # A * V_j = U_j * B_j, B_j bidiagonal atas
+    m, n = A.shape
+    k = min(k, m, n)
+    steps = min(2 * k + n_extra, m, n)
+
+    rng = np.random.default_rng(random_state)
+    v = rng.standard_normal(n)
+    v /= vector_length(v)
+
+    U = np.zeros((m, steps))
+    V = np.zeros((n, steps))
+    alphas = np.zeros(steps)
+    betas = np.zeros(steps)
+
+    u_prev = np.zeros(m)
+    beta = 0.0
+    tol = 1e-10
+    for j in range(steps):
+        V[:, j] = v
+
+        u = np.asarray(A @ v).ravel() - beta * u_prev
+        u -= U[:, :j] @ (U[:, :j].T @ u)
+        alpha = vector_length(u)
+        if alpha < tol:
+            # breakdown (A rank-deficient): alpha_j = 0, lanjut dengan u acak yang ortogonal terhadap U_j
+            # supaya beta_(j-1) dan arah v_j tetap ada di B
+            alpha = 0.0
+            u = _restart_vector(rng, U[:, :j])
+        else:
+            u /= alpha
+            tol = max(tol, 1e-10 * alpha)
+        U[:, j] = u
+        alphas[j] = alpha
+
+        if j + 1 == steps:
+            break
+        w = np.asarray(A.T @ u).ravel() - alpha * v
+        w -= V[:, :j + 1] @ (V[:, :j + 1].T @ w)
+        beta = vector_length(w)
+        if beta < tol:
+            # subruang invariant: beta_j = 0, cari arah baru di luar V_(j+1)
+            beta = 0.0
+            v = _restart_vector(rng, V[:, :j + 1])
+        else:
+            v = w / beta
+        betas[j] = beta
+        u_prev = u
+
+    B = np.diag(alphas) + np.diag(betas[:-1], 1)
+
+    U_b, singular_values, VT_b = _small_svd(B)
+
+    k = min(k, len(singular_values))
+    U_k = U @ U_b[:, :k]
+    V_k = VT_b[:k, :] @ V.T
+
+    return U_k, create_diagonal_matrix(singular_values[:k]), V_k
+
+
+def truncated_svd(A, k: int, method: str = "randomized", **kwargs) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if method == "randomized":
+        return randomized_svd(A, k, **kwargs)
+    if method == "lanczos":
+        return lanczos_svd(A, k, **kwargs)
+    if method != "full":
+        raise ValueError(f"Unknown SVD method: {method} (pilih salah satu dari {SVD_METHODS})")
+
+    if hasattr(A, "toarray"):
+        A = A.toarray()
+
     U, sigma, VT = svd(A)
 
     # top k components
@@ -48,6 +205,3 @@ def truncated_svd(A: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.nda
     V_k = VT[:k, :]
 
     return U_k, sigma_k, V_k
-
-
-
@@ -0,0 +1,84 @@
+import numpy as np
+from typing import Tuple, Optional, Union
+
+
+def _masked_scores(scores: np.ndarray, largest: bool, exclude, threshold: Optional[float]) -> np.ndarray:
+    # skor yang dikecualikan / tidak lolos threshold diganti -inf (atau +inf untuk smallest)
+    fill = -np.inf if largest else np.inf
+    # salinan dengan dtype float asal (float32 tidak di-upcast)
+    masked = np.array(scores, dtype=np.result_type(np.asarray(scores).dtype, np.float32))
+
+    if exclude is not None:
+        masked[..., exclude] = fill
+    if threshold is not None:
+        if largest:
+            masked[masked < threshold] = fill
+        else:
+            masked[masked > threshold] = fill
+
+    return masked
+
+
+def top_k(scores: np.ndarray, k: int, largest: bool = True,
+          exclude: Optional[Union[int, np.ndarray]] = None,
+          threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # argpartition O(N) lalu sort k kandidat saja
+    # exclude: index / array index / boolean mask yang tidak boleh masuk hasil
+    if exclude is not None or threshold is not None:
+        scores = _masked_scores(scores, largest, exclude, threshold)
+
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    keys = -scores if largest else scores
+    if k < n:
+        candidates = np.argpartition(keys, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    indices = candidates[np.argsort(keys[candidates], kind='stable')]
+
+    values = scores[indices]
+    valid = np.isfinite(values)
+    return indices[valid], values[valid]
+
+
+def batch_top_k(scores: np.ndarray, k: int, largest: bool = True,
+                exclude: Optional[np.ndarray] = None,
+                threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # scores: (Q x N), hasil (Q x k)
+    # exclude: satu index per query (Q,) atau boolean mask (Q x N)
+    scores = np.array(scores, dtype=np.result_type(np.asarray(scores).dtype, np.float32))
+    fill = -np.inf if largest else np.inf
+
+    if exclude is not None:
+        exclude = np.asarray(exclude)
+        if exclude.dtype == bool:
+            scores[exclude] = fill
+        else:
+            scores[np.arange(scores.shape[0]), exclude] = fill
+    if threshold is not None:
+        if largest:
+            scores[scores < threshold] = fill
+        else:
+            scores[scores > threshold] = fill
+
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64), np.zeros((scores.shape[0], 0))
+
+    keys = -scores if largest else scores
+    if k < n:
+        candidates = np.argpartition(keys, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(n), (scores.shape[0], 1))
+
+    order = np.argsort(np.take_along_axis(keys, candidates, axis=1), axis=1, kind='stable')
+    indices = np.take_along_axis(candidates, order, axis=1)
+    values = np.take_along_axis(scores, indices, axis=1)
+
+    # baris dengan kandidat < k: nilai -inf/+inf, index diisi -1
+    indices[~np.isfinite(values)] = -1
+    return indices, values
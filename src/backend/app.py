@@ -1,41 +1,110 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, jsonify, request, send_from_directory, abort, make_response
 from flask_cors import CORS
 from .lsa.preprocessing import Preprocessing
 from .pca.preprocessing import PCAPreprocessing
-import json
+from .catalog import get_catalog
+from .model_manager import ModelManager
+from .query_cache import QueryCache
 import os
-import tempfile
 
-pipeline = None
-pca_pipeline = None
+manager = None
+query_cache = None
 
-def create_app():
-    global pipeline, pca_pipeline
+def create_app(background_load: bool = True):
+    # background_load: model di-build/di-load di thread, server langsung bisa menerima request
+    # (endpoint yang butuh model menjawab 503 sampai siap)
+    global manager, query_cache
     app = Flask(__name__)
     CORS(app)
+    # upload lebih besar ditolak Flask (413) sebelum body dibaca penuh
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024
 
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DATA_DIR = os.path.abspath(os.path.join(BASE_DIR, '../../data'))
 
-    pipeline = Preprocessing(data_dir=DATA_DIR, cache_dir="./cache", k=100)
-    pipeline.initialize()
-
-    pca_pipeline = PCAPreprocessing(data_dir=DATA_DIR, cache_dir="./cache_pca", k=100)
-    pca_pipeline.initialize()
+    catalog = get_catalog(DATA_DIR)
+
+    # cache hasil pencarian dokumen / gambar, kunci ikut versi model jadi otomatis basi setelah swap
+    ttl = float(os.environ.get('QUERY_CACHE_TTL', 3600))
+    query_cache = QueryCache(max_entries=int(os.environ.get('QUERY_CACHE_SIZE', 1024)),
+                             ttl=ttl if ttl > 0 else None,
+                             disk_dir=os.environ.get('QUERY_CACHE_DIR') or None)
+    # namespace query cache per model
+    CACHE_NAMESPACES = {'lsa': 'document', 'pca': 'image'}
+
+    # jumlah process untuk rebuild model di dalam server, kosong = default terbatas
+    workers = os.environ.get('PREPROCESS_WORKERS')
+    workers = int(workers) if workers else None
+
+    manager = ModelManager({
+        'lsa': lambda: Preprocessing(data_dir=DATA_DIR, cache_dir="./cache", k=100, workers=workers,
+                                     precision=os.environ.get('LSA_PRECISION', 'float32')),
+        'pca': lambda: PCAPreprocessing(data_dir=DATA_DIR, cache_dir="./cache_pca", k=100, workers=workers,
+                                        precision=os.environ.get('PCA_PRECISION', 'float32')),
+    }, on_swap=lambda name, pipeline: query_cache.set_version(CACHE_NAMESPACES[name], pipeline.model_version))
+    manager.load(background=background_load)
+
+    # token opsional untuk endpoint reload
+    RELOAD_TOKEN = os.environ.get('MODEL_RELOAD_TOKEN')
+    # reload hanya jalan di worker yang menerima request; worker lain mengecek fingerprint manifest
+    # cache tiap interval ini (detik) dan me-load versi baru sendiri, 0 = tidak dicek
+    POLL_INTERVAL = float(os.environ.get('MODEL_POLL_INTERVAL', 5))
+
+    @app.before_request
+    def poll_model_updates():
+        if POLL_INTERVAL > 0:
+            manager.poll_updates(POLL_INTERVAL)
+
+    def get_pipeline(name):
+        # referensi diambil sekali per request: swap model tidak mengganggu request yang sedang jalan
+        pipeline = manager.get(name)
+        if pipeline is None:
+            response = make_response(jsonify({'error': 'Model belum siap', 'models': manager.status()}), 503)
+            response.headers['Retry-After'] = '5'
+            abort(response)
+        return pipeline
 
     @app.route('/')
     def hello():
         return "Hello from Flask Backend!"
 
+    @app.route('/api/health/live', methods=['GET'])
+    def liveness():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/api/health/ready', methods=['GET'])
+    def readiness():
+        ready = manager.is_ready()
+        body = {'ready': ready, 'building': manager.is_building(), 'models': manager.status()}
+        return jsonify(body), (200 if ready else 503)
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        return jsonify({'query_cache': query_cache.stats(), 'models': manager.status()})
+
+    @app.route('/api/admin/reload', methods=['POST'])
+    def reload_models():
+        if RELOAD_TOKEN and request.headers.get('X-Reload-Token') != RELOAD_TOKEN:
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        payload = request.get_json(silent=True) or {}
+        names = payload.get('models') or request.form.getlist('models') or None
+        rebuild = str(payload.get('rebuild', request.form.get('rebuild', ''))).lower() in ('1', 'true', 'yes')
+        try:
+            started = manager.load(names, rebuild=rebuild, background=True)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not started:
+            return jsonify({'error': 'Build masih berjalan', 'models': manager.status()}), 409
+        return jsonify({'reloading': names or manager.names, 'rebuild': rebuild}), 202
+
     @app.route('/api/books', methods=['GET'])
     def get_books():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
-        search_query = request.args.get('search', '').lower()
+        search_query = request.args.get('search', '')
 
-        filtered_books = pipeline.books
-        if search_query:
-            filtered_books = [b for b in pipeline.books if search_query in b['title'].lower()]
+        filtered_books = get_pipeline('lsa').search_books(search_query)
 
         total_books = len(filtered_books)
         start = (page - 1) * per_page
@@ -50,14 +119,11 @@ def create_app():
 
     @app.route('/api/books/<book_id>', methods=['GET'])
     def get_book_detail(book_id):
-        book = pipeline.get_book_by_id(book_id)
+        book = get_pipeline('lsa').get_book_by_id(book_id)
         if book:
-            mapper_path = os.path.join(DATA_DIR, 'mapper.json')
-            with open(mapper_path, 'r', encoding='utf-8') as f:
-                mapper = json.load(f)
-
-            if book_id in mapper:
-                book['txt'] = mapper[book_id].get('txt', '')
+            record = catalog.get(book_id)
+            if record is not None:
+                book['txt'] = record.txt
 
             return jsonify(book)
         return jsonify({'error': 'Buku tidak ketemu'}), 404
@@ -73,16 +139,42 @@ def create_app():
         if file.filename == '':
             return jsonify({'error': 'No image file'}), 400
 
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, file.filename)
-        file.save(temp_path)
+        # gambar di-decode langsung dari memory, tanpa file sementara
+        pca_pipeline = get_pipeline('pca')
+        image_bytes = file.read()
+        try:
+            results = query_cache.get_or_compute(
+                'image', pca_pipeline.model_version, image_bytes,
+                lambda: pca_pipeline.get_similar_books_by_uploaded_image(image_bytes, top_k=5), top_k=5)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except OSError:
+            return jsonify({'error': 'Format gambar tidak dikenali'}), 400
+        return jsonify({'results': results})
+
+    @app.route('/api/search/image/batch', methods=['POST'])
+    def search_by_images():
+        files = [f for f in request.files.getlist('images') if f.filename != '']
+        if not files:
+            return jsonify({'error': 'No image file'}), 400
+        top_k = int(request.form.get('top_k', 5))
+        pca_pipeline = get_pipeline('pca')
 
+        images = [file.read() for file in files]
         try:
-            results = pca_pipeline.get_similar_books_by_uploaded_image(temp_path, top_k=5)
-            return jsonify({'results': results})
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            batch_results = query_cache.get_or_compute_batch(
+                'image', pca_pipeline.model_version, images,
+                lambda missing: pca_pipeline.get_similar_books_by_uploaded_images([images[i] for i in missing],
+                                                                                  top_k=top_k),
+                top_k=top_k)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except OSError:
+            return jsonify({'error': 'Format gambar tidak dikenali'}), 400
+        return jsonify({'results': [
+            {'filename': file.filename, 'results': results}
+            for file, results in zip(files, batch_results)
+        ]})
 
     @app.route('/api/search/document', methods=['POST'])
     def search_by_document():
@@ -90,14 +182,46 @@ def create_app():
         if file.filename == '':
             return jsonify({'error': 'No file provided'}), 400
 
-        document_text = file.read().decode()
+        document_bytes = file.read()
         top_k = int(request.form.get('top_k', 5))
 
-        results = pipeline.search_by_document(document_text, top_k=top_k)
+        pipeline = get_pipeline('lsa')
+        results = query_cache.get_or_compute(
+            'document', pipeline.model_version, document_bytes,
+            lambda: pipeline.search_by_document(document_bytes.decode(), top_k=top_k), top_k=top_k)
         return jsonify({'results': results})
 
+    @app.route('/api/search/document/batch', methods=['POST'])
+    def search_by_documents():
+        # dokumen bisa dikirim sebagai file ('files') dan/atau teks langsung ('texts')
+        names = []
+        document_texts = []
+        for file in request.files.getlist('files'):
+            if file.filename == '':
+                continue
+            names.append(file.filename)
+            document_texts.append(file.read().decode())
+        for i, text in enumerate(request.form.getlist('texts')):
+            names.append(f'text_{i}')
+            document_texts.append(text)
+
+        if not document_texts:
+            return jsonify({'error': 'No file provided'}), 400
+        top_k = int(request.form.get('top_k', 5))
+
+        pipeline = get_pipeline('lsa')
+        batch_results = query_cache.get_or_compute_batch(
+            'document', pipeline.model_version, [text.encode() for text in document_texts],
+            lambda missing: pipeline.search_by_documents([document_texts[i] for i in missing], top_k=top_k),
+            top_k=top_k)
+        return jsonify({'results': [
+            {'name': name, 'results': results}
+            for name, results in zip(names, batch_results)
+        ]})
+
     @app.route('/api/books/<book_id>/recommendations', methods=['GET'])
     def get_recommendations(book_id):
+        pipeline = get_pipeline('lsa')
         book = pipeline.get_book_by_id(book_id)
         if not book:
             return jsonify({'error': 'Buku tidak ketemu'}), 404
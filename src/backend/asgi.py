@@ -0,0 +1,107 @@
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .app import create_app
+
+
+# Varian ASGI, dari root repo (butuh server ASGI, mis. pip install uvicorn):
+#   uvicorn src.backend.asgi:app --workers 4
+# Body request (upload lambat) dibaca event loop secara async, baru setelah lengkap app Flask
+# dijalankan di thread pool. NumPy melepas GIL saat matmul / top-k, jadi pencarian berjalan paralel
+# antar thread dan upload yang lambat tidak menahan request lain.
+
+
+class ThreadPoolWSGIAdapter:
+    # Adapter ASGI -> WSGI minimal (HTTP + lifespan), response di-buffer penuh
+    def __init__(self, wsgi_app, max_workers: Optional[int] = None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(self.executor, self.run_wsgi, scope, bytes(body))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def build_environ(scope, body: bytes) -> Dict:
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            # PEP 3333: path berupa byte yang di-decode latin-1
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'REMOTE_ADDR': str(client[0]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+                key = name
+            else:
+                key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def run_wsgi(self, scope, body: bytes) -> Tuple[int, List[Tuple[bytes, bytes]], List[bytes]]:
+        # dijalankan di thread pool
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        result = self.wsgi_app(self.build_environ(scope, body), start_response)
+        try:
+            chunks = list(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], chunks
+
+
+flask_app = create_app(background_load=os.environ.get('MODEL_BACKGROUND_LOAD', '1') == '1')
+workers = os.environ.get('ASGI_THREADS')
+app = ThreadPoolWSGIAdapter(flask_app, max_workers=int(workers) if workers else None)
@@ -0,0 +1,77 @@
+import argparse
+import time
+
+import numpy as np
+
+from ..algorithms.ann import IVFIndex
+
+
+# Recall@k dan latency IVFIndex vs exact search
+# Jalankan dari root repo: python -m src.backend.benchmarks.ann_recall
+
+
+def make_embeddings(n: int, dim: int, n_topics: int, metric: str, seed: int = 0) -> np.ndarray:
+    # data sintetis berkelompok, mirip embedding LSA/PCA
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim))
+    X = topics[rng.integers(0, n_topics, n)] + 0.5 * rng.standard_normal((n, dim))
+    if metric == "cosine":
+        X /= np.linalg.norm(X, axis=1, keepdims=True)
+    return X.astype(np.float32)
+
+
+def exact_search(X: np.ndarray, query: np.ndarray, k: int, metric: str) -> np.ndarray:
+    if metric == "cosine":
+        scores = X @ query
+        return np.argsort(-scores)[:k]
+    diff = X - query
+    return np.argsort(np.sum(diff * diff, axis=1))[:k]
+
+
+def percentile_ms(latencies, q):
+    return 1000 * float(np.percentile(latencies, q))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=100)
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--metric', default='cosine', choices=['cosine', 'l2'])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--probes', default='1,4,8,16,32')
+    args = parser.parse_args()
+
+    X = make_embeddings(args.n, args.dim, args.topics, args.metric)
+    rng = np.random.default_rng(1)
+    queries = X[rng.choice(args.n, args.queries, replace=False)] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    latencies = []
+    truth = []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append(set(exact_search(X, query, args.k, args.metric).tolist()))
+        latencies.append(time.perf_counter() - start)
+    print(f"exact          p50 {percentile_ms(latencies, 50):7.2f} ms  p99 {percentile_ms(latencies, 99):7.2f} ms")
+
+    start = time.perf_counter()
+    index = IVFIndex(metric=args.metric).build(X)
+    print(f"build ivf ({index.n_lists} lists): {time.perf_counter() - start:.2f} s")
+
+    for n_probe in [int(p) for p in args.probes.split(',')]:
+        index.n_probe = n_probe
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = index.search(query, args.k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(expected & {idx for idx, _ in result})
+        recall = hits / (args.k * len(queries))
+        print(f"ivf n_probe={n_probe:<3} p50 {percentile_ms(latencies, 50):7.2f} ms  "
+              f"p99 {percentile_ms(latencies, 99):7.2f} ms  recall@{args.k} {recall:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import time
+import uuid
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Load test server yang sedang berjalan: throughput dan latency p50/p99 per endpoint
+# Jalankan dari root repo: python -m src.backend.benchmarks.load_test --url http://localhost:5000 \
+#     --document data/txt/1.txt --image data/covers/1.jpg
+
+
+def encode_multipart(fields: Dict[str, str], files: Dict[str, Tuple[str, bytes]]) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def make_request(url: str, body: Optional[bytes] = None, content_type: Optional[str] = None) -> Callable[[], int]:
+    def send() -> int:
+        request = urllib.request.Request(url, data=body, method='POST' if body is not None else 'GET')
+        if content_type:
+            request.add_header('Content-Type', content_type)
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+    return send
+
+
+def run_endpoint(send: Callable[[], int], n_requests: int, concurrency: int) -> Dict:
+    def timed(_):
+        start = time.perf_counter()
+        status = send()
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in results])
+    errors = sum(1 for _, status in results if status >= 400)
+    return {
+        'requests': n_requests,
+        'errors': errors,
+        'throughput': n_requests / elapsed,
+        'p50_ms': 1000 * float(np.percentile(latencies, 50)),
+        'p99_ms': 1000 * float(np.percentile(latencies, 99)),
+    }
+
+
+def build_endpoints(base_url: str, book_id: Optional[str], document: Optional[str],
+                    image: Optional[str]) -> List[Tuple[str, Callable[[], int]]]:
+    if book_id is None:
+        with urllib.request.urlopen(f'{base_url}/api/books?per_page=1', timeout=30) as response:
+            books = json.load(response)['books']
+        book_id = books[0]['id'] if books else None
+
+    endpoints = [
+        ('GET /api/books', make_request(f'{base_url}/api/books?page=1&per_page=20')),
+        ('GET /api/books?search', make_request(f'{base_url}/api/books?search=the')),
+    ]
+    if book_id is not None:
+        endpoints.append(('GET /api/books/<id>', make_request(f'{base_url}/api/books/{book_id}')))
+        endpoints.append(('GET /api/books/<id>/recommendations',
+                          make_request(f'{base_url}/api/books/{book_id}/recommendations')))
+    if document:
+        with open(document, 'rb') as f:
+            body, content_type = encode_multipart({'top_k': '5'}, {'file': (os.path.basename(document), f.read())})
+        endpoints.append(('POST /api/search/document',
+                          make_request(f'{base_url}/api/search/document', body, content_type)))
+    if image:
+        with open(image, 'rb') as f:
+            body, content_type = encode_multipart({}, {'image': (os.path.basename(image), f.read())})
+        endpoints.append(('POST /api/search/image', make_request(f'{base_url}/api/search/image', body, content_type)))
+    return endpoints
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--requests', type=int, default=200, help='request per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--book-id', default=None)
+    parser.add_argument('--document', default=None, help='file .txt untuk /api/search/document')
+    parser.add_argument('--image', default=None, help='file gambar untuk /api/search/image')
+    parser.add_argument('--endpoints', default=None, help='filter nama endpoint, dipisah koma')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    endpoints = build_endpoints(base_url, args.book_id, args.document, args.image)
+    if args.endpoints:
+        wanted = [name.strip() for name in args.endpoints.split(',')]
+        endpoints = [(name, send) for name, send in endpoints if any(w in name for w in wanted)]
+
+    print(f"{args.requests} requests/endpoint, concurrency {args.concurrency}")
+    for name, send in endpoints:
+        send()  # warm-up
+        stats = run_endpoint(send, args.requests, args.concurrency)
+        print(f"{name:<38} {stats['throughput']:8.1f} req/s  p50 {stats['p50_ms']:8.2f} ms  "
+              f"p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}")
+
+
+if __name__ == '__main__':
+    main()
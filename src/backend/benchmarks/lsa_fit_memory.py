@@ -0,0 +1,60 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.sparse import random as sparse_random
+
+from ..textPreprocessor.tfidf import Tfidf
+from ..lsa.lsa_model import LSAModel
+
+
+# Bandingkan peak memory LSAModel.fit jalur dense (toarray) vs sparse
+# Jalankan dari root repo: python -m src.backend.benchmarks.lsa_fit_memory
+
+
+def make_term_doc_matrix(num_terms: int, num_docs: int, density: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    matrix = sparse_random(num_terms, num_docs, density=density, format='csr', dtype=np.float32,
+                           random_state=seed, data_rvs=lambda n: rng.integers(1, 20, n))
+    return matrix
+
+
+def measure(fit_fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fit_fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--terms', type=int, default=50000)
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--density', type=float, default=0.005)
+    parser.add_argument('--k', type=int, default=100)
+    parser.add_argument('--method', default='randomized')
+    args = parser.parse_args()
+
+    term_doc_matrix = make_term_doc_matrix(args.terms, args.docs, args.density)
+    tfidf_matrix = Tfidf().fit_transform(term_doc_matrix)
+    print(f"matrix {args.terms} x {args.docs}, nnz={tfidf_matrix.nnz}, "
+          f"sparse={tfidf_matrix.data.nbytes / 2**20:.1f} MiB, "
+          f"dense={args.terms * args.docs * 8 / 2**20:.1f} MiB")
+
+    def fit_dense():
+        LSAModel(k=args.k, svd_method=args.method).fit(tfidf_matrix.toarray())
+
+    def fit_sparse():
+        LSAModel(k=args.k, svd_method=args.method).fit(tfidf_matrix)
+
+    for name, fit_fn in (('dense', fit_dense), ('sparse', fit_sparse)):
+        elapsed, peak = measure(fit_fn)
+        print(f"{name:>6}: {elapsed:8.2f} s   peak {peak / 2**20:10.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
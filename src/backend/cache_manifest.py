@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# naikkan kalau layout file cache berubah, cache lama otomatis dianggap tidak valid
+SCHEMA_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+LOCK_FILE = '.lock'
+
+
+@contextmanager
+def atomic_path(path: str, suffix: str = '.tmp'):
+    # nama file sementara unik per process / thread di folder tujuan, di-rename ke path setelah selesai
+    # ditulis: file lama yang sedang di-mmap worker lain tidak rusak, dan dua process yang menulis
+    # file yang sama tidak saling menimpa file sementara
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                    suffix=suffix)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def cache_lock(cache_dir: str):
+    # lock eksklusif antar process untuk satu folder cache: worker yang menemukan cache tidak valid
+    # membangun ulang satu per satu, worker berikutnya tinggal load hasilnya
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, LOCK_FILE), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def save_array(path: str, array: np.ndarray):
+    with atomic_path(path, suffix='.tmp.npy') as tmp_path:
+        np.save(tmp_path, np.ascontiguousarray(array))
+
+
+def load_array(path: str, mmap_mode: Optional[str] = 'r') -> np.ndarray:
+    # mmap_mode='r': halaman file dibagi lewat page cache antar worker, tidak disalin ke RSS
+    return np.load(path, mmap_mode=mmap_mode)
+
+
+def file_checksum(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CacheManifest:
+    # manifest.json: schema, parameter model, hash corpus, ukuran + sha256 tiap file cache
+    # ditulis paling akhir, jadi cache yang setengah jadi tidak pernah lolos validasi
+    def __init__(self, cache_dir: str, model: str):
+        self.cache_dir = cache_dir
+        self.model = model
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.cache_dir, MANIFEST_FILE)
+
+    def read(self) -> Optional[Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write(self, files: List[str], params: Dict, corpus_hash: Optional[str] = None,
+              state: Optional[Dict] = None) -> Dict:
+        # state: info bebas milik model (mis. jumlah dokumen fold-in), tidak ikut divalidasi
+        manifest = {
+            'schema_version': SCHEMA_VERSION,
+            'model': self.model,
+            'params': params,
+            'corpus_hash': corpus_hash,
+            'state': state or {},
+            'created_at': time.time(),
+            'files': {
+                name: {
+                    'size': os.path.getsize(os.path.join(self.cache_dir, name)),
+                    'sha256': file_checksum(os.path.join(self.cache_dir, name))
+                }
+                for name in sorted(set(files))
+            }
+        }
+        with atomic_path(self.path) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1)
+        return manifest
+
+    def fingerprint(self) -> Optional[str]:
+        # id versi model: berubah setiap cache ditulis ulang, sama di semua worker
+        try:
+            with open(self.path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()[:16]
+        except FileNotFoundError:
+            return None
+
+    def state(self) -> Dict:
+        manifest = self.read()
+        return manifest.get('state', {}) if manifest else {}
+
+    def validation_error(self, params: Dict, corpus_hash: Optional[str] = None,
+                         verify_checksums: bool = False) -> Optional[str]:
+        # None kalau cache valid, selain itu alasan singkat kenapa harus rebuild
+        manifest = self.read()
+        if manifest is None:
+            return "manifest not found"
+        if manifest.get('schema_version') != SCHEMA_VERSION:
+            return f"schema version {manifest.get('schema_version')} != {SCHEMA_VERSION}"
+        if manifest.get('model') != self.model:
+            return f"manifest is for model {manifest.get('model')!r}"
+
+        cached_params = manifest.get('params', {})
+        for key, value in params.items():
+            if cached_params.get(key) != value:
+                return f"{key} changed ({cached_params.get(key)!r} -> {value!r})"
+
+        # corpus_hash None: data tidak tersedia (deploy hanya dengan cache), lewati cek corpus
+        if corpus_hash is not None and manifest.get('corpus_hash') != corpus_hash:
+            return "corpus changed"
+
+        for name, info in manifest.get('files', {}).items():
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.exists(path):
+                return f"missing {name}"
+            if os.path.getsize(path) != info['size']:
+                return f"size mismatch for {name}"
+            if verify_checksums and file_checksum(path) != info['sha256']:
+                return f"checksum mismatch for {name}"
+
+        return None
+
+    def is_valid(self, params: Dict, corpus_hash: Optional[str] = None, verify_checksums: bool = False) -> bool:
+        error = self.validation_error(params, corpus_hash, verify_checksums)
+        if error is not None:
+            print(f"Cache {self.cache_dir} invalid: {error}")
+        return error is None
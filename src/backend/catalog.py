@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class BookRecord:
+    id: str
+    title: str
+    cover: str
+    txt: str
+    position: int  # urutan di mapper.json
+    indices: Dict[str, int] = field(default_factory=dict)  # nama model -> index baris di model
+
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'title': self.title, 'cover': self.cover, 'txt': self.txt}
+
+
+class Catalog:
+    # mapper.json di-load sekali, di-reload hanya kalau mtime/size file berubah
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.mapper_path = os.path.join(data_dir, 'mapper.json')
+        self._lock = threading.Lock()
+        self._signature = None
+        self._records: List[BookRecord] = []
+        self._by_id: Dict[str, BookRecord] = {}
+        self._model_orders: Dict[str, List[str]] = {}
+        self._content_hash = None
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.mapper_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, signature):
+        with open(self.mapper_path, 'r', encoding='utf-8') as f:
+            mapper = json.load(f)
+
+        records = [
+            BookRecord(
+                id=book_id,
+                title=book_info['title'],
+                cover=book_info['cover'],
+                txt=book_info.get('txt', ''),
+                position=position
+            )
+            for position, (book_id, book_info) in enumerate(mapper.items())
+        ]
+        self._records = records
+        self._by_id = {record.id: record for record in records}
+        self._content_hash = None
+        for model, book_ids in self._model_orders.items():
+            self._apply_model_order(model, book_ids)
+        self._signature = signature
+
+    def refresh(self):
+        signature = self._file_signature()
+        # mapper.json tidak ada (mis. deploy hanya dengan cache): pakai data terakhir
+        if signature is not None and signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._load(signature)
+        return self
+
+    @property
+    def version(self):
+        self.refresh()
+        return self._signature
+
+    def records(self) -> List[BookRecord]:
+        self.refresh()
+        return self._records
+
+    def get(self, book_id: str) -> Optional[BookRecord]:
+        self.refresh()
+        return self._by_id.get(book_id)
+
+    def content_hash(self) -> Optional[str]:
+        # hash isi mapper (id, judul, path), dipakai manifest cache untuk deteksi corpus berubah
+        # None kalau mapper.json tidak pernah ter-load
+        self.refresh()
+        if self._signature is None:
+            return None
+        if self._content_hash is None:
+            digest = hashlib.sha256()
+            for record in self._records:
+                digest.update(json.dumps(record.to_dict(), sort_keys=True).encode('utf-8'))
+                digest.update(b'\n')
+            self._content_hash = digest.hexdigest()
+        return self._content_hash
+
+    def __len__(self) -> int:
+        return len(self.records())
+
+    def _apply_model_order(self, model: str, book_ids: List[str]):
+        for record in self._records:
+            record.indices.pop(model, None)
+        for idx, book_id in enumerate(book_ids):
+            record = self._by_id.get(book_id)
+            if record is not None:
+                record.indices[model] = idx
+
+    def register_model(self, model: str, book_ids: List[str]):
+        # catat urutan baris model (mis. 'lsa', 'pca') supaya record tahu index-nya
+        self.refresh()
+        with self._lock:
+            self._model_orders[model] = list(book_ids)
+            self._apply_model_order(model, book_ids)
+
+
+_catalogs: Dict[str, Catalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(data_dir: str) -> Catalog:
+    # satu Catalog per data_dir, dipakai bersama pipeline LSA, PCA dan route
+    key = os.path.abspath(data_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = Catalog(key)
+            _catalogs[key] = catalog
+    return catalog.refresh()
@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+
+
+# Konfigurasi gunicorn untuk src.backend.wsgi:app
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# model di-load sekali sebelum fork (lihat wsgi.py)
+preload_app = True
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# beberapa thread per worker: NumPy melepas GIL saat matmul / top-k
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# upload gambar / dokumen besar di koneksi lambat
+timeout = int(os.environ.get('WEB_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
@@ -1,34 +1,90 @@
 import numpy as np
-from scipy.sparse import csr_matrix
-from typing import Tuple, List
+from scipy.sparse import csr_matrix, issparse
+from typing import Tuple, List, Optional
 import os
 
 from ..algorithms.svd import truncated_svd
-from ..algorithms.similarity import find_top_k_similar
-from ..algorithms.eigenvalue import vector_length
+from ..algorithms.similarity import find_top_k_similar, find_top_k_similar_batch, build_neighbor_table
+from ..algorithms.topk import top_k as select_top_k
+from ..algorithms.eigenvalue import vector_length, qr_decomposition
+from ..algorithms.ann import IVFIndex
+from ..algorithms.quantization import QuantizedIndex
+from ..cache_manifest import save_array, load_array
+
+
+# float32 / float64: dtype komputasi dan cache, int8: embedding float32 + kode int8 untuk scoring
+PRECISIONS = ("float32", "float64", "int8")
+
+
+NEIGHBOR_FILES = ('neighbor_indices.npy', 'neighbor_scores.npy')
+
+
+def remove_files(output_dir: str, names):
+    for name in names:
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
 
 
 class LSAModel:
-    def __init__(self, k: int = 100):
+    def __init__(self, k: int = 100, svd_method: str = "randomized", ann_threshold: int = 10000,
+                 ann_n_probe: int = 8, precision: str = "float32", rerank_factor: int = 4):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision} (pilih salah satu dari {PRECISIONS})")
         self.k = k
+        self.svd_method = svd_method
+        self.precision = precision
+        self.dtype = np.float64 if precision == "float64" else np.float32
+        # int8: top (k * rerank_factor) kandidat di-rerank dengan embedding float
+        self.rerank_factor = rerank_factor
+        self.quantized_index = None
+        # index ANN hanya dibangun kalau jumlah dokumen >= ann_threshold
+        self.ann_threshold = ann_threshold
+        self.ann_n_probe = ann_n_probe
         self.document_embeddings_normalized = None
         self.U_k = None
         self.sigma_k = None
+        self.ann_index = None
+        # tabel rekomendasi: top-m tetangga tiap dokumen
+        self.neighbor_indices = None
+        self.neighbor_scores = None
+        self.sigma_k_inv = None
+        # diag(idf) @ U_k @ sigma_k^(-1) (vocab x k), dibangun lewat build_query_projection
+        self.query_projection = None
 
     def fit(self, tfidf_matrix: csr_matrix):
-        tfidf_dense = tfidf_matrix.toarray()
+        # matriks tetap sparse, solver SVD hanya butuh A @ X dan A.T @ X
+        U_k, sigma_k, V_k = truncated_svd(tfidf_matrix.astype(self.dtype), k=self.k, method=self.svd_method)
 
-        U_k, sigma_k, V_k = truncated_svd(tfidf_dense, k=self.k)
-
-        self.U_k = U_k
+        self.U_k = U_k.astype(self.dtype)
         self.sigma_k = sigma_k
+        self.sigma_k_inv = None
+        self.query_projection = None
 
         document_embeddings = V_k.T @ sigma_k
 
-        self.document_embeddings_normalized = self.normalize_embeddings(document_embeddings)
+        self.document_embeddings_normalized = self.normalize_embeddings(document_embeddings).astype(self.dtype)
+
+        self.build_search_indexes()
+
+        return self
+
+    def build_search_indexes(self):
+        self.ann_index = None
+        if self.document_embeddings_normalized.shape[0] >= self.ann_threshold:
+            self.build_ann_index()
 
+        self.quantized_index = None
+        if self.precision == "int8":
+            self.quantized_index = QuantizedIndex(metric="cosine", rerank_factor=self.rerank_factor)
+            self.quantized_index.build(self.document_embeddings_normalized)
         return self
 
+    def build_ann_index(self):
+        self.ann_index = IVFIndex(metric="cosine", n_probe=self.ann_n_probe)
+        self.ann_index.build(self.document_embeddings_normalized)
+        return self.ann_index
+
     def normalize_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
         normalized = np.zeros_like(embeddings)
         for i in range(embeddings.shape[0]):
@@ -39,21 +95,132 @@ class LSAModel:
                 normalized[i] = embeddings[i]
         return normalized
 
+    def projection_residuals(self, tfidf_matrix, projected: np.ndarray) -> np.ndarray:
+        # porsi energi tiap dokumen di luar span U_k: 0 = terwakili penuh, 1 = ortogonal
+        if issparse(tfidf_matrix):
+            squared = np.asarray(tfidf_matrix.multiply(tfidf_matrix).sum(axis=1)).ravel()
+        else:
+            squared = np.sum(np.asarray(tfidf_matrix) ** 2, axis=1)
+        captured = np.sum(projected * projected, axis=1)
+        residuals = np.zeros_like(squared, dtype=np.float64)
+        nonzero = squared > 1e-12
+        residuals[nonzero] = np.clip(1.0 - captured[nonzero] / squared[nonzero], 0.0, 1.0)
+        return residuals
+
+    def residuals(self, tfidf_matrix) -> np.ndarray:
+        # residual proyeksi dokumen ke span U_k tanpa mengubah model, dipakai untuk mengukur drift
+        return self.projection_residuals(tfidf_matrix, np.asarray(tfidf_matrix @ self.U_k, dtype=np.float64))
+
+    def fold_in(self, tfidf_matrix) -> np.ndarray:
+        # dokumen baru (Q x vocab) diproyeksikan ke ruang LSA yang ada, U_k / sigma_k tetap
+        # embedding hasil fit = V_k sigma_k = A^T U_k, jadi dokumen baru cukup d^T U_k
+        projected = np.asarray(tfidf_matrix @ self.U_k, dtype=np.float64)
+        self.document_embeddings_normalized = np.vstack([
+            np.asarray(self.document_embeddings_normalized),
+            self.normalize_embeddings(projected).astype(self.document_embeddings_normalized.dtype)
+        ])
+        return self.projection_residuals(tfidf_matrix, projected)
+
+    def update_svd(self, tfidf_matrix) -> np.ndarray:
+        # update SVD inkremental (Brand) untuk kolom dokumen baru C (vocab x c):
+        # [U S V^T, C] = [U J] M [[V, 0], [0, I]]^T, dengan C - U U^T C = J K
+        # dan M = [[S, U^T C], [0, K]] yang kecil ((k+c) x (k+c))
+        C = tfidf_matrix.T.toarray() if issparse(tfidf_matrix) else np.asarray(tfidf_matrix, dtype=np.float64).T
+        U = np.asarray(self.U_k, dtype=np.float64)
+        singular_values = np.diag(self.sigma_k).astype(np.float64)
+        sigma_inv = self.sigma_k_inverse().astype(np.float64)
+        k, c = U.shape[1], C.shape[1]
+
+        L = U.T @ C
+        J, K = qr_decomposition(C - U @ L)
+        residuals = self.projection_residuals(tfidf_matrix, L.T)
+
+        M = np.zeros((k + c, k + c))
+        M[:k, :k] = np.diag(singular_values)
+        M[:k, k:] = L
+        M[k:, k:] = K
+        U_m, sigma_m, V_m = truncated_svd(M, self.k, method="full")
+
+        # V baru = [[V, 0], [0, I]] V_m^T, embedding = V sigma
+        # baris dokumen lama: v_j sebanding dengan e_j sigma^(-1), cukup rotasi k x k lalu normalisasi ulang
+        W = V_m.T @ sigma_m
+        old_embeddings = np.asarray(self.document_embeddings_normalized, dtype=np.float64) @ (W[:k] * sigma_inv[:, None])
+        embeddings = np.vstack([old_embeddings, W[k:]])
+
+        dtype = self.document_embeddings_normalized.dtype
+        self.U_k = np.hstack([U, J]) @ U_m
+        self.sigma_k = sigma_m
+        self.sigma_k_inv = None
+        self.query_projection = None
+        self.document_embeddings_normalized = self.normalize_embeddings(embeddings).astype(dtype)
+        return residuals
+
+    def refresh_indexes(self, m: Optional[int] = None):
+        # setelah dokumen ditambahkan: tabel rekomendasi dan index ANN dibangun ulang
+        if m is None and self.neighbor_indices is not None:
+            m = self.neighbor_indices.shape[1]
+        if m is not None:
+            self.build_neighbor_table(m=m)
+
+        return self.build_search_indexes()
+
+    def build_neighbor_table(self, m: int = 20, block_size: int = 1024):
+        self.neighbor_indices, self.neighbor_scores = build_neighbor_table(
+            self.document_embeddings_normalized, m=m, block_size=block_size)
+        return self
+
     def get_similar_documents(self, doc_idx: int, top_k: int = 5) -> List[Tuple[int, float]]:
+        if self.neighbor_indices is not None and top_k <= self.neighbor_indices.shape[1]:
+            return [(int(idx), float(score)) for idx, score in
+                    zip(self.neighbor_indices[doc_idx, :top_k], self.neighbor_scores[doc_idx, :top_k])]
+
+        if self.ann_index is not None:
+            return self.ann_index.search(self.document_embeddings_normalized[doc_idx], top_k, exclude=doc_idx)
+        if self.quantized_index is not None:
+            return self.quantized_index.search(self.document_embeddings_normalized[doc_idx], top_k, exclude=doc_idx)
 
         return find_top_k_similar(doc_idx, self.document_embeddings_normalized, k=top_k)
 
-    def find_query_embedding(self, query_tfidf_vector: np.ndarray) -> np.ndarray:
-        if query_tfidf_vector.ndim == 1:
-            query_tfidf_vector = query_tfidf_vector.reshape(-1, 1)
+    def sigma_k_inverse(self) -> np.ndarray:
+        # dihitung sekali per fit/load
+        if self.sigma_k_inv is None:
+            singular_values = np.diag(self.sigma_k)
+            sigma_k_inv = np.zeros_like(singular_values)
+            nonzero = singular_values > 1e-7
+            sigma_k_inv[nonzero] = 1.0 / singular_values[nonzero]
+            self.sigma_k_inv = sigma_k_inv
+        return self.sigma_k_inv
+
+    def build_query_projection(self, idf_vector: np.ndarray) -> np.ndarray:
+        # IDF dilipat ke U_k sigma_k^(-1): query cukup dikali bobot TF-nya
+        idf_vector = np.asarray(idf_vector, dtype=self.U_k.dtype)
+        self.query_projection = (self.U_k * idf_vector[:, None]) * self.sigma_k_inverse()
+        return self.query_projection
+
+    def project_term_weights(self, term_indices: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        # pasangan (index term, bobot TF) satu query -> embedding k, hanya baris term yang muncul
+        if len(term_indices) == 0:
+            return np.zeros(self.query_projection.shape[1], dtype=self.query_projection.dtype)
+        return np.asarray(weights) @ self.query_projection[term_indices]
 
-        sigma_k_inv = np.zeros_like(self.sigma_k)
-        for i in range(self.k):
-            if self.sigma_k[i, i] > 1e-7:
-                sigma_k_inv[i, i] = 1.0 / self.sigma_k[i, i]
+    def project_query_tf(self, query_tf_matrix) -> np.ndarray:
+        # (Q x vocab) bobot TF sparse -> (Q x k)
+        return np.asarray(query_tf_matrix @ self.query_projection)
 
-        query_embedding = (sigma_k_inv @ self.U_k.T @ query_tfidf_vector).T
-        return query_embedding.flatten()
+    def find_query_embeddings(self, query_tfidf_matrix) -> np.ndarray:
+        # (Q x vocab) @ U_k * sigma_k^(-1) -> (Q x k), sparse hanya menyentuh baris term yang muncul
+        if not issparse(query_tfidf_matrix):
+            query_tfidf_matrix = np.atleast_2d(np.asarray(query_tfidf_matrix))
+        projected = np.asarray(query_tfidf_matrix @ self.U_k)
+        return projected * self.sigma_k_inverse()
+
+    def find_query_embedding(self, query_tfidf_vector) -> np.ndarray:
+        if issparse(query_tfidf_vector):
+            query_tfidf_vector = csr_matrix(query_tfidf_vector.reshape(1, -1))
+        else:
+            query_tfidf_vector = np.asarray(query_tfidf_vector).reshape(1, -1)
+
+        return self.find_query_embeddings(query_tfidf_vector)[0]
 
     def find_similar_to_query(self, query_embedding: np.ndarray, top_k: int = 5) -> List[Tuple[int, float]]:
         query_length = vector_length(query_embedding)
@@ -62,21 +229,96 @@ class LSAModel:
         else:
             query_normalized = query_embedding
 
-        similarities = self.document_embeddings_normalized @ query_normalized
+        if self.ann_index is not None:
+            return self.ann_index.search(query_normalized, top_k)
+        if self.quantized_index is not None:
+            return self.quantized_index.search(query_normalized, top_k)
 
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-        results = [(int(idx), float(similarities[idx])) for idx in top_indices]
+        # query di-cast ke dtype embedding, matriks N x k tidak di-upcast
+        similarities = self.document_embeddings_normalized @ query_normalized.astype(self.document_embeddings_normalized.dtype)
+
+        top_indices, top_scores = select_top_k(similarities, top_k)
+        results = [(int(idx), float(score)) for idx, score in zip(top_indices, top_scores)]
 
         return results
 
-    def save(self, output_dir: str):
+    def find_similar_to_queries(self, query_embeddings: np.ndarray, top_k: int = 5) -> List[List[Tuple[int, float]]]:
+        lengths = np.linalg.norm(query_embeddings, axis=1)
+        lengths[lengths <= 1e-7] = 1.0
+        queries_normalized = query_embeddings / lengths[:, None]
+
+        if self.ann_index is not None:
+            return [self.ann_index.search(query, top_k) for query in queries_normalized]
+        if self.quantized_index is not None:
+            return self.quantized_index.search_batch(queries_normalized, top_k)
+
+        return find_top_k_similar_batch(queries_normalized, self.document_embeddings_normalized, k=top_k)
+
+    def save(self, output_dir: str) -> List[str]:
+        # return nama file yang ditulis, dicatat di manifest cache
         os.makedirs(output_dir, exist_ok=True)
-        np.save(os.path.join(output_dir, 'document_embeddings_normalized.npy'), self.document_embeddings_normalized.astype(np.float32))
-        np.save(os.path.join(output_dir, 'U_k.npy'), self.U_k.astype(np.float32))
-        np.save(os.path.join(output_dir, 'sigma_k.npy'), self.sigma_k.astype(np.float32))
+        arrays = {
+            'document_embeddings_normalized.npy': self.document_embeddings_normalized,
+            'U_k.npy': self.U_k,
+            'sigma_k.npy': self.sigma_k,
+        }
+        if self.query_projection is not None:
+            arrays['query_projection.npy'] = self.query_projection
+        else:
+            # file opsional yang tidak ditulis ulang dihapus, load() tidak boleh memungut versi lama
+            remove_files(output_dir, ['query_projection.npy'])
+        for name, array in arrays.items():
+            save_array(os.path.join(output_dir, name), np.asarray(array, dtype=self.dtype))
 
-    def load(self, input_dir: str):
-        self.document_embeddings_normalized = np.load(os.path.join(input_dir, 'document_embeddings_normalized.npy'))
-        self.U_k = np.load(os.path.join(input_dir, 'U_k.npy'))
+        files = list(arrays)
+        if self.ann_index is not None:
+            self.ann_index.save(output_dir)
+            files.extend(IVFIndex.FILES)
+        else:
+            IVFIndex.remove(output_dir)
+        if self.quantized_index is not None:
+            self.quantized_index.save(output_dir)
+            files.extend(QuantizedIndex.FILES)
+        else:
+            QuantizedIndex.remove(output_dir)
+        if self.neighbor_indices is not None:
+            save_array(os.path.join(output_dir, 'neighbor_indices.npy'), self.neighbor_indices)
+            save_array(os.path.join(output_dir, 'neighbor_scores.npy'), self.neighbor_scores)
+            files.extend(NEIGHBOR_FILES)
+        else:
+            remove_files(output_dir, NEIGHBOR_FILES)
+        return files
+
+    def load(self, input_dir: str, mmap_mode: Optional[str] = 'r'):
+        # default mmap read-only: matriks dibagi antar worker lewat page cache
+        self.document_embeddings_normalized = load_array(os.path.join(input_dir, 'document_embeddings_normalized.npy'), mmap_mode)
+        self.U_k = load_array(os.path.join(input_dir, 'U_k.npy'), mmap_mode)
         self.sigma_k = np.load(os.path.join(input_dir, 'sigma_k.npy'))
+        self.sigma_k_inv = None
+        self.query_projection = None
+        projection_path = os.path.join(input_dir, 'query_projection.npy')
+        if os.path.exists(projection_path):
+            self.query_projection = load_array(projection_path, mmap_mode)
+
+        self.neighbor_indices = None
+        self.neighbor_scores = None
+        neighbor_path = os.path.join(input_dir, 'neighbor_indices.npy')
+        if os.path.exists(neighbor_path):
+            self.neighbor_indices = load_array(neighbor_path, mmap_mode)
+            self.neighbor_scores = load_array(os.path.join(input_dir, 'neighbor_scores.npy'), mmap_mode)
+
+        self.ann_index = None
+        if IVFIndex.exists(input_dir):
+            self.ann_index = IVFIndex(metric="cosine", n_probe=self.ann_n_probe).load(input_dir, mmap_mode)
+            self.ann_index.attach(self.document_embeddings_normalized)
+        elif self.document_embeddings_normalized.shape[0] >= self.ann_threshold:
+            self.build_ann_index()
+
+        self.quantized_index = None
+        if self.precision == "int8":
+            self.quantized_index = QuantizedIndex(metric="cosine", rerank_factor=self.rerank_factor)
+            if QuantizedIndex.exists(input_dir):
+                self.quantized_index.load(input_dir, mmap_mode).attach(self.document_embeddings_normalized)
+            else:
+                self.quantized_index.build(self.document_embeddings_normalized)
         return self
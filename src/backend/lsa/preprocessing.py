@@ -1,37 +1,85 @@
 import os
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 
-from ..textPreprocessor.data_loader import load_dataset
-from ..textPreprocessor.text_processor import preprocess_documents, TextPreprocessor
-from ..textPreprocessor.document_indexer import build_matrix_from_documents
+from ..textPreprocessor.data_loader import iter_book_entries, resolve_data_path
+from ..textPreprocessor.text_processor import preprocess_files, TextPreprocessor
+from ..textPreprocessor.document_indexer import DocumentIndexer, filter_term_lengths
 from ..textPreprocessor.tfidf import Tfidf
+from ..textPreprocessor.title_index import TitleIndex
+from ..textPreprocessor.vocabulary import Vocabulary, HashingVocabulary
 from .lsa_model import LSAModel
+from ..catalog import get_catalog
+from ..cache_manifest import CacheManifest, atomic_path, cache_lock
 import numpy as np
+from scipy.sparse import csr_matrix
 from collections import Counter
 
 
 class Preprocessing:
-    def __init__(self, data_dir: str = "../../../data/", cache_dir: str = "./cache", k: int = 100):
+    def __init__(self, data_dir: str = "../../../data/", cache_dir: str = "./cache", k: int = 100,
+                 workers: Optional[int] = None, chunk_size: int = 4, tokenizer: str = "nltk",
+                 recommendation_size: int = 20, drift_threshold: float = 0.1, max_fold_fraction: float = 0.2,
+                 svd_update: bool = False,
+                 precision: str = "float32", tf_scheme: str = "frequency", norm: Optional[str] = None,
+                 min_df: int = 2, hashing_features: Optional[int] = None, max_df: Union[int, float, None] = None,
+                 max_features: Optional[int] = None, max_features_by: str = "df", min_term_length: int = 1,
+                 max_term_length: Optional[int] = None):
         self.data_dir = data_dir
         self.cache_dir = cache_dir
         self.k = k
+        # jumlah process preprocessing teks, None = default terbatas (lihat resolve_workers)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.tokenizer = tokenizer
+        # jumlah tetangga yang disimpan per buku di tabel rekomendasi
+        self.recommendation_size = recommendation_size
+        # buku baru di-fold-in selama rata-rata residual proyeksinya (porsi energi di luar span U_k)
+        # tidak lebih dari drift_threshold di atas rata-rata residual dokumen saat fit penuh
+        self.drift_threshold = drift_threshold
+        # batas jumlah: refit juga kalau buku hasil fold-in > max_fold_fraction * dokumen saat fit penuh
+        self.max_fold_fraction = max_fold_fraction
+        # True: U_k / sigma_k ikut di-update (SVD inkremental), False: fold-in saja
+        self.svd_update = svd_update
+        # float32 (default), float64, atau int8 (embedding terkuantisasi + rerank float32)
+        self.precision = precision
+        # skema bobot TF-IDF (lihat Tfidf), dipakai sama untuk dokumen dan query
+        self.tf_scheme = tf_scheme
+        self.norm = norm
+        # term yang muncul di < min_df dokumen dibuang
+        self.min_df = min_df
+        # None: vocabulary term, selain itu feature hashing dengan jumlah bucket ini
+        self.hashing_features = hashing_features
+        # batas ukuran vocabulary, lihat DocumentIndexer
+        self.max_df = max_df
+        self.max_features = max_features
+        self.max_features_by = max_features_by
+        self.min_term_length = min_term_length
+        self.max_term_length = max_term_length
+        self.text_preprocessor = TextPreprocessor(tokenizer=tokenizer)
         self.books = []
         self.lsa_model = None
         self.vocabulary = None
-        self.term_list = None
         self.tfidf_transformer = None
-
-    def cache_exists(self) -> bool:
-        required_files = [
-            'document_embeddings_normalized.npy',
-            'U_k.npy',
-            'sigma_k.npy',
-            'term_list.json',
-            'idf_vector.npy',
-            'books_metadata.json'
-        ]
-        return all(os.path.exists(os.path.join(self.cache_dir, f)) for f in required_files)
+        self.book_index = {}  # book id -> index
+        self.title_index = None
+        # fingerprint manifest cache, dipakai sebagai kunci invalidasi cache hasil query
+        self.model_version = None
+
+    def cache_params(self) -> Dict:
+        # parameter yang menentukan isi cache, disimpan & dicek lewat manifest
+        return {'k': self.k, 'tokenizer': self.tokenizer, 'dtype': self.precision,
+                'tf_scheme': self.tf_scheme, 'norm': self.norm,
+                'min_df': self.min_df, 'hashing_features': self.hashing_features, 'max_df': self.max_df,
+                'max_features': self.max_features, 'max_features_by': self.max_features_by,
+                'min_term_length': self.min_term_length, 'max_term_length': self.max_term_length}
+
+    def corpus_hash(self) -> Optional[str]:
+        return get_catalog(resolve_data_path(self.data_dir)).content_hash()
+
+    def cache_exists(self, verify_checksums: bool = False) -> bool:
+        manifest = CacheManifest(self.cache_dir, 'lsa')
+        return manifest.is_valid(self.cache_params(), self.corpus_hash(), verify_checksums)
 
     def save_books_metadata(self):
         metadata = [
@@ -42,8 +90,9 @@ class Preprocessing:
             }
             for book in self.books
         ]
-        with open(os.path.join(self.cache_dir, 'books_metadata.json'), 'w') as f:
-            json.dump(metadata, f)
+        with atomic_path(os.path.join(self.cache_dir, 'books_metadata.json')) as tmp_path:
+            with open(tmp_path, 'w') as f:
+                json.dump(metadata, f)
 
     def load_books_metadata(self):
         with open(os.path.join(self.cache_dir, 'books_metadata.json'), 'r') as f:
@@ -51,62 +100,173 @@ class Preprocessing:
 
     def run_full_preprocessing(self):
         print("Loading docs...")
-        self.books = load_dataset(self.data_dir)
-
-        documents = [book['content'] for book in self.books]
+        entries = list(iter_book_entries(self.data_dir))
 
-        print("Preprocessing...")
-        preprocessed_docs = preprocess_documents(documents)
-
-        print("Building matrix...")
-        term_doc_matrix, vocabulary, term_list = build_matrix_from_documents(preprocessed_docs)
+        print("Preprocessing & building matrix...")
+        self.books = []
+        # Counter tiap dokumen langsung masuk indexer, tidak ditahan sampai semua file selesai
+        indexer = DocumentIndexer(min_df=self.min_df, n_features=self.hashing_features, max_df=self.max_df,
+                                  max_features=self.max_features, max_features_by=self.max_features_by,
+                                  min_term_length=self.min_term_length, max_term_length=self.max_term_length)
+        term_counters = preprocess_files((entry['txt_path'] for entry in entries),
+                                         workers=self.workers, chunk_size=self.chunk_size,
+                                         tokenizer=self.tokenizer)
+        for entry, term_counter in zip(entries, term_counters):
+            if term_counter is None:
+                continue
+            self.books.append({
+                'id': entry['id'],
+                'title': entry['title'],
+                'cover': entry['cover']
+            })
+            indexer.add_document(term_counter)
+        term_doc_matrix = indexer.build()
 
         print("Computing TF-IDF...")
-        tfidf_transformer = Tfidf()
+        tfidf_transformer = Tfidf(tf_scheme=self.tf_scheme, norm=self.norm)
         tfidf_matrix = tfidf_transformer.fit_transform(term_doc_matrix)
 
-        self.vocabulary = vocabulary
-        self.term_list = term_list
+        self.vocabulary = indexer.vocabulary
         self.tfidf_transformer = tfidf_transformer
 
         print("Applying LSA...")
-        self.lsa_model = LSAModel(k=self.k)
+        self.lsa_model = LSAModel(k=self.k, precision=self.precision)
         self.lsa_model.fit(tfidf_matrix)
+        self.lsa_model.build_query_projection(tfidf_transformer.idf_vector)
+
+        print("Building recommendation table...")
+        self.lsa_model.build_neighbor_table(m=self.recommendation_size)
 
         print("Caching...")
+        # tfidf_matrix term x dokumen, residuals butuh dokumen x term
+        fit_residual = float(self.lsa_model.residuals(tfidf_matrix.T).mean()) if self.books else 0.0
+        self.save_cache({'fitted_documents': len(self.books), 'folded_documents': 0, 'residual_sum': 0.0,
+                         'fit_residual': fit_residual})
+
+        self.build_book_indexes()
+
+    def save_cache(self, state: Dict):
         os.makedirs(self.cache_dir, exist_ok=True)
-        self.lsa_model.save(self.cache_dir)
+        files = self.lsa_model.save(self.cache_dir)
         self.save_books_metadata()
-
-        with open(os.path.join(self.cache_dir, 'term_list.json'), 'w') as f:
-            json.dump(term_list, f)
-        np.save(os.path.join(self.cache_dir, 'idf_vector.npy'), tfidf_transformer.idf_vector.astype(np.float32))
+        files += self.vocabulary.save(self.cache_dir)
+        files += self.tfidf_transformer.save(self.cache_dir)
+        files.append('books_metadata.json')
+        # manifest terakhir: baru valid setelah semua file selesai ditulis
+        CacheManifest(self.cache_dir, 'lsa').write(files, self.cache_params(), self.corpus_hash(), state)
+
+    def can_update_incrementally(self) -> bool:
+        # cache valid kecuali corpus, dan semua buku di cache masih ada di mapper (hanya ada tambahan)
+        manifest = CacheManifest(self.cache_dir, 'lsa')
+        if manifest.validation_error(self.cache_params()) is not None:
+            return False
+        catalog = get_catalog(resolve_data_path(self.data_dir))
+        if catalog.version is None:
+            return False
+        return all(catalog.get(book['id']) is not None for book in self.load_books_metadata())
+
+    def update_incremental(self) -> int:
+        # buku baru di mapper.json diproyeksikan ke ruang LSA yang ada tanpa refit penuh
+        # IDF dan vocabulary tetap sampai refit berikutnya
+        catalog = get_catalog(resolve_data_path(self.data_dir))
+        for book in self.books:
+            record = catalog.get(book['id'])
+            if record is not None:
+                book['title'] = record.title
+                book['cover'] = record.cover
+
+        entries = [entry for entry in iter_book_entries(self.data_dir) if entry['id'] not in self.book_index]
+        state = dict(CacheManifest(self.cache_dir, 'lsa').state())
+        state.setdefault('fitted_documents', len(self.books))
+        state.setdefault('folded_documents', 0)
+        state.setdefault('residual_sum', 0.0)
+
+        # cache lama tanpa residual baseline: refit sekali supaya drift bisa diukur
+        if 'fit_residual' not in state or \
+                state['folded_documents'] + len(entries) > self.max_fold_fraction * state['fitted_documents']:
+            print(f"{state['folded_documents'] + len(entries)} books since last fit, refitting...")
+            self.run_full_preprocessing()
+            return len(entries)
+
+        new_books = []
+        term_counters = []
+        counters = preprocess_files((entry['txt_path'] for entry in entries),
+                                    workers=self.workers, chunk_size=self.chunk_size, tokenizer=self.tokenizer)
+        for entry, term_counter in zip(entries, counters):
+            if term_counter is None:
+                continue
+            new_books.append({'id': entry['id'], 'title': entry['title'], 'cover': entry['cover']})
+            term_counters.append(term_counter)
+
+        if new_books:
+            print(f"Folding in {len(new_books)} books...")
+            tfidf_matrix = self.tfidf_transformer.transform_queries(self.build_count_matrix(term_counters))
+            residual_sum = state['residual_sum'] + float(self.lsa_model.residuals(tfidf_matrix).sum())
+            drift = residual_sum / (state['folded_documents'] + len(new_books)) - state['fit_residual']
+            if drift > self.drift_threshold:
+                print(f"Fold-in residual {drift:.3f} above fit, refitting...")
+                self.run_full_preprocessing()
+                return len(new_books)
+
+            if self.svd_update:
+                self.lsa_model.update_svd(tfidf_matrix)
+                self.lsa_model.build_query_projection(self.tfidf_transformer.idf_vector)
+            else:
+                self.lsa_model.fold_in(tfidf_matrix)
+            self.lsa_model.refresh_indexes(m=self.recommendation_size)
+
+            self.books.extend(new_books)
+            state['folded_documents'] += len(new_books)
+            state['residual_sum'] = residual_sum
+
+        self.save_cache(state)
+        self.build_book_indexes()
+        return len(new_books)
 
     def load_from_cache(self):
-        self.lsa_model = LSAModel(k=self.k)
-        self.lsa_model.load(self.cache_dir)
+        self.lsa_model = LSAModel(k=self.k, precision=self.precision)
+        self.lsa_model.load(self.cache_dir, mmap_mode='r')
+        if self.lsa_model.neighbor_indices is None:
+            self.lsa_model.build_neighbor_table(m=self.recommendation_size)
 
         metadata = self.load_books_metadata()
         self.books = metadata
 
-        with open(os.path.join(self.cache_dir, 'term_list.json'), 'r') as f:
-            self.term_list = json.load(f)
-        self.vocabulary = {term: idx for idx, term in enumerate(self.term_list)}
-
-        idf_vector = np.load(os.path.join(self.cache_dir, 'idf_vector.npy'))
-        self.tfidf_transformer = Tfidf()
-        self.tfidf_transformer.idf_vector = idf_vector
-        self.tfidf_transformer.num_terms = len(self.term_list)
-
-    def initialize(self):
-        if self.cache_exists():
-            self.load_from_cache()
-        else:
-            self.run_full_preprocessing()
-
-    def get_book_recommendations(self, book_idx: int, top_k: int = 5) -> List[Dict]:
-        similar_docs = self.lsa_model.get_similar_documents(book_idx, top_k)
-
+        vocabulary_class = Vocabulary if self.hashing_features is None else HashingVocabulary
+        self.vocabulary = vocabulary_class.load(self.cache_dir, mmap_mode='r')
+
+        self.tfidf_transformer = Tfidf.load(self.cache_dir, mmap_mode='r')
+        if self.lsa_model.query_projection is None:
+            self.lsa_model.build_query_projection(self.tfidf_transformer.idf_vector)
+
+        self.build_book_indexes()
+
+    def build_book_indexes(self):
+        # dipanggil di akhir fit, load dan update inkremental
+        self.model_version = CacheManifest(self.cache_dir, 'lsa').fingerprint()
+        self.book_index = {book['id']: idx for idx, book in enumerate(self.books)}
+        self.title_index = TitleIndex([book['title'] for book in self.books])
+        get_catalog(resolve_data_path(self.data_dir)).register_model('lsa', [book['id'] for book in self.books])
+
+    def cached_version(self) -> Optional[str]:
+        # fingerprint manifest di disk saat ini, beda dengan model_version kalau cache ditulis ulang process lain
+        return CacheManifest(self.cache_dir, 'lsa').fingerprint()
+
+    def initialize(self, rebuild: bool = False):
+        # dengan lock: kalau beberapa worker start bersamaan dengan cache tidak valid, hanya yang pertama
+        # membangun ulang, sisanya menunggu lalu load cache yang sudah jadi
+        with cache_lock(self.cache_dir):
+            if rebuild:
+                self.run_full_preprocessing()
+            elif self.cache_exists():
+                self.load_from_cache()
+            elif self.can_update_incrementally():
+                self.load_from_cache()
+                self.update_incremental()
+            else:
+                self.run_full_preprocessing()
+
+    def to_recommendations(self, similar_docs) -> List[Dict]:
         recommendations = []
         for doc_idx, similarity in similar_docs:
             recommendations.append({
@@ -118,37 +278,78 @@ class Preprocessing:
 
         return recommendations
 
+    def get_book_recommendations(self, book_idx: int, top_k: int = 5) -> List[Dict]:
+        similar_docs = self.lsa_model.get_similar_documents(book_idx, top_k)
+        return self.to_recommendations(similar_docs)
+
     def get_book_by_id(self, book_id: str) -> Dict:
-        for idx, book in enumerate(self.books):
-            if book['id'] == book_id:
-                return {'index': idx, **book}
-        return None
+        idx = self.book_index.get(book_id)
+        if idx is None:
+            return None
+        return {'index': idx, **self.books[idx]}
+
+    def search_books(self, query: str) -> List[Dict]:
+        if not query:
+            return self.books
+        return [self.books[idx] for idx in self.title_index.search(query)]
+
+    def build_count_matrix(self, term_counters: List[Counter]) -> csr_matrix:
+        # satu baris frekuensi term per dokumen (Q x vocab)
+        rows = []
+        term_indices = []
+        freqs = []
+        for row, term_counter in enumerate(term_counters):
+            indices, counts = self.vocabulary_term_counts(term_counter)
+            rows.append(np.full(len(indices), row, dtype=np.int32))
+            term_indices.append(indices)
+            freqs.append(counts)
+
+        if not term_counters:
+            return csr_matrix((0, len(self.vocabulary)))
+        return csr_matrix(
+            (np.concatenate(freqs), (np.concatenate(rows), np.concatenate(term_indices))),
+            shape=(len(term_counters), len(self.vocabulary))
+        )
+
+    def build_query_matrix(self, document_texts: List[str]) -> csr_matrix:
+        return self.build_count_matrix([Counter(self.text_preprocessor.preprocess(text)) for text in document_texts])
+
+    def query_term_counts(self, document_text: str):
+        return self.vocabulary_term_counts(Counter(self.text_preprocessor.preprocess(document_text)))
+
+    def vocabulary_term_counts(self, term_counts: Counter):
+        # pasangan (index term, frekuensi) untuk term yang ada di vocabulary
+        term_counts = filter_term_lengths(term_counts, self.min_term_length, self.max_term_length)
+        term_indices = self.vocabulary.lookup_many(term_counts.keys())
+        freqs = np.fromiter(term_counts.values(), dtype=np.float64, count=len(term_counts))
+        found = term_indices >= 0
+        # mode hashing: term berbeda bisa jatuh ke bucket yang sama, frekuensinya digabung dulu
+        # (sama seperti sum_duplicates di indexer dan build CSR) sebelum diberi bobot
+        term_indices, inverse = np.unique(term_indices[found], return_inverse=True)
+        return term_indices, np.bincount(inverse, weights=freqs[found], minlength=term_indices.size)
+
+    def query_term_weights(self, document_text: str):
+        # pasangan (index term, bobot TF)
+        term_indices, freqs = self.query_term_counts(document_text)
+        return term_indices, self.tfidf_transformer.query_term_weights(freqs, term_indices)
+
+    def search_by_documents(self, document_texts: List[str], top_k: int = 5) -> List[List[Dict]]:
+        query_matrix = self.build_query_matrix(document_texts)
+
+        query_tf = self.tfidf_transformer.query_tf(query_matrix)
+
+        # IDF sudah dilipat ke proyeksi, tidak perlu matriks TF-IDF query
+        query_embeddings = self.lsa_model.project_query_tf(query_tf)
+
+        similar_docs = self.lsa_model.find_similar_to_queries(query_embeddings, top_k)
+
+        return [self.to_recommendations(docs) for docs in similar_docs]
 
     def search_by_document(self, document_text: str, top_k: int = 5) -> List[Dict]:
-        preprocessor = TextPreprocessor()
-        tokens = preprocessor.preprocess(document_text)
-
-        term_freq = Counter(tokens)
+        term_indices, weights = self.query_term_weights(document_text)
 
-        query_vector = np.zeros(len(self.term_list))
-        for term, freq in term_freq.items():
-            if term in self.vocabulary:
-                term_idx = self.vocabulary[term]
-                query_vector[term_idx] = freq
-
-        query_tfidf = self.tfidf_transformer.transform_query(query_vector)
-
-        query_embedding = self.lsa_model.find_query_embedding(query_tfidf)
+        query_embedding = self.lsa_model.project_term_weights(term_indices, weights)
 
         similar_docs = self.lsa_model.find_similar_to_query(query_embedding, top_k)
 
-        recommendations = []
-        for doc_idx, similarity in similar_docs:
-            recommendations.append({
-                'id': self.books[doc_idx]['id'],
-                'title': self.books[doc_idx]['title'],
-                'cover': self.books[doc_idx]['cover'],
-                'similarity': similarity
-            })
-
-        return recommendations
+        return self.to_recommendations(similar_docs)
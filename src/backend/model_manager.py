@@ -0,0 +1,120 @@
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+
+class ModelManager:
+    # Pipeline (LSA, PCA) dibangun / di-load di thread background lalu di-swap atomik
+    # request memegang referensi pipeline lama sampai selesai, request baru langsung pakai versi baru
+    def __init__(self, factories: Dict[str, Callable[[], object]],
+                 on_swap: Optional[Callable[[str, object], None]] = None):
+        # factories: nama model -> fungsi yang membuat pipeline baru (belum di-initialize)
+        # on_swap(nama, pipeline): dipanggil setiap versi baru mulai dipakai
+        self._factories = factories
+        self._on_swap = on_swap
+        self._models: Dict[str, object] = {}
+        self._state: Dict[str, Dict] = {
+            name: {'status': 'pending', 'version': 0, 'loaded_at': None, 'error': None}
+            for name in factories
+        }
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_poll: Optional[float] = None
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._factories)
+
+    def get(self, name: str) -> Optional[object]:
+        # None kalau model belum pernah siap
+        return self._models.get(name)
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        names = [name] if name is not None else self.names
+        return all(n in self._models for n in names)
+
+    def is_building(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: dict(state) for name, state in self._state.items()}
+
+    def _build(self, name: str, rebuild: bool):
+        with self._lock:
+            self._state[name]['status'] = 'building' if name not in self._models else 'reloading'
+            self._state[name]['error'] = None
+        try:
+            pipeline = self._factories[name]()
+            pipeline.initialize(rebuild=rebuild)
+        except Exception as e:
+            traceback.print_exc()
+            with self._lock:
+                state = self._state[name]
+                # versi lama (kalau ada) tetap dipakai
+                state['status'] = 'ready' if name in self._models else 'failed'
+                state['error'] = f"{type(e).__name__}: {e}"
+            return
+
+        with self._lock:
+            self._models[name] = pipeline
+            state = self._state[name]
+            state['status'] = 'ready'
+            state['version'] += 1
+            state['loaded_at'] = time.time()
+        if self._on_swap is not None:
+            self._on_swap(name, pipeline)
+
+    def _run(self, names: List[str], rebuild: bool):
+        for name in names:
+            self._build(name, rebuild)
+
+    def load(self, names: Optional[List[str]] = None, rebuild: bool = False, background: bool = True) -> bool:
+        # False kalau build lain masih berjalan
+        names = self.names if names is None else names
+        unknown = [name for name in names if name not in self._factories]
+        if unknown:
+            raise ValueError(f"Unknown model: {', '.join(unknown)} (pilih dari {self.names})")
+
+        with self._lock:
+            if self.is_building():
+                return False
+            if not background:
+                self._thread = None
+            else:
+                self._thread = threading.Thread(target=self._run, args=(names, rebuild),
+                                                name='model-manager', daemon=True)
+                self._thread.start()
+                return True
+
+        self._run(names, rebuild)
+        return True
+
+    def stale_models(self) -> List[str]:
+        # model yang cache di disk-nya sudah ditulis ulang (reload / rebuild di worker / process lain)
+        stale = []
+        for name, pipeline in list(self._models.items()):
+            cached_version = pipeline.cached_version()
+            if cached_version is not None and cached_version != pipeline.model_version:
+                stale.append(name)
+        return stale
+
+    def poll_updates(self, interval: float) -> bool:
+        # dipanggil di tiap request (murah: paling sering sekali per interval detik)
+        # supaya semua worker ikut pindah ke versi cache terbaru; True kalau load dimulai
+        now = time.monotonic()
+        with self._lock:
+            if self._last_poll is not None and now - self._last_poll < interval:
+                return False
+            self._last_poll = now
+        if self.is_building():
+            return False
+        stale = self.stale_models()
+        return bool(stale) and self.load(stale, background=True)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return not self.is_building()
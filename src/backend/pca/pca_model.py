@@ -1,111 +1,254 @@
 from PIL import Image
 import numpy as np
-import json
 import os
-from typing import Tuple
-from ..algorithms.eigenvalue import vector_length
+from typing import Tuple, Optional, List
 from ..algorithms.svd import truncated_svd
+from ..algorithms.ann import IVFIndex
+from ..algorithms.quantization import QuantizedIndex
+from ..algorithms.topk import top_k, batch_top_k
+from .pixel_store import PixelStore, image_to_gray_vector, decode_query_image, MAX_IMAGE_PIXELS
+from ..catalog import get_catalog
+from ..cache_manifest import save_array, load_array
+
+# float32 / float64: dtype uMatrix & coeffMatrix, int8: coeff float32 + kode int8 untuk scoring
+PRECISIONS = ("float32", "float64", "int8")
 
 class PCA:
-	def __init__(self, k):
-		self.N_ENTRIES = 523
-		self.IMG_WIDTH = 200
-		self.IMG_HEIGHT = 300
+	IMG_WIDTH = 200
+	IMG_HEIGHT = 300
+
+	def __init__(self, k, svd_method: str = "randomized", ann_threshold: int = 10000, ann_n_probe: int = 8,
+			batch_size: Optional[int] = None, max_image_pixels: Optional[int] = MAX_IMAGE_PIXELS,
+			precision: str = "float32", rerank_factor: int = 4):
+		if precision not in PRECISIONS:
+			raise ValueError(f"Unknown precision: {precision} (pilih salah satu dari {PRECISIONS})")
 		self.k = k
+		self.precision = precision
+		# mean & singular value tetap float64 (dipakai PCA inkremental), basis & coeff pakai dtype ini
+		self.dtype = np.float64 if precision == "float64" else np.float32
+		self.rerank_factor = rerank_factor
+		# gambar upload lebih besar dari ini ditolak sebelum di-decode
+		self.max_image_pixels = max_image_pixels
+		self.svd_method = svd_method
+		# batch_size None: fit sekaligus, selain itu PCA inkremental per mini-batch cover
+		self.batch_size = batch_size
 		self.u = None
 		self.uMatrix = None
 		self.coeffMatrix = None
+		self.singular_values = None
+		self.n_samples_seen = 0
+		# index ANN (metric l2) untuk coeffMatrix, hanya kalau jumlah gambar >= ann_threshold
+		self.ann_threshold = ann_threshold
+		self.ann_n_probe = ann_n_probe
+		self.ann_index = None
+		self.quantized_index = None
+
+	def build_pixels(self, data_dir: str, books: Optional[List[dict]], pixel_store_dir: Optional[str],
+			workers: Optional[int]) -> np.ndarray:
+		if books is None:
+			books = [{'id': record.id, 'cover': record.cover} for record in get_catalog(data_dir).records()]
+		# decode cover paralel, pixel yang sudah pernah di-decode diambil dari store
+		store = PixelStore(pixel_store_dir, self.IMG_WIDTH, self.IMG_HEIGHT, workers=workers)
+		return store.build(books, data_dir)
+
+	def fit(self, data_dir: str = "data", pixel_store_dir: Optional[str] = None, workers: Optional[int] = None,
+			books: Optional[List[dict]] = None):
+		# books: list {'id', 'cover'} sesuai urutan baris model, default semua buku di catalog
+		pixels = self.build_pixels(data_dir, books, pixel_store_dir, workers)
 
-	def fit(self, data_dir: str = "data"):
-		mapper_path = os.path.join(data_dir, "mapper.json")
-		with open(mapper_path, 'r', encoding='utf-8') as f:
-			mapper = json.load(f)
-		cover_paths = [entry["cover"] for entry in mapper.values()]
-	
-		datasetMatrix = np.zeros((self.IMG_WIDTH * self.IMG_HEIGHT, self.N_ENTRIES))
-		for x in range(min(self.N_ENTRIES, len(cover_paths))):
-			img_path = os.path.join(data_dir, cover_paths[x])
-			img = Image.open(img_path).convert('RGB').resize((self.IMG_WIDTH, self.IMG_HEIGHT))
-			imageMatrix = np.array(img)
-			iter = 0
-			for y in imageMatrix:
-				for z in y:
-					datasetMatrix[iter, x] = 0.2126 * z[0] + 0.7152 * z[1] + 0.0722 * z[2]
-					iter += 1
-
-		self.u = np.zeros(self.IMG_WIDTH * self.IMG_HEIGHT)
-		for x in range(self.N_ENTRIES):
-			for y in range(self.IMG_WIDTH * self.IMG_HEIGHT):
-				self.u[y] += datasetMatrix[y, x]
-		self.u /= self.N_ENTRIES
-  
-		datasetMatrix = datasetMatrix.T
-		for x in range(datasetMatrix.shape[0]):
-			datasetMatrix[x] -= self.u
-		datasetMatrix = datasetMatrix.T
-		self.uMatrix = truncated_svd(datasetMatrix, self.k)[0]
-		self.coeffMatrix = np.zeros((self.N_ENTRIES, self.k))
-		for x in range(self.N_ENTRIES):
-			self.coeffMatrix[x] = np.matmul(self.uMatrix.T, datasetMatrix.T[x])
+		if self.batch_size is not None:
+			self.u = None
+			self.uMatrix = None
+			self.singular_values = None
+			self.n_samples_seen = 0
+			self.partial_fit_rows(pixels)
+			self.uMatrix = self.uMatrix.astype(self.dtype)
+			self.coeffMatrix = self.project_rows(pixels)
+		else:
+			datasetMatrix = np.array(pixels.T, dtype=self.dtype)
+
+			# mean tiap pixel (akumulasi float64), lalu centering semua kolom sekaligus
+			self.u = datasetMatrix.mean(axis=1, dtype=np.float64)
+			datasetMatrix -= self.u[:, None].astype(self.dtype)
+
+			uMatrix, sigma, _ = truncated_svd(datasetMatrix, self.k, method=self.svd_method)
+			self.uMatrix = uMatrix.astype(self.dtype)
+			self.singular_values = np.diag(sigma)
+			self.n_samples_seen = datasetMatrix.shape[1]
+			# coeff semua gambar dalam satu matmul: (N x pixel) @ (pixel x k)
+			self.coeffMatrix = datasetMatrix.T @ self.uMatrix
+
+		self.refresh_index()
+		return self
 
+	def update(self, data_dir: str, books: List[dict], pixel_store_dir: Optional[str] = None,
+			workers: Optional[int] = None):
+		# books: buku lama (urutan sama dengan coeffMatrix) lalu buku baru di belakang
+		# basis di-update dari cover baru saja, coeff semua gambar dihitung ulang dari pixel store
+		pixels = self.build_pixels(data_dir, books, pixel_store_dir, workers)
+		self.partial_fit_rows(pixels, start=self.n_samples_seen)
+		self.uMatrix = self.uMatrix.astype(self.dtype)
+		self.coeffMatrix = self.project_rows(pixels)
+		self.refresh_index()
 		return self
 
-	def process_uploaded_image(self, image_path):
-		img = Image.open(image_path).convert('RGB').resize((self.IMG_WIDTH, self.IMG_HEIGHT))
-		imageMatrix = np.array(img)
-		img_vector = np.zeros(self.IMG_WIDTH * self.IMG_HEIGHT)
-		iter = 0
-		for y in imageMatrix:
-			for z in y:
-				img_vector[iter] = 0.2126 * z[0] + 0.7152 * z[1] + 0.0722 * z[2]
-				iter += 1
-
-		img_vector = img_vector - self.u
-		img_coeffs = np.matmul(self.uMatrix.T, img_vector)
-		return img_coeffs
-
-	def find_similar_to_uploaded(self, image_path, n=5) -> Tuple[np.ndarray, np.ndarray]:
-		img_coeffs = self.process_uploaded_image(image_path)
-		dArray = np.zeros((self.N_ENTRIES, 2))
-		for x in range(self.N_ENTRIES):
-			dArray[x, 0] = vector_length(img_coeffs - self.coeffMatrix[x])
-			dArray[x, 1] = x
-		indices = dArray[:, 0].argsort()
-		sorted_dArray = dArray[indices]
-		out_indices = np.zeros(n)
-		out_distances = np.zeros(n)
-		for i in range(n):
-			out_indices[i] = sorted_dArray[i, 1]
-			out_distances[i] = sorted_dArray[i, 0]
-		return out_indices, out_distances
+	def partial_fit(self, batch: np.ndarray):
+		# PCA inkremental (Ross dkk.): basis lama diwakili sigma * U^T, digabung dengan batch yang
+		# di-center ke mean batch dan satu baris koreksi pergeseran mean, lalu SVD matriks kecil itu
+		batch = np.asarray(batch, dtype=np.float64)
+		b = batch.shape[0]
+		if b == 0:
+			return self
+
+		batch_mean = batch.mean(axis=0)
+		centered = batch - batch_mean
+		if self.n_samples_seen == 0:
+			stacked = centered
+			new_mean = batch_mean
+		else:
+			n = self.n_samples_seen
+			new_mean = (n * np.asarray(self.u) + b * batch_mean) / (n + b)
+			correction = np.sqrt(n * b / (n + b)) * (np.asarray(self.u) - batch_mean)
+			stacked = np.vstack([self.singular_values[:, None] * np.asarray(self.uMatrix).T, centered, correction])
+
+		# (k + b + 1) x pixel: SVD lewat transpose supaya matriks gram berukuran (k + b + 1)^2
+		self.uMatrix, sigma, _ = truncated_svd(stacked.T, self.k, method="full")
+		self.singular_values = np.diag(sigma)
+		self.u = new_mean
+		self.n_samples_seen += b
+		return self
+
+	def partial_fit_rows(self, pixels: np.ndarray, start: int = 0):
+		batch_size = self.batch_size or self.k
+		for begin in range(start, pixels.shape[0], batch_size):
+			self.partial_fit(pixels[begin:begin + batch_size])
+		return self
+
+	def project_rows(self, pixels: np.ndarray) -> np.ndarray:
+		# coeff per mini-batch, pixel store (memmap) tidak perlu dimuat penuh
+		batch_size = self.batch_size or 256
+		coeffs = np.zeros((pixels.shape[0], self.uMatrix.shape[1]), dtype=self.dtype)
+		mean = np.asarray(self.u, dtype=self.dtype)
+		for begin in range(0, pixels.shape[0], batch_size):
+			batch = np.asarray(pixels[begin:begin + batch_size], dtype=self.dtype)
+			coeffs[begin:begin + batch_size] = (batch - mean) @ self.uMatrix
+		return coeffs
+
+	def refresh_index(self):
+		self.ann_index = None
+		if self.coeffMatrix.shape[0] >= self.ann_threshold:
+			self.build_ann_index()
+		self.build_quantized_index()
+
+	def build_quantized_index(self):
+		self.quantized_index = None
+		if self.precision == "int8":
+			self.quantized_index = QuantizedIndex(metric="l2", rerank_factor=self.rerank_factor)
+			self.quantized_index.build(self.coeffMatrix)
+		return self.quantized_index
+
+	def build_ann_index(self):
+		self.ann_index = IVFIndex(metric="l2", n_probe=self.ann_n_probe)
+		self.ann_index.build(self.coeffMatrix)
+		return self.ann_index
+
+	def image_to_vector(self, img: Image.Image) -> np.ndarray:
+		return image_to_gray_vector(img, self.IMG_WIDTH, self.IMG_HEIGHT)
+
+	def query_vector(self, image) -> np.ndarray:
+		# image: path, bytes atau file-like
+		return decode_query_image(image, self.IMG_WIDTH, self.IMG_HEIGHT, self.max_image_pixels)
+
+	def process_uploaded_image(self, image):
+		return self.process_uploaded_images([image])[0]
+
+	def coefficient_distances(self, coeffs: np.ndarray) -> np.ndarray:
+		# jarak euclidean ke semua gambar sekaligus, dari selisih langsung
+		# (bukan ||q||^2 + ||c||^2 - 2 q.c yang kehilangan presisi di float32)
+		diff = self.coeffMatrix - coeffs.astype(self.coeffMatrix.dtype)
+		return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+	def find_similar_to_uploaded(self, image, n=5) -> Tuple[np.ndarray, np.ndarray]:
+		# satu jalur dengan batch: skor yang masuk query cache 'image' sama dari endpoint mana pun
+		return self.find_similar_to_uploaded_batch([image], n)[0]
+
+	def process_uploaded_images(self, images) -> np.ndarray:
+		# (Q x pixel) - u lalu diproyeksikan ke ruang eigen -> (Q x k)
+		# query di-cast ke dtype basis, uMatrix (pixel x k) tidak di-upcast
+		# proyeksi per gambar: hasil float32 satu matmul Q x pixel ikut bergantung pada Q, padahal
+		# gambar yang sama harus dapat koefisien yang sama dari endpoint satu gambar maupun batch
+		img_vectors = (np.stack([self.query_vector(image) for image in images]) - self.u).astype(self.uMatrix.dtype)
+		return np.stack([self.uMatrix.T @ img_vector for img_vector in img_vectors])
+
+	def find_similar_to_uploaded_batch(self, images, n=5) -> List[Tuple[np.ndarray, np.ndarray]]:
+		img_coeffs = self.process_uploaded_images(images)
+		if self.ann_index is not None:
+			results = [self.ann_index.search(coeffs, n) for coeffs in img_coeffs]
+			return [(np.array([r[0] for r in res]), np.array([r[1] for r in res])) for res in results]
+		if self.quantized_index is not None:
+			results = self.quantized_index.search_batch(img_coeffs, n)
+			return [(np.array([r[0] for r in res]), np.array([r[1] for r in res])) for res in results]
+
+		distances = np.stack([self.coefficient_distances(coeffs) for coeffs in img_coeffs])
+		out_indices, out_distances = batch_top_k(distances, n, largest=False)
+		return list(zip(out_indices, out_distances))
 
 	def calculate_pca(self, idx, n) -> np.ndarray:
-		dArray = np.zeros((self.N_ENTRIES, 2))
-		xArray = self.coeffMatrix[idx]
-		for x in range(self.N_ENTRIES):
-			dArray[x, 0] = vector_length(xArray - self.coeffMatrix[x])
-			dArray[x, 1] = x
-		indices = dArray[:, 0].argsort()
-		sorted_dArray = dArray[indices]
-		out = np.zeros(n)
-		i = 0
-		iter = 0
-		while i < n:
-			if sorted_dArray[iter, 1] != idx:
-				out[i] = sorted_dArray[iter, 1]
-				i += 1
-			iter += 1
+		if self.ann_index is not None:
+			results = self.ann_index.search(self.coeffMatrix[idx], n, exclude=idx)
+			return np.array([r[0] for r in results])
+		if self.quantized_index is not None:
+			results = self.quantized_index.search(self.coeffMatrix[idx], n, exclude=idx)
+			return np.array([r[0] for r in results])
+
+		distances = self.coefficient_distances(self.coeffMatrix[idx])
+		out, _ = top_k(distances, n, largest=False, exclude=idx)
 		return out
 
-	def save(self, output_dir: str):
+	def save(self, output_dir: str) -> List[str]:
+		# return nama file yang ditulis, dicatat di manifest cache
 		os.makedirs(output_dir, exist_ok=True)
-		np.save(os.path.join(output_dir, 'u.npy'), self.u)
-		np.save(os.path.join(output_dir, 'uMatrix.npy'), self.uMatrix)
-		np.save(os.path.join(output_dir, 'coeffMatrix.npy'), self.coeffMatrix)
-
-	def load(self, input_dir: str):
-		self.u = np.load(os.path.join(input_dir, 'u.npy'))
-		self.uMatrix = np.load(os.path.join(input_dir, 'uMatrix.npy'))
-		self.coeffMatrix = np.load(os.path.join(input_dir, 'coeffMatrix.npy'))
+		save_array(os.path.join(output_dir, 'u.npy'), self.u)
+		save_array(os.path.join(output_dir, 'uMatrix.npy'), self.uMatrix)
+		save_array(os.path.join(output_dir, 'coeffMatrix.npy'), self.coeffMatrix)
+		files = ['u.npy', 'uMatrix.npy', 'coeffMatrix.npy']
+		if self.singular_values is not None:
+			save_array(os.path.join(output_dir, 'singular_values.npy'), self.singular_values)
+			files.append('singular_values.npy')
+		if self.ann_index is not None:
+			self.ann_index.save(output_dir)
+			files.extend(IVFIndex.FILES)
+		else:
+			IVFIndex.remove(output_dir)
+		if self.quantized_index is not None:
+			self.quantized_index.save(output_dir)
+			files.extend(QuantizedIndex.FILES)
+		else:
+			QuantizedIndex.remove(output_dir)
+		return files
+
+	def load(self, input_dir: str, mmap_mode: Optional[str] = 'r'):
+		# default mmap read-only, uMatrix (pixel x k) tidak disalin per worker
+		self.u = load_array(os.path.join(input_dir, 'u.npy'), mmap_mode)
+		self.uMatrix = load_array(os.path.join(input_dir, 'uMatrix.npy'), mmap_mode)
+		self.coeffMatrix = load_array(os.path.join(input_dir, 'coeffMatrix.npy'), mmap_mode)
+		self.n_samples_seen = self.coeffMatrix.shape[0]
+		self.singular_values = None
+		singular_values_path = os.path.join(input_dir, 'singular_values.npy')
+		if os.path.exists(singular_values_path):
+			self.singular_values = np.load(singular_values_path)
+
+		self.ann_index = None
+		if IVFIndex.exists(input_dir):
+			self.ann_index = IVFIndex(metric="l2", n_probe=self.ann_n_probe).load(input_dir, mmap_mode)
+			self.ann_index.attach(self.coeffMatrix)
+		elif self.coeffMatrix.shape[0] >= self.ann_threshold:
+			self.build_ann_index()
+
+		if self.precision == "int8" and QuantizedIndex.exists(input_dir):
+			self.quantized_index = QuantizedIndex(metric="l2", rerank_factor=self.rerank_factor)
+			self.quantized_index.load(input_dir, mmap_mode).attach(self.coeffMatrix)
+		else:
+			self.build_quantized_index()
 		return self
 
@@ -0,0 +1,165 @@
+import io
+import json
+import os
+import tempfile
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..cache_manifest import atomic_path
+from ..worker_pool import resolve_workers, worker_pool
+
+
+LUMINANCE_WEIGHTS = np.array([0.2126, 0.7152, 0.0722])
+
+# batas ukuran gambar upload (jumlah pixel), dicek dari header sebelum decode
+MAX_IMAGE_PIXELS = 40_000_000
+
+# naikkan kalau cara decode berubah: pixel store dan cache PCA lama otomatis dibangun ulang
+DECODER_VERSION = 2
+
+
+def image_to_gray_vector(img: Image.Image, width: int, height: int) -> np.ndarray:
+    # grayscale (luminance) lalu flatten baris per baris
+    img = img.convert('RGB').resize((width, height))
+    imageMatrix = np.asarray(img, dtype=np.float64)
+    return (imageMatrix @ LUMINANCE_WEIGHTS).ravel()
+
+
+def open_image(source, max_pixels: Optional[int] = MAX_IMAGE_PIXELS) -> Image.Image:
+    # source: path, bytes atau file-like (mis. stream upload), Image.open hanya membaca header
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    img = Image.open(source)
+    width, height = img.size
+    if max_pixels is not None and width * height > max_pixels:
+        img.close()
+        raise ValueError(f"Gambar terlalu besar: {width}x{height} pixel (maks {max_pixels})")
+    return img
+
+
+def decode_gray_vector(img: Image.Image, width: int, height: int) -> np.ndarray:
+    # JPEG di-decode langsung di skala 1/2..1/8 yang masih >= ukuran target (draft mode),
+    # jadi pixel penuh tidak pernah di-decode. Cover dan query wajib lewat sini dua-duanya:
+    # hasil draft berbeda dari decode penuh, upload cover yang sama harus jatuh di titik yang sama
+    img.draft('RGB', (width, height))
+    return image_to_gray_vector(img, width, height)
+
+
+def decode_query_image(source, width: int, height: int, max_pixels: Optional[int] = MAX_IMAGE_PIXELS) -> np.ndarray:
+    # gambar query tanpa file sementara
+    with open_image(source, max_pixels) as img:
+        return decode_gray_vector(img, width, height)
+
+
+def _decode_cover(args: Tuple[str, int, int]) -> np.ndarray:
+    # dijalankan di worker process
+    img_path, width, height = args
+    with Image.open(img_path) as img:
+        return decode_gray_vector(img, width, height).astype(np.float32)
+
+
+class PixelStore:
+    # Cache pixel grayscale hasil decode cover: satu .npy (N x pixel) + index json
+    # baris dipakai ulang kalau book id, path cover dan mtime sama
+    # store_dir None = decode di memory saja tanpa disimpan
+    PIXELS_FILE = 'pixels.npy'
+    INDEX_FILE = 'pixels_index.json'
+
+    def __init__(self, store_dir: Optional[str], img_width: int = 200, img_height: int = 300,
+                 workers: Optional[int] = None, chunk_size: int = 8):
+        self.store_dir = store_dir
+        self.img_width = img_width
+        self.img_height = img_height
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.entries = []
+        self.pixels = None
+
+    @property
+    def pixels_path(self) -> str:
+        return os.path.join(self.store_dir, self.PIXELS_FILE)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.store_dir, self.INDEX_FILE)
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if self.store_dir is None:
+            return {}
+        if not (os.path.exists(self.index_path) and os.path.exists(self.pixels_path)):
+            return {}
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('width') != self.img_width or index.get('height') != self.img_height:
+            return {}
+        if index.get('decoder_version') != DECODER_VERSION:
+            return {}
+        return {entry['id']: entry for entry in index['entries']}
+
+    def _decode_all(self, img_paths: List[str]):
+        jobs = [(path, self.img_width, self.img_height) for path in img_paths]
+        workers = resolve_workers(self.workers)
+        if workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                yield _decode_cover(job)
+            return
+
+        with worker_pool(workers) as pool:
+            for vector in pool.imap(_decode_cover, jobs, chunksize=self.chunk_size):
+                yield vector
+
+    def build(self, books: List[Dict[str, str]], data_dir: str) -> np.ndarray:
+        # books: list {'id', 'cover'}, urutan baris pixels mengikuti urutan books
+        old_entries = self._load_index()
+        old_pixels = np.load(self.pixels_path, mmap_mode='r') if old_entries else None
+
+        num_pixels = self.img_width * self.img_height
+        if self.store_dir is None:
+            pixels = np.zeros((len(books), num_pixels), dtype=np.float32)
+        else:
+            os.makedirs(self.store_dir, exist_ok=True)
+            # nama unik per process (lihat atomic_path), build paralel tidak berbagi file sementara
+            fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, prefix='pixels.npy.', suffix='.tmp.npy')
+            os.close(fd)
+            pixels = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                               shape=(len(books), num_pixels))
+
+        entries = []
+        to_decode = []
+        for row, book in enumerate(books):
+            img_path = os.path.join(data_dir, book['cover'])
+            mtime = os.path.getmtime(img_path)
+            entry = {'id': book['id'], 'cover': book['cover'], 'mtime': mtime, 'row': row}
+            entries.append(entry)
+
+            old = old_entries.get(book['id'])
+            if old is not None and old['cover'] == book['cover'] and old['mtime'] == mtime:
+                pixels[row] = old_pixels[old['row']]
+            else:
+                to_decode.append((row, img_path))
+
+        if to_decode:
+            print(f"Decoding {len(to_decode)} covers...")
+        for (row, _), vector in zip(to_decode, self._decode_all([path for _, path in to_decode])):
+            pixels[row] = vector
+
+        self.entries = entries
+        if self.store_dir is None:
+            self.pixels = pixels
+            return self.pixels
+
+        pixels.flush()
+        del pixels
+        del old_pixels
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.pixels_path)
+
+        with atomic_path(self.index_path) as index_tmp_path:
+            with open(index_tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'width': self.img_width, 'height': self.img_height,
+                           'decoder_version': DECODER_VERSION, 'entries': entries}, f)
+
+        self.pixels = np.load(self.pixels_path, mmap_mode='r')
+        return self.pixels
@@ -1,82 +1,151 @@
 import os
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from .pca_model import PCA
+from .pixel_store import DECODER_VERSION
+from ..catalog import get_catalog
+from ..cache_manifest import CacheManifest, atomic_path, cache_lock
 
 
 class PCAPreprocessing:
-    def __init__(self, data_dir: str = "../../../data/", cache_dir: str = "./cache_pca", k: int = 100):
+    def __init__(self, data_dir: str = "../../../data/", cache_dir: str = "./cache_pca", k: int = 100,
+                 workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 precision: str = "float32"):
         self.data_dir = data_dir
         self.cache_dir = cache_dir
         self.k = k
+        # jumlah process decode cover, None = default terbatas (lihat resolve_workers)
+        self.workers = workers
+        # None: fit PCA sekaligus, selain itu PCA inkremental per mini-batch
+        self.batch_size = batch_size
+        # float32 (default), float64, atau int8 (coeff terkuantisasi + rerank float32)
+        self.precision = precision
         self.books = []
         self.pca_model = None
+        # fingerprint manifest cache, dipakai sebagai kunci invalidasi cache hasil query
+        self.model_version = None
 
-    def cache_exists(self) -> bool:
-        required_files = [
-            'u.npy',
-            'uMatrix.npy',
-            'coeffMatrix.npy',
-            'books_metadata.json'
-        ]
-        return all(os.path.exists(os.path.join(self.cache_dir, f)) for f in required_files)
+    def cache_params(self) -> Dict:
+        return {'k': self.k, 'dtype': self.precision, 'img_width': PCA.IMG_WIDTH, 'img_height': PCA.IMG_HEIGHT,
+                'decoder_version': DECODER_VERSION}
 
-    def save_books_metadata(self):
-        mapper_path = os.path.join(self.data_dir, 'mapper.json')
-        with open(mapper_path, 'r', encoding='utf-8') as f:
-            mapper = json.load(f)
+    def corpus_hash(self) -> Optional[str]:
+        return get_catalog(self.data_dir).content_hash()
 
+    def cache_exists(self, verify_checksums: bool = False) -> bool:
+        manifest = CacheManifest(self.cache_dir, 'pca')
+        return manifest.is_valid(self.cache_params(), self.corpus_hash(), verify_checksums)
+
+    @property
+    def pixel_store_dir(self) -> str:
+        # pixel cover disimpan di cache_dir/pixels, refit (mis. ganti k) tidak decode ulang
+        return os.path.join(self.cache_dir, 'pixels')
+
+    def save_books_metadata(self, records=None):
+        # records: urutan baris model, default urutan catalog
+        if records is None:
+            records = get_catalog(self.data_dir).records()
         metadata = []
-        for idx, (book_id, book_data) in enumerate(mapper.items()):
+        for idx, record in enumerate(records):
             metadata.append({
                 'idx': idx,
-                'id': book_id,
-                'title': book_data['title'],
-                'cover': book_data['cover']
+                'id': record.id,
+                'title': record.title,
+                'cover': record.cover
             })
 
-        with open(os.path.join(self.cache_dir, 'books_metadata.json'), 'w', encoding='utf-8') as f:
-            json.dump(metadata, f)
+        with atomic_path(os.path.join(self.cache_dir, 'books_metadata.json')) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f)
+        self.books = metadata
+        self.register_books()
+
+    def register_books(self):
+        get_catalog(self.data_dir).register_model('pca', [book['id'] for book in self.books])
 
     def load_books_metadata(self):
         with open(os.path.join(self.cache_dir, 'books_metadata.json'), 'r', encoding='utf-8') as f:
             metadata = json.load(f)
         self.books = metadata
+        self.register_books()
         return metadata
 
     def run_full_preprocessing(self):
-        self.pca_model = PCA(k=self.k)
-        self.pca_model.fit(self.data_dir)
+        self.pca_model = PCA(k=self.k, batch_size=self.batch_size, precision=self.precision)
+        self.pca_model.fit(self.data_dir, pixel_store_dir=self.pixel_store_dir, workers=self.workers)
 
         os.makedirs(self.cache_dir, exist_ok=True)
-        self.pca_model.save(self.cache_dir)
-        self.save_books_metadata()
-
-    def load_from_cache(self):
-        self.pca_model = PCA(k=self.k)
-        self.pca_model.load(self.cache_dir)
-        self.load_books_metadata()
+        self.save_cache()
+
+    def save_cache(self, records=None):
+        files = self.pca_model.save(self.cache_dir)
+        self.save_books_metadata(records)
+        manifest = CacheManifest(self.cache_dir, 'pca')
+        manifest.write(files + ['books_metadata.json'], self.cache_params(), self.corpus_hash())
+        self.model_version = manifest.fingerprint()
+
+    def can_update_incrementally(self) -> bool:
+        # cache valid kecuali corpus, buku lama masih ada semua, dan singular value tersimpan
+        manifest = CacheManifest(self.cache_dir, 'pca')
+        if manifest.validation_error(self.cache_params()) is not None:
+            return False
+        if not os.path.exists(os.path.join(self.cache_dir, 'singular_values.npy')):
+            return False
+        catalog = get_catalog(self.data_dir)
+        if catalog.version is None:
+            return False
+        with open(os.path.join(self.cache_dir, 'books_metadata.json'), 'r', encoding='utf-8') as f:
+            return all(catalog.get(book['id']) is not None for book in json.load(f))
 
-    def initialize(self):
-        if self.cache_exists():
-            self.load_from_cache()
-        else:
-            self.run_full_preprocessing()
+    def update_incremental(self) -> int:
+        # cover buku baru di-partial_fit ke basis yang ada, lalu coeff dihitung ulang dari pixel store
+        catalog = get_catalog(self.data_dir)
+        records = [catalog.get(book['id']) for book in self.books]
+        known = {book['id'] for book in self.books}
+        new_records = [record for record in catalog.records() if record.id not in known]
+        records.extend(new_records)
 
-    def get_similar_books_by_uploaded_image(self, image_path: str, top_k: int = 5) -> List[Dict]:
-        if not self.pca_model:
-            return []
+        if new_records:
+            print(f"Adding {len(new_records)} covers...")
+            self.pca_model.update(self.data_dir, [{'id': record.id, 'cover': record.cover} for record in records],
+                                  pixel_store_dir=self.pixel_store_dir, workers=self.workers)
 
-        indices, distances = self.pca_model.find_similar_to_uploaded(image_path, top_k)
+        self.save_cache(records)
+        return len(new_records)
 
+    def load_from_cache(self):
+        self.pca_model = PCA(k=self.k, batch_size=self.batch_size, precision=self.precision)
+        self.pca_model.load(self.cache_dir, mmap_mode='r')
+        self.load_books_metadata()
+        self.model_version = CacheManifest(self.cache_dir, 'pca').fingerprint()
+
+    def cached_version(self) -> Optional[str]:
+        # fingerprint manifest di disk saat ini, beda dengan model_version kalau cache ditulis ulang process lain
+        return CacheManifest(self.cache_dir, 'pca').fingerprint()
+
+    def initialize(self, rebuild: bool = False):
+        # dengan lock: kalau beberapa worker start bersamaan dengan cache tidak valid, hanya yang pertama
+        # membangun ulang, sisanya menunggu lalu load cache yang sudah jadi
+        with cache_lock(self.cache_dir):
+            if rebuild:
+                self.run_full_preprocessing()
+            elif self.cache_exists():
+                self.load_from_cache()
+            elif self.can_update_incrementally():
+                self.load_from_cache()
+                self.update_incremental()
+            else:
+                self.run_full_preprocessing()
+
+    def to_recommendations(self, indices, distances) -> List[Dict]:
         recommendations = []
         for i, idx in enumerate(indices):
             book = self.books[int(idx)]
             # Normalisasi jarak ke skor kemiripan (0-1)
             # Pakai toleransi kecil krn 1-(distances[i]/100000) bisa tdk tepat 1.0
             if distances[i] < 1e-5: similarity = 1.0
-            else: similarity = max(0, 1-(distances[i]/100000))
+            else: similarity = max(0.0, 1 - float(distances[i]) / 100000)
             
             recommendations.append({
                 'id': book['id'],
@@ -86,3 +155,18 @@ class PCAPreprocessing:
             })
 
         return recommendations
+
+    def get_similar_books_by_uploaded_image(self, image, top_k: int = 5) -> List[Dict]:
+        # image: path, bytes atau file-like
+        if not self.pca_model:
+            return []
+
+        indices, distances = self.pca_model.find_similar_to_uploaded(image, top_k)
+        return self.to_recommendations(indices, distances)
+
+    def get_similar_books_by_uploaded_images(self, images: List, top_k: int = 5) -> List[List[Dict]]:
+        if not self.pca_model:
+            return [[] for _ in images]
+
+        results = self.pca_model.find_similar_to_uploaded_batch(images, top_k)
+        return [self.to_recommendations(indices, distances) for indices, distances in results]
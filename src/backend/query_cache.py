@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class QueryCache:
+    # Cache hasil pencarian, kunci = hash isi query (bytes dokumen / gambar) + parameter + versi model
+    # tier 1: LRU di memory (jumlah entry + TTL), tier 2 opsional: file json di disk_dir, dibagi antar worker
+    # versi model aktif per namespace di-set pemilik model (set_version saat swap) dan hanya maju:
+    # request yang masih memakai model lama dianggap miss dan tidak mengubah state cache
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600, disk_dir: Optional[str] = None,
+                 max_disk_entries: int = 10000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, namespace, value)
+        self._versions: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(namespace: str, version, content: bytes, **params) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps([namespace, version, sorted(params.items())], default=str).encode('utf-8'))
+        digest.update(content)
+        return f'{namespace}-{digest.hexdigest()}'
+
+    def _expires_at(self) -> Optional[float]:
+        return time.time() + self.ttl if self.ttl is not None else None
+
+    def set_version(self, namespace: str, version):
+        # dipanggil saat model baru di-swap, entry versi lama di memory dibuang
+        with self._lock:
+            if namespace in self._versions and self._versions[namespace] != version:
+                stale = [key for key, (_, ns, _) in self._entries.items() if ns == namespace]
+                for key in stale:
+                    del self._entries[key]
+                self.invalidations += len(stale)
+            self._versions[namespace] = version
+
+    def _is_current(self, namespace: str, version) -> bool:
+        # dipanggil dengan lock; namespace tanpa versi terdaftar menerima semua versi
+        # (versi tetap bagian dari key, jadi hasil versi lain tidak pernah tertukar)
+        return self._versions.get(namespace, version) == version
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f'{key}.json')
+
+    def _read_disk(self, key: str) -> Tuple[bool, Any]:
+        if self.disk_dir is None:
+            return False, None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False, None
+        if entry['expires_at'] is not None and entry['expires_at'] < time.time():
+            return False, None
+        return True, entry['value']
+
+    def _write_disk(self, key: str, value):
+        if self.disk_dir is None:
+            return
+        tmp_path = f'{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'expires_at': self._expires_at(), 'value': value}, f)
+        os.replace(tmp_path, self._disk_path(key))
+
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        # buang file tertua kalau jumlahnya melebihi batas
+        try:
+            names = [name for name in os.listdir(self.disk_dir) if name.endswith('.json')]
+        except FileNotFoundError:
+            return
+        if len(names) <= self.max_disk_entries:
+            return
+        paths = [os.path.join(self.disk_dir, name) for name in names]
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except FileNotFoundError:
+                pass
+        for path in sorted(mtimes, key=mtimes.get)[:len(mtimes) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, namespace: str, version, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if not self._is_current(namespace, version):
+                self.misses += 1
+                return False, None
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, _, value = entry
+                if expires_at is None or expires_at >= time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+
+        found, value = self._read_disk(key)
+        with self._lock:
+            if found:
+                self.disk_hits += 1
+                if self._is_current(namespace, version):
+                    self._store(namespace, key, value)
+            else:
+                self.misses += 1
+        return found, value
+
+    def _store(self, namespace: str, key: str, value):
+        # dipanggil dengan lock
+        self._entries[key] = (self._expires_at(), namespace, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, namespace: str, version, key: str, value):
+        with self._lock:
+            # hasil dari model lama (request yang selesai setelah swap) tidak disimpan
+            if not self._is_current(namespace, version):
+                return
+            self._store(namespace, key, value)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, namespace: str, version, content: bytes, compute: Callable[[], Any], **params):
+        key = self.make_key(namespace, version, content, **params)
+        found, value = self.get(namespace, version, key)
+        if found:
+            return value
+        value = compute()
+        self.set(namespace, version, key, value)
+        return value
+
+    def get_or_compute_batch(self, namespace: str, version, contents: List[bytes],
+                             compute_batch: Callable[[List[int]], List[Any]], **params) -> List[Any]:
+        # hanya item yang miss yang dihitung, sekaligus dalam satu batch
+        # compute_batch menerima index item yang miss dan mengembalikan hasil dengan urutan sama
+        keys = [self.make_key(namespace, version, content, **params) for content in contents]
+        results = [None] * len(contents)
+        missing = []
+        for i, key in enumerate(keys):
+            found, value = self.get(namespace, version, key)
+            if found:
+                results[i] = value
+            else:
+                missing.append(i)
+
+        if missing:
+            for i, value in zip(missing, compute_batch(missing)):
+                results[i] = value
+                self.set(namespace, version, keys[i], value)
+        return results
+
+    def clear(self):
+        with self._lock:
+            # versi aktif tetap, hanya entry yang dibuang
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'disk_dir': self.disk_dir,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
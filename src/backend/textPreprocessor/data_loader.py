@@ -1,21 +1,21 @@
-import json
 import os
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
+from ..catalog import get_catalog
 
-def load_dataset(data_dir: str = "../../../data/") -> List[Dict[str, str]]:
+
+def resolve_data_path(data_dir: str) -> str:
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(current_dir, data_dir)
-    mapper_path = os.path.join(data_path, "mapper.json")
+    return os.path.join(current_dir, data_dir)
 
-    with open(mapper_path, 'r', encoding='utf-8') as f:
-        mapper = json.load(f)
 
+def load_dataset(data_dir: str = "../../../data/") -> List[Dict[str, str]]:
+    data_path = resolve_data_path(data_dir)
 
     books = []
 
-    for book_id, book_info in mapper.items():
-        txt_path = os.path.join(data_path, book_info["txt"])
+    for record in get_catalog(data_path).records():
+        txt_path = os.path.join(data_path, record.txt)
 
         if not os.path.exists(txt_path):
             print(f"File not found: {txt_path}")
@@ -26,16 +26,34 @@ def load_dataset(data_dir: str = "../../../data/") -> List[Dict[str, str]]:
                 content = f.read()
 
             books.append({
-                "id": book_id,
-                "title": book_info["title"],
+                "id": record.id,
+                "title": record.title,
                 "content": content,
-                "cover": book_info["cover"]
+                "cover": record.cover
             })
 
 
         except Exception as e:
-            print(f"Error loading book {book_id}: {e}")
+            print(f"Error loading book {record.id}: {e}")
             continue
 
     return books
 
+
+def iter_book_entries(data_dir: str = "../../../data/") -> Iterator[Dict[str, str]]:
+    # metadata + path txt saja, isi buku dibaca belakangan oleh worker
+    data_path = resolve_data_path(data_dir)
+
+    for record in get_catalog(data_path).records():
+        txt_path = os.path.join(data_path, record.txt)
+
+        if not os.path.exists(txt_path):
+            print(f"File not found: {txt_path}")
+            continue
+
+        yield {
+            "id": record.id,
+            "title": record.title,
+            "cover": record.cover,
+            "txt_path": txt_path
+        }
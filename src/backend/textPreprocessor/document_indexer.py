@@ -1,73 +1,139 @@
 import numpy as np
-from scipy.sparse import csr_matrix
-from typing import List, Dict, Tuple
+from array import array
+from scipy.sparse import csc_matrix, csr_matrix
+from typing import Iterable, List, Optional, Tuple, Union
 from collections import Counter
+from .vocabulary import Vocabulary, HashingVocabulary, hash_terms
 
 
-class DocumentIndexer:
-    def __init__(self):
-        self.vocabulary = {}  # term -> index mapping
-        self.term_list = []   # index -> term mapping
-        self.term_doc_matrix = None
-        self.num_documents = 0
-        self.num_terms = 0
-
-    def build_vocabulary(self, preprocessed_documents: List[List[str]]) -> Dict[str, int]:
-        min_df = 2
-
-        term_doc_count = {}
-        for doc_tokens in preprocessed_documents:
-            unique_terms = set(doc_tokens)
-            for term in unique_terms:
-                term_doc_count[term] = term_doc_count.get(term, 0) + 1
-
-        filtered_terms = [term for term, count in term_doc_count.items() if count >= min_df]
-        sorted_terms = sorted(filtered_terms)
-
-        self.vocabulary = {term: idx for idx, term in enumerate(sorted_terms)}
-        self.term_list = sorted_terms
-        self.num_terms = len(self.vocabulary)
-
-        return self.vocabulary
-
-    def build_term_document_matrix(self, preprocessed_documents: List[List[str]]) -> csr_matrix:
-        self.num_documents = len(preprocessed_documents)
+MAX_FEATURES_BY = ("df", "tfidf")
 
-        if not self.vocabulary:
-            self.build_vocabulary(preprocessed_documents)
 
+def filter_term_lengths(term_freq: Counter, min_term_length: int = 1,
+                        max_term_length: Optional[int] = None) -> Counter:
+    # dipakai saat indexing dan saat query supaya term yang dibuang tidak masuk lewat bucket hash
+    if min_term_length <= 1 and max_term_length is None:
+        return term_freq
+    return Counter({
+        term: freq for term, freq in term_freq.items()
+        if len(term) >= min_term_length and (max_term_length is None or len(term) <= max_term_length)
+    })
 
-        rows = []  # term
-        cols = []  # doc
-        data = []  # freq
 
-        for doc_idx, doc_tokens in enumerate(preprocessed_documents):
-            term_freq = Counter(doc_tokens)
-
-            for term, freq in term_freq.items():
-                if term in self.vocabulary:
-                    term_idx = self.vocabulary[term]
-                    rows.append(term_idx)
-                    cols.append(doc_idx)
-                    data.append(freq)
-
-            
+class DocumentIndexer:
+    # Satu pass: tiap dokumen (Counter) langsung ditambahkan ke buffer bertipe, tidak ada list token
+    # yang ditahan. Kolom dokumen disimpan sebagai indptr (CSC), jadi per entry cukup index term + freq.
+    # min_df / max_df / max_features diterapkan di akhir dengan memilih ulang baris matriks.
+    def __init__(self, min_df: int = 2, n_features: Optional[int] = None, max_df: Union[int, float, None] = None,
+                 max_features: Optional[int] = None, max_features_by: str = "df", min_term_length: int = 1,
+                 max_term_length: Optional[int] = None):
+        if max_features_by not in MAX_FEATURES_BY:
+            raise ValueError(f"Unknown max_features_by: {max_features_by} (pilih salah satu dari {MAX_FEATURES_BY})")
+        self.min_df = min_df
+        # int: jumlah dokumen, float: proporsi dokumen; term yang lebih sering dari ini dibuang
+        self.max_df = max_df
+        # batas ukuran vocabulary (baris U_k), term teratas menurut df atau total bobot tf-idf
+        self.max_features = max_features
+        self.max_features_by = max_features_by
+        self.min_term_length = min_term_length
+        self.max_term_length = max_term_length
+        # None: vocabulary dari term corpus, selain itu feature hashing dengan n_features bucket
+        self.n_features = n_features
+        self.vocabulary = None  # Vocabulary / HashingVocabulary, diisi build()
+        self.term_doc_matrix = None
+        self.num_documents = 0
+        self.num_terms = 0
 
-        self.term_doc_matrix = csr_matrix(
-            (data, (rows, cols)),
-            shape=(self.num_terms, self.num_documents),
-            dtype=np.float32
+        self._term_ids = {}          # term -> index sementara (urut kemunculan), tidak dipakai saat hashing
+        self._rows = array('i')      # index term per entry
+        self._freqs = array('i')     # frekuensi per entry
+        self._indptr = array('q', [0])
+
+    def add_document(self, doc_tokens: Union[List[str], Counter]):
+        # dokumen boleh berupa list token atau Counter dari preprocess_files
+        term_freq = doc_tokens if isinstance(doc_tokens, Counter) else Counter(doc_tokens)
+        term_freq = filter_term_lengths(term_freq, self.min_term_length, self.max_term_length)
+
+        if self.n_features is not None:
+            self._rows.frombytes(hash_terms(term_freq.keys(), self.n_features).astype(np.intc).tobytes())
+        else:
+            term_ids = self._term_ids
+            self._rows.extend(term_ids.setdefault(term, len(term_ids)) for term in term_freq)
+        self._freqs.extend(term_freq.values())
+        self._indptr.append(len(self._rows))
+        self.num_documents += 1
+
+    def build(self) -> csr_matrix:
+        n_rows = self.n_features if self.n_features is not None else len(self._term_ids)
+        matrix = csc_matrix(
+            (np.frombuffer(self._freqs, dtype=np.intc).astype(np.float32),
+             np.frombuffer(self._rows, dtype=np.intc),
+             np.frombuffer(self._indptr, dtype=np.int64)),
+            shape=(n_rows, self.num_documents)
         )
-
+        # term berbeda di bucket hash yang sama dijumlahkan
+        matrix.sum_duplicates()
+        matrix = matrix.tocsr()
+
+        self._rows = array('i')
+        self._freqs = array('i')
+        self._indptr = array('q', [0])
+
+        keep = self.select_rows(matrix)
+        if self.n_features is not None:
+            self.vocabulary = HashingVocabulary(self.n_features, keep.astype(np.int64))
+        else:
+            terms = list(self._term_ids)
+            self._term_ids = {}
+            # urutan baris mengikuti urutan alfabet term
+            keep = sorted(keep.tolist(), key=terms.__getitem__)
+            self.vocabulary = Vocabulary.from_terms([terms[idx] for idx in keep])
+
+        self.term_doc_matrix = matrix[keep]
+        self.num_terms = self.term_doc_matrix.shape[0]
 
         return self.term_doc_matrix
 
+    def max_document_frequency(self) -> int:
+        if self.max_df is None:
+            return self.num_documents
+        if isinstance(self.max_df, float):
+            return int(np.floor(self.max_df * self.num_documents))
+        return self.max_df
+
+    def select_rows(self, matrix: csr_matrix) -> np.ndarray:
+        # df dari indptr baris: buang term di luar [min_df, max_df], lalu ambil max_features teratas
+        df = np.diff(matrix.indptr)
+        keep = np.flatnonzero((df >= self.min_df) & (df <= self.max_document_frequency()))
+        if self.max_features is None or keep.size <= self.max_features:
+            return keep
+
+        if self.max_features_by == "df":
+            scores = df[keep]
+        else:
+            # total bobot tf-idf (tf = freq / panjang dokumen, idf = log10(n / (1 + df))) tiap term
+            candidates = matrix[keep]
+            doc_lengths = np.bincount(candidates.indices, weights=candidates.data, minlength=candidates.shape[1])
+            doc_lengths[doc_lengths == 0] = 1
+            term_ids = np.repeat(np.arange(keep.size), np.diff(candidates.indptr))
+            tf_mass = np.bincount(term_ids, weights=candidates.data / doc_lengths[candidates.indices],
+                                  minlength=keep.size)
+            scores = tf_mass * np.log10(self.num_documents / (1 + df[keep]))
+
+        # stabil: skor sama -> urutan baris awal
+        top = np.argsort(-scores, kind='stable')[:self.max_features]
+        return np.sort(keep[top])
+
+    def build_term_document_matrix(self, preprocessed_documents: Iterable[Union[List[str], Counter]]) -> csr_matrix:
+        for doc_tokens in preprocessed_documents:
+            self.add_document(doc_tokens)
+        return self.build()
 
 
-def build_matrix_from_documents(preprocessed_documents: List[List[str]]) -> Tuple[csr_matrix, Dict[str, int], List[str]]:
-    indexer = DocumentIndexer()
+def build_matrix_from_documents(preprocessed_documents: Iterable[Union[List[str], Counter]], min_df: int = 2,
+                                n_features: Optional[int] = None,
+                                **pruning) -> Tuple[csr_matrix, Union[Vocabulary, HashingVocabulary]]:
+    # pruning: max_df, max_features, max_features_by, min_term_length, max_term_length
+    indexer = DocumentIndexer(min_df=min_df, n_features=n_features, **pruning)
     matrix = indexer.build_term_document_matrix(preprocessed_documents)
-    return matrix, indexer.vocabulary, indexer.term_list
-
-
-
+    return matrix, indexer.vocabulary
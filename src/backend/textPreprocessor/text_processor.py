@@ -1,8 +1,11 @@
 import re
-from typing import List
+from collections import Counter
+from functools import lru_cache, partial
+from typing import List, Iterable, Iterator, Optional, Union
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.stem import PorterStemmer
+from ..worker_pool import resolve_workers, worker_pool
 
 # Download NLTK
 try:
@@ -34,20 +37,50 @@ STOPWORDS = {
 }
 
 
-class TextPreprocessor:
-    def __init__(self):
-        self.stemmer = PorterStemmer()
-        self.stop_words = STOPWORDS
+TOKENIZERS = ("nltk", "regex")
+STEM_CACHE_SIZE = 200000
+
+_NON_ALPHA = re.compile(r'[^a-z]')
+_REGEX_TOKEN = re.compile(r'[a-z]+')
+_stemmer = PorterStemmer()
 
-    def preprocess(self, text: str) -> List[str]:
-        tokens = word_tokenize(text)
 
-        tokens = [re.sub(r'[^a-z]', '', token.lower()) for token in tokens]
-        tokens = [t for t in tokens if t]  # non empty str
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem_token(token: str) -> Optional[str]:
+    # cache dipakai bersama semua dokumen dan query di process ini
+    # None kalau hasil stem termasuk stopword
+    stemmed = _stemmer.stem(token)
+    if stemmed in STOPWORDS:
+        return None
+    return stemmed
 
-        tokens = [self.stemmer.stem(token) for token in tokens]
 
-        tokens = [token for token in tokens if token not in self.stop_words]
+class TextPreprocessor:
+    def __init__(self, tokenizer: str = "nltk"):
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer: {tokenizer}")
+        self.tokenizer = tokenizer
+
+    def tokenize(self, text: str) -> List[str]:
+        if self.tokenizer == "regex":
+            # lebih ringan dari word_tokenize, cukup untuk indexing massal
+            # dipisah di setiap non huruf: "word--word" -> word, word (bukan "wordword")
+            return _REGEX_TOKEN.findall(text.lower())
+        return word_tokenize(text)
+
+    def preprocess(self, text: str) -> List[str]:
+        # satu pass: lower -> buang non huruf -> stem -> filter stopword
+        tokens = []
+        append = tokens.append
+        clean = _NON_ALPHA.sub
+
+        for token in self.tokenize(text):
+            token = clean('', token.lower())
+            if not token:
+                continue
+            stemmed = stem_token(token)
+            if stemmed is not None:
+                append(stemmed)
 
         return tokens
 
@@ -64,4 +97,38 @@ def preprocess_documents(documents: List[str]) -> List[List[str]]:
     return preprocessed
 
 
+_worker_preprocessors = {}
+
+
+def _preprocess_file(txt_path: str, as_counter: bool = True,
+                     tokenizer: str = "nltk") -> Optional[Union[List[str], Counter]]:
+    # dijalankan di worker process, satu TextPreprocessor per process
+    preprocessor = _worker_preprocessors.get(tokenizer)
+    if preprocessor is None:
+        preprocessor = TextPreprocessor(tokenizer=tokenizer)
+        _worker_preprocessors[tokenizer] = preprocessor
+
+    try:
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Error loading {txt_path}: {e}")
+        return None
+
+    tokens = preprocessor.preprocess(content)
+    return Counter(tokens) if as_counter else tokens
+
+
+def preprocess_files(txt_paths: Iterable[str], workers: Optional[int] = None, chunk_size: int = 4,
+                     as_counter: bool = True, tokenizer: str = "nltk") -> Iterator[Optional[Union[List[str], Counter]]]:
+    # hasil di-yield berurutan sesuai txt_paths, None kalau file gagal dibaca
+    worker_fn = partial(_preprocess_file, as_counter=as_counter, tokenizer=tokenizer)
+    workers = resolve_workers(workers)
+    if workers <= 1:
+        for txt_path in txt_paths:
+            yield worker_fn(txt_path)
+        return
 
+    with worker_pool(workers) as pool:
+        for result in pool.imap(worker_fn, txt_paths, chunksize=chunk_size):
+            yield result
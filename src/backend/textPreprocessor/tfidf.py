@@ -1,50 +1,165 @@
+import json
+import os
+from typing import Dict, List, Optional
+
 import numpy as np
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, issparse
+
+from ..cache_manifest import atomic_path, save_array, load_array
+
+
+# frequency: count / panjang dokumen, sublinear: 1 + log(count),
+# bm25: saturasi count * (k1 + 1) / (count + k1 * (1 - b + b * panjang / rata-rata panjang))
+TF_SCHEMES = ("frequency", "sublinear", "bm25")
+NORMS = (None, "l2")
 
 
 class Tfidf:
-    def __init__(self):
+    IDF_FILE = 'idf_vector.npy'
+    PARAMS_FILE = 'tfidf.json'
+
+    def __init__(self, tf_scheme: str = "frequency", norm: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        if tf_scheme not in TF_SCHEMES:
+            raise ValueError(f"Unknown tf_scheme: {tf_scheme} (pilih salah satu dari {TF_SCHEMES})")
+        if norm not in NORMS:
+            raise ValueError(f"Unknown norm: {norm} (pilih salah satu dari {NORMS})")
+        self.tf_scheme = tf_scheme
+        # l2: vektor TF-IDF tiap dokumen / query dinormalisasi ke panjang 1
+        self.norm = norm
+        self.k1 = k1
+        self.b = b
         self.idf_vector = None
         self.num_documents = 0
         self.num_terms = 0
+        self.avg_document_length = 1.0
+
+    def params(self) -> Dict:
+        return {'tf_scheme': self.tf_scheme, 'norm': self.norm, 'k1': self.k1, 'b': self.b}
 
     def fit(self, term_doc_matrix: csr_matrix):
+        term_doc_matrix = csr_matrix(term_doc_matrix)
         self.num_terms, self.num_documents = term_doc_matrix.shape
 
-        # df_i = jumlah dokumen dengan term i
-        df = np.array((term_doc_matrix > 0).sum(axis=1)).flatten()
+        # df_i = jumlah dokumen dengan term i = jumlah entry baris i (dari indptr, tanpa salinan boolean)
+        # explicit zero jarang ada, kalau ada dibuang dulu dari salinan
+        if term_doc_matrix.nnz and not np.all(term_doc_matrix.data):
+            term_doc_matrix = term_doc_matrix.copy()
+            term_doc_matrix.eliminate_zeros()
+        df = np.diff(term_doc_matrix.indptr)
 
         # IDF[i] = log10(n / (1 + df_i))
         self.idf_vector = np.log10(self.num_documents / (1 + df))
 
+        doc_lengths = self.document_lengths(term_doc_matrix)
+        self.avg_document_length = float(doc_lengths.mean()) if doc_lengths.size and doc_lengths.mean() > 0 else 1.0
+
         return self
 
+    @staticmethod
+    def document_lengths(term_doc_matrix: csr_matrix) -> np.ndarray:
+        # jumlah term per kolom (dokumen)
+        return np.bincount(term_doc_matrix.indices, weights=term_doc_matrix.data, minlength=term_doc_matrix.shape[1])
+
+    def term_frequency(self, counts: np.ndarray, lengths) -> np.ndarray:
+        # bobot TF per entry, lengths = panjang dokumen / query pemilik tiap entry
+        counts = np.asarray(counts, dtype=np.float64)
+        if self.tf_scheme == "sublinear":
+            weights = np.zeros_like(counts)
+            positive = counts > 0
+            weights[positive] = 1 + np.log(counts[positive])
+            return weights
+        if self.tf_scheme == "bm25":
+            relative_lengths = np.asarray(lengths, dtype=np.float64) / self.avg_document_length
+            return counts * (self.k1 + 1) / (counts + self.k1 * (1 - self.b + self.b * relative_lengths))
+
+        lengths = np.asarray(lengths, dtype=np.float64)
+        return counts / np.where(lengths == 0, 1, lengths)
+
+    @staticmethod
+    def l2_scale(data: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+        # 1 / ||v|| per entry, groups = dokumen / query pemilik tiap entry
+        norms = np.sqrt(np.bincount(groups, weights=data * data, minlength=n_groups))
+        norms[norms == 0] = 1
+        return 1.0 / norms[groups]
+
     def transform(self, term_doc_matrix: csr_matrix) -> csr_matrix:
+        tfidf_matrix = csr_matrix(term_doc_matrix, dtype=np.float64, copy=True)
+        n_documents = tfidf_matrix.shape[1]
 
-        doc_lengths = np.array(term_doc_matrix.sum(axis=0)).flatten()
-        doc_lengths[doc_lengths == 0] = 1
-        tf_matrix = term_doc_matrix.multiply(1.0 / doc_lengths).tocsr()
+        # TF-IDF = diag(IDF) * TF, langsung di array data: baris tiap entry diambil dari indptr
+        doc_lengths = self.document_lengths(tfidf_matrix)
+        term_ids = np.repeat(np.arange(tfidf_matrix.shape[0]), np.diff(tfidf_matrix.indptr))
+        tfidf_matrix.data = self.term_frequency(tfidf_matrix.data, doc_lengths[tfidf_matrix.indices]) \
+            * self.idf_vector[term_ids]
 
-        # TF-IDF = diag(IDF) * TF
-        # Manual multiplication
-        tfidf_matrix = tf_matrix.copy()
-        for i in range(self.num_terms):
-            tfidf_matrix.data[tfidf_matrix.indptr[i]:tfidf_matrix.indptr[i+1]] *= self.idf_vector[i]
+        if self.norm == "l2":
+            tfidf_matrix.data *= self.l2_scale(tfidf_matrix.data, tfidf_matrix.indices, n_documents)
 
         return tfidf_matrix
 
     def fit_transform(self, term_doc_matrix: csr_matrix) -> csr_matrix:
         return self.fit(term_doc_matrix).transform(term_doc_matrix)
 
-    def transform_query(self, query_vector: np.ndarray) -> np.ndarray:
-        total_terms = np.sum(query_vector)
-        if total_terms == 0:
-            total_terms = 1
+    def transform_query(self, query_vector):
+        if issparse(query_vector):
+            return self.transform_queries(csr_matrix(query_vector.reshape(1, -1)))
 
-        tf_vector = query_vector / total_terms
+        query_vector = np.asarray(query_vector, dtype=np.float64).ravel()
+        term_indices = np.flatnonzero(query_vector)
+        tf_vector = np.zeros_like(query_vector)
+        tf_vector[term_indices] = self.query_term_weights(query_vector[term_indices], term_indices)
         tfidf_vector = tf_vector * self.idf_vector
 
         return tfidf_vector
 
+    def query_term_weights(self, freqs: np.ndarray, term_indices: Optional[np.ndarray] = None) -> np.ndarray:
+        # bobot TF satu query dari frekuensi term-term yang muncul saja
+        # IDF belum dikalikan, tapi norm l2 sudah memperhitungkan IDF (butuh term_indices)
+        freqs = np.asarray(freqs, dtype=np.float64)
+        weights = self.term_frequency(freqs, freqs.sum())
+        if self.norm == "l2":
+            if term_indices is None:
+                raise ValueError("term_indices dibutuhkan untuk norm l2")
+            norm = np.sqrt(np.sum((weights * self.idf_vector[term_indices]) ** 2))
+            if norm > 0:
+                weights /= norm
+        return weights
+
+    def query_tf(self, query_matrix: csr_matrix) -> csr_matrix:
+        # TF per baris query (Q x vocab), IDF belum dikalikan (norm l2 sudah termasuk IDF)
+        tf_matrix = csr_matrix(query_matrix, dtype=np.float64, copy=True)
+        n_queries = tf_matrix.shape[0]
+        query_ids = np.repeat(np.arange(n_queries), np.diff(tf_matrix.indptr))
+        lengths = np.bincount(query_ids, weights=tf_matrix.data, minlength=n_queries)
+
+        tf_matrix.data = self.term_frequency(tf_matrix.data, lengths[query_ids])
+        if self.norm == "l2":
+            tf_matrix.data *= self.l2_scale(tf_matrix.data * self.idf_vector[tf_matrix.indices], query_ids, n_queries)
+
+        return tf_matrix
+
+    def transform_queries(self, query_matrix: csr_matrix) -> csr_matrix:
+        # banyak query sekaligus, satu baris per query (Q x vocab)
+        tfidf_matrix = self.query_tf(query_matrix)
+        tfidf_matrix.data *= self.idf_vector[tfidf_matrix.indices]
+        return tfidf_matrix
 
-
+    def save(self, output_dir: str) -> List[str]:
+        os.makedirs(output_dir, exist_ok=True)
+        save_array(os.path.join(output_dir, self.IDF_FILE), np.asarray(self.idf_vector, dtype=np.float32))
+        state = dict(self.params(), num_documents=self.num_documents, avg_document_length=self.avg_document_length)
+        with atomic_path(os.path.join(output_dir, self.PARAMS_FILE)) as tmp_path:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+        return [self.IDF_FILE, self.PARAMS_FILE]
+
+    @classmethod
+    def load(cls, input_dir: str, mmap_mode: Optional[str] = 'r') -> 'Tfidf':
+        with open(os.path.join(input_dir, cls.PARAMS_FILE), 'r') as f:
+            state = json.load(f)
+        tfidf = cls(state['tf_scheme'], state['norm'], state['k1'], state['b'])
+        tfidf.idf_vector = load_array(os.path.join(input_dir, cls.IDF_FILE), mmap_mode)
+        tfidf.num_terms = tfidf.idf_vector.shape[0]
+        tfidf.num_documents = state['num_documents']
+        tfidf.avg_document_length = state['avg_document_length']
+        return tfidf
@@ -0,0 +1,48 @@
+from typing import List, Dict
+
+
+class TitleIndex:
+    # Inverted index n-gram (1..max_n) untuk pencarian substring judul
+    # query <= max_n karakter langsung lookup, lebih panjang: irisan posting n-gram lalu verifikasi
+    def __init__(self, titles: List[str], max_n: int = 3):
+        self.max_n = max_n
+        self.normalized_titles = [title.lower() for title in titles]
+        self.postings: Dict[str, List[int]] = {}
+
+        for idx, title in enumerate(self.normalized_titles):
+            grams = set()
+            for n in range(1, max_n + 1):
+                for start in range(len(title) - n + 1):
+                    grams.add(title[start:start + n])
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self.normalized_titles)
+
+    def search(self, query: str) -> List[int]:
+        # index judul yang mengandung query, urut sesuai urutan awal
+        query = query.lower()
+        if not query:
+            return list(range(len(self.normalized_titles)))
+
+        if len(query) <= self.max_n:
+            return list(self.postings.get(query, []))
+
+        n = self.max_n
+        grams = {query[start:start + n] for start in range(len(query) - n + 1)}
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+
+        return sorted(idx for idx in candidates if query in self.normalized_titles[idx])
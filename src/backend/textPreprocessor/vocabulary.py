@@ -0,0 +1,160 @@
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from ..cache_manifest import save_array, load_array
+
+
+class Vocabulary:
+    # term disimpan sebagai array bytes fixed-width (dtype S) yang terurut, lookup pakai searchsorted
+    # file .npy bisa di-mmap langsung: tidak ada parse json / dict term per worker
+    TERMS_FILE = 'vocabulary_terms.npy'
+    IDS_FILE = 'vocabulary_ids.npy'
+
+    def __init__(self, sorted_terms: np.ndarray, term_ids: np.ndarray):
+        self.sorted_terms = sorted_terms  # utf-8, terurut
+        self.term_ids = term_ids          # posisi terurut -> index term (baris matriks)
+
+    @classmethod
+    def from_terms(cls, term_list: List[str]) -> 'Vocabulary':
+        encoded = [term.encode('utf-8') for term in term_list]
+        width = max((len(term) for term in encoded), default=1)
+        terms = np.array(encoded, dtype=f'S{max(width, 1)}')
+        order = np.argsort(terms, kind='stable')
+        return cls(terms[order], order.astype(np.int32))
+
+    def __len__(self) -> int:
+        return self.sorted_terms.shape[0]
+
+    def lookup(self, term: str) -> Optional[int]:
+        key = term.encode('utf-8')
+        if len(key) > self.sorted_terms.dtype.itemsize:
+            return None
+        pos = int(np.searchsorted(self.sorted_terms, key))
+        if pos < len(self) and self.sorted_terms[pos] == key:
+            return int(self.term_ids[pos])
+        return None
+
+    def lookup_many(self, terms: Iterable[str]) -> np.ndarray:
+        # index tiap term, -1 untuk term yang tidak ada di vocabulary
+        encoded = [term.encode('utf-8') for term in terms]
+        if not encoded or len(self) == 0:
+            return np.full(len(encoded), -1, dtype=np.int64)
+
+        width = self.sorted_terms.dtype.itemsize
+        keys = np.array(encoded, dtype=f'S{max(max(len(term) for term in encoded), 1)}')
+        too_long = np.array([len(term) > width for term in encoded])
+        keys = keys.astype(self.sorted_terms.dtype)
+
+        pos = np.minimum(np.searchsorted(self.sorted_terms, keys), len(self) - 1)
+        found = (self.sorted_terms[pos] == keys) & ~too_long
+        return np.where(found, self.term_ids[pos], -1).astype(np.int64)
+
+    def get(self, term: str, default: Optional[int] = None) -> Optional[int]:
+        idx = self.lookup(term)
+        return default if idx is None else idx
+
+    def __contains__(self, term: str) -> bool:
+        return self.lookup(term) is not None
+
+    def __getitem__(self, term: str) -> int:
+        idx = self.lookup(term)
+        if idx is None:
+            raise KeyError(term)
+        return idx
+
+    def save(self, output_dir: str) -> List[str]:
+        os.makedirs(output_dir, exist_ok=True)
+        save_array(os.path.join(output_dir, self.TERMS_FILE), self.sorted_terms)
+        save_array(os.path.join(output_dir, self.IDS_FILE), self.term_ids)
+        return [self.TERMS_FILE, self.IDS_FILE]
+
+    @classmethod
+    def load(cls, input_dir: str, mmap_mode: Optional[str] = 'r') -> 'Vocabulary':
+        return cls(load_array(os.path.join(input_dir, cls.TERMS_FILE), mmap_mode),
+                   load_array(os.path.join(input_dir, cls.IDS_FILE), mmap_mode))
+
+
+FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV_PRIME = np.uint64(0x100000001b3)
+
+
+def hash_terms(terms: Iterable[str], n_features: int) -> np.ndarray:
+    # FNV-1a 64-bit atas byte utf-8, lalu finalizer splitmix64 supaya bit bawah (modulo) tersebar rata
+    # stabil antar proses, tidak seperti hash() Python yang di-salt per proses
+    # term dikelompokkan per panjang byte: tiap kelompok di-hash per kolom byte secara vektor,
+    # jadi biaya & memory sebanding total byte, bukan jumlah term x term terpanjang
+    encoded = [term.encode('utf-8') for term in terms]
+    lengths = np.fromiter((len(term) for term in encoded), dtype=np.int64, count=len(encoded))
+    hashed = np.full(len(encoded), FNV_OFFSET, dtype=np.uint64)
+
+    for length in np.unique(lengths):
+        positions = np.flatnonzero(lengths == length)
+        if length == 0:
+            continue
+        group = np.frombuffer(b''.join([encoded[i] for i in positions]), dtype=np.uint8)
+        group = group.reshape(positions.size, int(length)).astype(np.uint64)
+        group_hashed = hashed[positions]
+        for col in range(int(length)):
+            group_hashed = (group_hashed ^ group[:, col]) * FNV_PRIME
+        hashed[positions] = group_hashed
+
+    hashed ^= hashed >> np.uint64(30)
+    hashed *= np.uint64(0xbf58476d1ce4e5b9)
+    hashed ^= hashed >> np.uint64(27)
+    hashed *= np.uint64(0x94d049bb133111eb)
+    hashed ^= hashed >> np.uint64(31)
+    return (hashed % np.uint64(n_features)).astype(np.int64)
+
+
+class HashingVocabulary:
+    # feature hashing: term -> bucket hash(term) % n_features, tanpa menyimpan string term
+    # hanya bucket yang terisi (lolos min_df) yang jadi baris matriks, urut naik, lookup pakai searchsorted
+    # term berbeda yang jatuh ke bucket sama digabung jadi satu fitur
+    BUCKETS_FILE = 'hashing_buckets.npy'
+    N_FEATURES_FILE = 'hashing_n_features.npy'
+
+    def __init__(self, n_features: int, buckets: np.ndarray):
+        self.n_features = n_features
+        self.buckets = buckets  # bucket terurut, posisi = index term (baris matriks)
+
+    def __len__(self) -> int:
+        return self.buckets.shape[0]
+
+    def lookup(self, term: str) -> Optional[int]:
+        idx = int(self.lookup_many([term])[0])
+        return None if idx < 0 else idx
+
+    def lookup_many(self, terms: Iterable[str]) -> np.ndarray:
+        # index tiap term, -1 untuk bucket yang tidak ada di matriks
+        hashed = hash_terms(terms, self.n_features)
+        if hashed.size == 0 or len(self) == 0:
+            return np.full(hashed.size, -1, dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(self.buckets, hashed), len(self) - 1)
+        return np.where(self.buckets[pos] == hashed, pos, -1).astype(np.int64)
+
+    def get(self, term: str, default: Optional[int] = None) -> Optional[int]:
+        idx = self.lookup(term)
+        return default if idx is None else idx
+
+    def __contains__(self, term: str) -> bool:
+        return self.lookup(term) is not None
+
+    def __getitem__(self, term: str) -> int:
+        idx = self.lookup(term)
+        if idx is None:
+            raise KeyError(term)
+        return idx
+
+    def save(self, output_dir: str) -> List[str]:
+        os.makedirs(output_dir, exist_ok=True)
+        save_array(os.path.join(output_dir, self.BUCKETS_FILE), self.buckets)
+        save_array(os.path.join(output_dir, self.N_FEATURES_FILE), np.array([self.n_features], dtype=np.int64))
+        return [self.BUCKETS_FILE, self.N_FEATURES_FILE]
+
+    @classmethod
+    def load(cls, input_dir: str, mmap_mode: Optional[str] = 'r') -> 'HashingVocabulary':
+        n_features = int(np.load(os.path.join(input_dir, cls.N_FEATURES_FILE))[0])
+        return cls(n_features, load_array(os.path.join(input_dir, cls.BUCKETS_FILE), mmap_mode))
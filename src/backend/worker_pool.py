@@ -0,0 +1,21 @@
+import os
+from multiprocessing import get_context
+from multiprocessing.pool import Pool
+from typing import Optional
+
+# batas default jumlah process untuk preprocessing / decode cover
+MAX_DEFAULT_WORKERS = 4
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    # None: separuh core (maks MAX_DEFAULT_WORKERS), rebuild jalan di dalam process server
+    # jadi core sisanya tetap dipakai untuk melayani request
+    if workers is not None:
+        return max(1, workers)
+    return max(1, min(MAX_DEFAULT_WORKERS, (os.cpu_count() or 1) // 2))
+
+
+def worker_pool(workers: int) -> Pool:
+    # spawn, bukan fork: rebuild dijalankan ModelManager dari thread background server,
+    # fork dari process multi-thread bisa mewarisi lock yang sedang dipegang thread lain (deadlock)
+    return get_context('spawn').Pool(processes=workers)
@@ -0,0 +1,11 @@
+import os
+
+from .app import create_app
+
+
+# Entry point production (pre-fork), dari root repo:
+#   gunicorn -c src/backend/gunicorn.conf.py src.backend.wsgi:app
+# Dengan preload_app model di-load sekali di master sebelum fork. Matriks cache di-mmap read-only
+# (dibagi lewat page cache) dan sisanya dibagi copy-on-write, jadi worker tidak memuat ulang model.
+# Load sinkron: thread background tidak ikut ter-fork ke worker.
+app = create_app(background_load=os.environ.get('MODEL_BACKGROUND_LOAD', '0') == '1')
@@ -0,0 +1,29 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+WORDS = ['forest', 'dragon', 'castle', 'robot', 'planet', 'flower', 'ocean', 'magic', 'doctor', 'sword',
+         'alien', 'ship', 'garden', 'winter', 'river', 'mountain', 'island', 'knight', 'queen', 'shadow',
+         'silver', 'thunder', 'desert', 'engine', 'lantern', 'meadow', 'pirate', 'rocket', 'spider', 'valley']
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    # data dir kecil: mapper.json + txt, tanpa cover
+    rng = np.random.default_rng(0)
+    os.makedirs(tmp_path / 'txt')
+    mapper = {}
+    for i in range(24):
+        words = rng.choice(WORDS, size=int(rng.integers(40, 120)))
+        with open(tmp_path / 'txt' / f'{i}.txt', 'w', encoding='utf-8') as f:
+            f.write(' '.join(words))
+        mapper[str(1000 + i)] = {'title': f'Book {i}', 'cover': f'covers/{i}.jpg', 'txt': f'txt/{i}.txt'}
+    with open(tmp_path / 'mapper.json', 'w', encoding='utf-8') as f:
+        json.dump(mapper, f)
+    return str(tmp_path)
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from scipy.sparse import random as sparse_random
+
+from src.backend.algorithms.ann import IVFIndex, kmeans
+from src.backend.benchmarks.ann_recall import exact_search, make_embeddings
+from src.backend.lsa.lsa_model import LSAModel
+
+
+def recall_at_k(index, X, queries, k, metric):
+    hits = [len({idx for idx, _ in index.search(q, k)} & set(exact_search(X, q, k, metric).tolist()))
+            for q in queries]
+    return sum(hits) / (k * len(queries))
+
+
+@pytest.mark.parametrize("metric", ["cosine", "l2"])
+def test_recall_at_10(metric):
+    X = make_embeddings(4000, 32, 40, metric)
+    queries = X[np.random.default_rng(1).choice(len(X), 50, replace=False)]
+    index = IVFIndex(metric, n_probe=8).build(X)
+    assert index.n_lists == 63
+    assert recall_at_k(index, X, queries, 10, metric) >= 0.9
+
+
+@pytest.mark.parametrize("metric", ["cosine", "l2"])
+def test_probing_every_list_is_exact(metric):
+    X = make_embeddings(500, 16, 10, metric)
+    index = IVFIndex(metric, n_lists=10, n_probe=10).build(X)
+    for q in X[:20]:
+        results = index.search(q, 5)
+        expected = exact_search(X, q, 5, metric)
+        assert [idx for idx, _ in results] == expected.tolist()
+        scores = np.array([score for _, score in results])
+        if metric == "cosine":
+            np.testing.assert_allclose(scores, X[expected] @ q, rtol=1e-5)
+        else:
+            np.testing.assert_allclose(scores, np.linalg.norm(X[expected] - q, axis=1), rtol=1e-5, atol=1e-6)
+
+
+def test_lists_partition_all_vectors():
+    X = make_embeddings(1000, 8, 12, "l2")
+    index = IVFIndex("l2", n_lists=12).build(X)
+    assert index.list_offsets[-1] == len(X)
+    assert sorted(index.list_ids.tolist()) == list(range(len(X)))
+    # tiap vektor ada di list centroid terdekatnya
+    nearest = np.argmin(((X[:, None, :] - index.centroids[None]) ** 2).sum(axis=2), axis=1)
+    for c in range(index.n_lists):
+        members = index.list_ids[index.list_offsets[c]:index.list_offsets[c + 1]]
+        assert np.all(nearest[members] == c)
+
+
+def test_kmeans_recovers_separated_clusters():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0, 0], [10, 0], [0, 10]], dtype=np.float64)
+    X = np.repeat(centers, 50, axis=0) + 0.1 * rng.standard_normal((150, 2))
+    centroids, assignments = kmeans(X, 3)
+    np.testing.assert_allclose(np.sort(centroids, axis=0), np.sort(centers, axis=0), atol=0.1)
+    assert len(set(assignments.reshape(3, 50)[:, 0])) == 3
+    assert all(len(set(group)) == 1 for group in assignments.reshape(3, 50))
+
+
+def test_exclude_and_k_larger_than_candidates():
+    X = make_embeddings(300, 8, 5, "cosine")
+    index = IVFIndex("cosine", n_lists=5, n_probe=1).build(X)
+    assert 7 not in [idx for idx, _ in index.search(X[7], 5, exclude=7)]
+    # hanya satu list yang di-scan: hasil tidak lebih dari isi list itu
+    results = index.search(X[0], 1000)
+    assert 0 < len(results) < 300
+    assert len({idx for idx, _ in results}) == len(results)
+
+
+def test_save_load_round_trip(tmp_path):
+    X = make_embeddings(800, 16, 10, "cosine")
+    index = IVFIndex("cosine", n_probe=4).build(X)
+    index.save(str(tmp_path))
+    assert IVFIndex.exists(str(tmp_path))
+
+    loaded = IVFIndex("cosine", n_probe=4).load(str(tmp_path), mmap_mode='r').attach(X)
+    for q in X[:10]:
+        assert loaded.search(q, 5) == index.search(q, 5)
+
+    IVFIndex.remove(str(tmp_path))
+    assert not IVFIndex.exists(str(tmp_path))
+
+
+def test_lsa_model_uses_ivf_above_threshold(tmp_path):
+    tfidf_matrix = sparse_random(300, 120, density=0.1, format='csr', random_state=0)
+    exact = LSAModel(k=8).fit(tfidf_matrix)
+    # n_probe >= jumlah list: hasil ANN harus sama dengan exact search
+    approximate = LSAModel(k=8, ann_threshold=100, ann_n_probe=100).fit(tfidf_matrix)
+    assert exact.ann_index is None and approximate.ann_index is not None
+
+    query = np.asarray(exact.document_embeddings_normalized[3], dtype=np.float64)
+    assert [i for i, _ in approximate.find_similar_to_query(query, 5)] == \
+        [i for i, _ in exact.find_similar_to_query(query, 5)]
+    assert [i for i, _ in approximate.get_similar_documents(3, 5)] == [i for i, _ in exact.get_similar_documents(3, 5)]
+
+    approximate.save(str(tmp_path))
+    loaded = LSAModel(k=8, ann_threshold=100, ann_n_probe=100).load(str(tmp_path))
+    assert loaded.ann_index is not None
+    assert loaded.find_similar_to_query(query, 5) == approximate.find_similar_to_query(query, 5)
@@ -0,0 +1,37 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from src.backend.cache_manifest import CacheManifest, load_array, save_array
+from src.backend.lsa.preprocessing import Preprocessing
+
+
+def test_save_array_leaves_no_temp_files(tmp_path):
+    path = os.path.join(tmp_path, 'a.npy')
+    save_array(path, np.arange(5, dtype=np.float32))
+    save_array(path, np.arange(6, dtype=np.float32))
+    assert load_array(path, None).tolist() == list(range(6))
+    assert os.listdir(tmp_path) == ['a.npy']
+
+
+def build_lsa(data_dir: str, cache_dir: str):
+    pipeline = Preprocessing(data_dir=data_dir, cache_dir=cache_dir, k=4, tokenizer='regex')
+    pipeline.initialize()
+    return len(pipeline.books)
+
+
+def build_lsa_params(data_dir: str, cache_dir: str):
+    return Preprocessing(data_dir=data_dir, cache_dir=cache_dir, k=4, tokenizer='regex').cache_params()
+
+
+def test_concurrent_cold_start_builds_one_consistent_cache(corpus_dir, tmp_path):
+    # seperti beberapa worker uvicorn / gunicorn tanpa preload yang start bersamaan dengan cache kosong
+    cache_dir = os.path.join(tmp_path, 'cache')
+    with multiprocessing.get_context('fork').Pool(4) as pool:
+        results = pool.starmap(build_lsa, [(corpus_dir, cache_dir)] * 4)
+
+    assert results == [24] * 4
+    manifest = CacheManifest(cache_dir, 'lsa')
+    assert manifest.validation_error(build_lsa_params(corpus_dir, cache_dir), verify_checksums=True) is None
+    assert not [name for name in os.listdir(cache_dir) if '.tmp' in name]
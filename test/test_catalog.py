@@ -0,0 +1,74 @@
+import json
+import os
+
+from src.backend.catalog import Catalog, get_catalog
+
+
+def write_mapper(data_dir, mapper, bump_ns=0):
+    path = os.path.join(data_dir, 'mapper.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(mapper, f)
+    if bump_ns:
+        # mtime dimajukan supaya perubahan terlihat walau resolusi mtime kasar
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump_ns))
+
+
+def book(title):
+    return {'title': title, 'cover': f'covers/{title}.jpg', 'txt': f'txt/{title}.txt'}
+
+
+def test_reloads_only_when_mapper_changes(tmp_path):
+    write_mapper(tmp_path, {'1': book('a'), '2': book('b')})
+    catalog = Catalog(str(tmp_path))
+    records = catalog.records()
+    assert [r.id for r in records] == ['1', '2']
+    assert [r.position for r in records] == [0, 1]
+    version = catalog.version
+    content_hash = catalog.content_hash()
+
+    # tanpa perubahan: objek yang sama, tidak di-parse ulang
+    assert catalog.records() is records
+    assert catalog.version == version
+
+    write_mapper(tmp_path, {'1': book('a'), '2': book('b2'), '3': book('c')}, bump_ns=10 ** 9)
+    assert catalog.version != version
+    assert catalog.get('2').title == 'b2'
+    assert catalog.get('3').position == 2
+    assert len(catalog) == 3
+    assert catalog.content_hash() != content_hash
+
+
+def test_model_indices_survive_reload(tmp_path):
+    write_mapper(tmp_path, {'1': book('a'), '2': book('b')})
+    catalog = Catalog(str(tmp_path))
+    catalog.register_model('lsa', ['2', '1'])
+    assert catalog.get('1').indices == {'lsa': 1}
+    assert catalog.get('2').indices == {'lsa': 0}
+
+    write_mapper(tmp_path, {'1': book('a'), '2': book('b'), '3': book('c')}, bump_ns=10 ** 9)
+    assert catalog.get('2').indices == {'lsa': 0}
+    # buku baru belum ada di model
+    assert catalog.get('3').indices == {}
+
+    catalog.register_model('lsa', ['1'])
+    assert catalog.get('1').indices == {'lsa': 0}
+    assert catalog.get('2').indices == {}
+
+
+def test_missing_mapper_keeps_last_records(tmp_path):
+    catalog = Catalog(str(tmp_path))
+    assert catalog.records() == []
+    assert catalog.version is None
+    assert catalog.content_hash() is None
+
+    write_mapper(tmp_path, {'1': book('a')})
+    assert catalog.get('1').title == 'a'
+    os.remove(tmp_path / 'mapper.json')
+    assert catalog.get('1').title == 'a'
+    assert catalog.get('missing') is None
+
+
+def test_get_catalog_is_shared_per_directory(tmp_path):
+    write_mapper(tmp_path, {'1': book('a')})
+    assert get_catalog(str(tmp_path)) is get_catalog(os.path.join(str(tmp_path), '.'))
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from src.backend.algorithms.eigenvalue import householder_tridiagonalize, symmetric_qr_algorithm, tridiagonal_qr
+
+
+def random_symmetric(n, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.standard_normal((n, n))
+    return (A + A.T) / 2
+
+
+def check_eigendecomposition(A, eigenvalues, eigenvectors):
+    np.testing.assert_allclose(np.sort(eigenvalues), np.linalg.eigvalsh(A), atol=1e-9 * max(1.0, np.abs(A).max()))
+    np.testing.assert_allclose(eigenvectors.T @ eigenvectors, np.eye(len(A)), atol=1e-10)
+    np.testing.assert_allclose(A @ eigenvectors, eigenvectors * eigenvalues, atol=1e-8 * max(1.0, np.abs(A).max()))
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 40])
+def test_symmetric_qr_matches_numpy(n):
+    A = random_symmetric(n, seed=n)
+    eigenvalues, eigenvectors, stats = symmetric_qr_algorithm(A, return_stats=True)
+    assert stats['converged']
+    check_eigendecomposition(A, eigenvalues, eigenvectors)
+
+
+def test_householder_tridiagonalize_is_similarity_transform():
+    A = random_symmetric(12)
+    d, e, Q = householder_tridiagonalize(A)
+    T = np.diag(d) + np.diag(e[:-1], 1) + np.diag(e[:-1], -1)
+    np.testing.assert_allclose(Q.T @ Q, np.eye(12), atol=1e-12)
+    np.testing.assert_allclose(Q @ T @ Q.T, A, atol=1e-12)
+    assert e[-1] == 0.0
+
+
+def test_repeated_and_zero_eigenvalues():
+    # seperti A^T A dari matriks rank-deficient: eigenvalue nol berulang dan cluster
+    rng = np.random.default_rng(1)
+    basis, _ = np.linalg.qr(rng.standard_normal((30, 30)))
+    spectrum = np.concatenate([[50.0, 50.0, 50.0, 7.0, 1e-3], np.zeros(25)])
+    A = (basis * spectrum) @ basis.T
+    A = (A + A.T) / 2
+    eigenvalues, eigenvectors, stats = symmetric_qr_algorithm(A, return_stats=True)
+    assert stats['converged']
+    check_eigendecomposition(A, eigenvalues, eigenvectors)
+
+
+def test_already_diagonal_needs_no_iterations():
+    d = np.array([3.0, -1.0, 2.0])
+    eigenvalues, eigenvectors, stats = tridiagonal_qr(d, np.zeros(3), np.eye(3))
+    assert stats['iterations'] == 0
+    np.testing.assert_array_equal(eigenvalues, d)
+    np.testing.assert_array_equal(eigenvectors, np.eye(3))
+
+
+def test_iterations_per_eigenvalue_stay_small():
+    # shift Wilkinson + deflation: konvergen dalam beberapa iterasi per eigenvalue, bukan ratusan
+    A = random_symmetric(60, seed=3)
+    _, _, stats = symmetric_qr_algorithm(A, return_stats=True)
+    assert stats['converged']
+    assert stats['iterations'] <= 3 * 60
+    assert stats['max_off_diagonal'] <= 1e-12
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+from scipy.sparse import random as sparse_random
+
+from src.backend.lsa.lsa_model import LSAModel, NEIGHBOR_FILES
+
+
+def fitted_model():
+    tfidf_matrix = sparse_random(200, 40, density=0.1, format='csr', random_state=0)
+    model = LSAModel(k=5).fit(tfidf_matrix)
+    model.build_query_projection(np.ones(200))
+    model.build_neighbor_table(m=5)
+    return model
+
+
+def test_save_removes_stale_optional_files(tmp_path):
+    model = fitted_model()
+    model.save(str(tmp_path))
+    assert all(os.path.exists(os.path.join(tmp_path, name)) for name in NEIGHBOR_FILES)
+
+    model.neighbor_indices = None
+    model.neighbor_scores = None
+    model.query_projection = None
+    files = model.save(str(tmp_path))
+    assert not any(os.path.exists(os.path.join(tmp_path, name)) for name in NEIGHBOR_FILES)
+    assert 'query_projection.npy' not in files
+    assert not os.path.exists(os.path.join(tmp_path, 'query_projection.npy'))
+
+    loaded = LSAModel(k=5).load(str(tmp_path))
+    assert loaded.neighbor_indices is None
+    assert loaded.query_projection is None
+
+
+def test_save_load_round_trip(tmp_path):
+    model = fitted_model()
+    model.save(str(tmp_path))
+    loaded = LSAModel(k=5).load(str(tmp_path))
+    np.testing.assert_allclose(loaded.document_embeddings_normalized, model.document_embeddings_normalized)
+    assert loaded.get_similar_documents(0, 3) == model.get_similar_documents(0, 3)
+
+
+def test_int8_precision_matches_float32_ranking(tmp_path):
+    tfidf_matrix = sparse_random(300, 80, density=0.1, format='csr', random_state=1)
+    exact = LSAModel(k=8).fit(tfidf_matrix)
+    quantized = LSAModel(k=8, precision="int8").fit(tfidf_matrix)
+    assert quantized.quantized_index is not None
+
+    queries = exact.document_embeddings_normalized[:10]
+    for query, expected in zip(queries, exact.find_similar_to_queries(queries, 5)):
+        assert [i for i, _ in quantized.find_similar_to_query(query, 5)] == [i for i, _ in expected]
+
+    quantized.save(str(tmp_path))
+    loaded = LSAModel(k=8, precision="int8").load(str(tmp_path))
+    assert loaded.find_similar_to_queries(queries, 5) == quantized.find_similar_to_queries(queries, 5)
@@ -0,0 +1,112 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.backend.cache_manifest import CacheManifest
+from src.backend.lsa.preprocessing import Preprocessing
+
+
+def query_text():
+    return 'forest dragon dragon castle robot planet planet planet ocean magic river knight shadow'
+
+
+@pytest.mark.parametrize('tf_scheme,norm', [('frequency', None), ('sublinear', 'l2'), ('bm25', 'l2')])
+def test_single_and_batch_query_agree_in_hashing_mode(corpus_dir, tmp_path, tf_scheme, norm):
+    # 30 kata ke 8 bucket: pasti ada tabrakan hash di query
+    pipeline = Preprocessing(data_dir=corpus_dir, cache_dir=os.path.join(tmp_path, 'cache'), k=4,
+                             tokenizer='regex', hashing_features=8, tf_scheme=tf_scheme, norm=norm)
+    pipeline.initialize()
+
+    term_indices, _ = pipeline.query_term_counts(query_text())
+    assert len(np.unique(term_indices)) == len(term_indices)
+
+    single = pipeline.search_by_document(query_text(), top_k=5)
+    batch = pipeline.search_by_documents([query_text()], top_k=5)[0]
+    assert [r['id'] for r in single] == [r['id'] for r in batch]
+    np.testing.assert_allclose([r['similarity'] for r in single], [r['similarity'] for r in batch], rtol=1e-5)
+
+
+def add_books(data_dir, texts):
+    # buku baru di akhir mapper.json; mtime dimajukan supaya catalog pasti reload
+    with open(os.path.join(data_dir, 'mapper.json'), encoding='utf-8') as f:
+        mapper = json.load(f)
+    for text in texts:
+        i = len(mapper)
+        with open(os.path.join(data_dir, 'txt', f'{i}.txt'), 'w', encoding='utf-8') as f:
+            f.write(text)
+        mapper[str(1000 + i)] = {'title': f'Book {i}', 'cover': f'covers/{i}.jpg', 'txt': f'txt/{i}.txt'}
+    path = os.path.join(data_dir, 'mapper.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(mapper, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def incremental_pipeline(corpus_dir, tmp_path, **kwargs):
+    pipeline = Preprocessing(data_dir=corpus_dir, cache_dir=os.path.join(tmp_path, 'cache'), k=4,
+                             tokenizer='regex', **kwargs)
+    pipeline.initialize()
+    return pipeline
+
+
+@pytest.mark.parametrize('svd_update', [False, True])
+def test_incremental_update_folds_in_while_residual_is_low(corpus_dir, tmp_path, svd_update):
+    fitted = incremental_pipeline(corpus_dir, tmp_path)
+    fit_state = CacheManifest(fitted.cache_dir, 'lsa').state()
+    assert fit_state['folded_documents'] == 0
+    assert 0.0 <= fit_state['fit_residual'] < 1.0
+
+    # buku baru = salinan buku lama, residualnya sama dengan rata-rata saat fit
+    with open(os.path.join(corpus_dir, 'txt', '0.txt'), encoding='utf-8') as f:
+        add_books(corpus_dir, [f.read()])
+    pipeline = incremental_pipeline(corpus_dir, tmp_path, svd_update=svd_update)
+
+    state = CacheManifest(pipeline.cache_dir, 'lsa').state()
+    assert state['fitted_documents'] == 24
+    assert state['folded_documents'] == 1
+    assert len(pipeline.books) == 25
+    assert pipeline.cache_exists()
+    # salinan buku 0 paling mirip dengan buku 0
+    assert pipeline.get_book_recommendations(pipeline.book_index['1024'], 1)[0]['id'] == '1000'
+
+
+def test_incremental_update_refits_when_residual_drifts(corpus_dir, tmp_path):
+    incremental_pipeline(corpus_dir, tmp_path)
+    # semua energi di luar span U_k tetap dianggap drift kalau threshold negatif
+    with open(os.path.join(corpus_dir, 'txt', '0.txt'), encoding='utf-8') as f:
+        add_books(corpus_dir, [f.read()])
+    pipeline = incremental_pipeline(corpus_dir, tmp_path, drift_threshold=-1.0)
+
+    state = CacheManifest(pipeline.cache_dir, 'lsa').state()
+    assert state['fitted_documents'] == 25
+    assert state['folded_documents'] == 0
+    assert len(pipeline.books) == 25
+
+
+def test_incremental_update_refits_past_fold_fraction(corpus_dir, tmp_path):
+    incremental_pipeline(corpus_dir, tmp_path)
+    add_books(corpus_dir, ['forest dragon castle'] * 5)
+    pipeline = incremental_pipeline(corpus_dir, tmp_path, max_fold_fraction=0.2)
+
+    state = CacheManifest(pipeline.cache_dir, 'lsa').state()
+    assert state['fitted_documents'] == 29
+    assert state['folded_documents'] == 0
+
+
+def test_book_lookup_and_title_search(corpus_dir, tmp_path):
+    pipeline = incremental_pipeline(corpus_dir, tmp_path)
+    assert pipeline.get_book_by_id('1007') == {'index': 7, 'id': '1007', 'title': 'Book 7', 'cover': 'covers/7.jpg'}
+    assert pipeline.get_book_by_id('missing') is None
+
+    assert [book['id'] for book in pipeline.search_books('BOOK 1')] == \
+        ['1001'] + [str(1010 + i) for i in range(10)]
+    assert pipeline.search_books('') == pipeline.books
+    assert pipeline.search_books('nothing') == []
+
+    # setelah buku ditambahkan, lookup ikut index baru
+    add_books(corpus_dir, ['forest dragon castle'])
+    pipeline = incremental_pipeline(corpus_dir, tmp_path)
+    assert pipeline.get_book_by_id('1024')['index'] == 24
+    assert [book['id'] for book in pipeline.search_books('book 24')] == ['1024']
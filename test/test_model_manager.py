@@ -0,0 +1,52 @@
+from src.backend.model_manager import ModelManager
+
+
+class FakePipeline:
+    # model_version: versi yang di-load, disk: versi cache "di disk" yang dibagi semua instance
+    disk = {'version': 'v1'}
+
+    def __init__(self):
+        self.model_version = None
+        self.rebuilt = False
+
+    def initialize(self, rebuild: bool = False):
+        if rebuild:
+            self.disk['version'] = self.disk['version'] + '+'
+            self.rebuilt = True
+        self.model_version = self.disk['version']
+
+    def cached_version(self):
+        return self.disk['version']
+
+
+def test_poll_updates_picks_up_cache_written_elsewhere():
+    FakePipeline.disk = {'version': 'v1'}
+    # dua "worker" dengan cache yang sama
+    worker_a = ModelManager({'lsa': FakePipeline})
+    worker_b = ModelManager({'lsa': FakePipeline})
+    worker_a.load(background=False)
+    worker_b.load(background=False)
+
+    assert worker_a.load(['lsa'], rebuild=True, background=False)
+    assert worker_a.get('lsa').model_version == 'v1+'
+    assert worker_b.stale_models() == ['lsa']
+
+    assert worker_b.poll_updates(interval=0)
+    worker_b.wait()
+    assert worker_b.get('lsa').model_version == 'v1+'
+    assert not worker_b.get('lsa').rebuilt
+    assert worker_b.status()['lsa']['version'] == 2
+    assert not worker_b.poll_updates(interval=0)
+
+
+def test_poll_updates_is_rate_limited():
+    FakePipeline.disk = {'version': 'v1'}
+    manager = ModelManager({'lsa': FakePipeline})
+    manager.load(background=False)
+    FakePipeline.disk['version'] = 'v2'
+
+    assert manager.poll_updates(interval=3600)
+    manager.wait()
+    FakePipeline.disk['version'] = 'v3'
+    assert not manager.poll_updates(interval=3600)
+    assert manager.get('lsa').model_version == 'v2'
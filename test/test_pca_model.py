@@ -0,0 +1,125 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.backend.cache_manifest import CacheManifest
+from src.backend.pca.pca_model import PCA
+from src.backend.pca.preprocessing import PCAPreprocessing
+
+
+def write_covers(data_dir, n=12, seed=0):
+    # cover kecil dari beberapa pola dasar + noise, supaya ada struktur untuk PCA
+    rng = np.random.default_rng(seed)
+    patterns = rng.uniform(0, 255, (3, 30, 20, 3))
+    books = []
+    for i in range(n):
+        pixels = patterns[i % 3] + rng.normal(0, 20, patterns[i % 3].shape)
+        img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).resize((100, 150))
+        img.save(data_dir / f'{i}.png')
+        books.append({'id': str(i), 'cover': f'{i}.png'})
+    return books
+
+
+@pytest.fixture
+def covers(tmp_path):
+    return str(tmp_path), write_covers(tmp_path)
+
+
+def test_single_and_batch_image_search_agree(covers):
+    data_dir, books = covers
+    model = PCA(k=4).fit(data_dir, workers=1, books=books)
+    queries = [f'{data_dir}/{i}.png' for i in (0, 4, 11)]
+
+    batch = model.find_similar_to_uploaded_batch(queries, n=5)
+    for query, (batch_indices, batch_distances) in zip(queries, batch):
+        indices, distances = model.find_similar_to_uploaded(query, n=5)
+        np.testing.assert_array_equal(indices, batch_indices)
+        np.testing.assert_array_equal(distances, batch_distances)
+
+        # jarak = jarak euclidean langsung di ruang koefisien, terurut naik
+        coeffs = model.process_uploaded_image(query)
+        expected = np.linalg.norm(model.coeffMatrix.astype(np.float64) - coeffs, axis=1)
+        np.testing.assert_allclose(distances, expected[indices], rtol=1e-5, atol=1e-3)
+        assert np.all(np.diff(distances) >= 0)
+    # cover itu sendiri paling dekat
+    assert [int(indices[0]) for indices, _ in batch] == [0, 4, 11]
+
+
+
+def low_rank_pixels(n=40, dim=50, rank=3, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 + rng.standard_normal((n, rank)) @ (10 * rng.standard_normal((rank, dim)))
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 7, 40])
+def test_partial_fit_matches_full_pca_when_k_covers_rank(batch_size):
+    pixels = low_rank_pixels()
+    model = PCA(k=5, batch_size=batch_size)
+    model.partial_fit_rows(pixels)
+
+    centered = pixels - pixels.mean(axis=0)
+    _, singular_values, VT = np.linalg.svd(centered, full_matrices=False)
+    assert model.n_samples_seen == 40
+    np.testing.assert_allclose(model.u, pixels.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(model.singular_values[:3], singular_values[:3], rtol=1e-8)
+    # span basis sama dengan 3 komponen utama
+    basis = np.asarray(model.uMatrix)[:, :3]
+    np.testing.assert_allclose(basis @ basis.T, VT[:3].T @ VT[:3], atol=1e-8)
+
+
+def test_partial_fit_keeps_top_components_of_noisy_data():
+    rng = np.random.default_rng(1)
+    pixels = low_rank_pixels(n=200, rank=3) + 0.05 * rng.standard_normal((200, 50))
+    model = PCA(k=6, batch_size=10)
+    model.partial_fit_rows(pixels)
+
+    _, singular_values, VT = np.linalg.svd(pixels - pixels.mean(axis=0), full_matrices=False)
+    np.testing.assert_allclose(model.singular_values[:3], singular_values[:3], rtol=1e-3)
+    basis = np.asarray(model.uMatrix)[:, :3]
+    np.testing.assert_allclose(basis @ basis.T, VT[:3].T @ VT[:3], atol=1e-3)
+
+
+def test_batched_fit_matches_full_fit_on_covers(covers):
+    data_dir, books = covers
+    full = PCA(k=11, precision="float64").fit(data_dir, workers=1, books=books)
+    batched = PCA(k=11, precision="float64", batch_size=4).fit(data_dir, workers=1, books=books)
+
+    # basis boleh berbeda rotasi / tanda, jarak antar gambar di ruang koefisien harus sama
+    def pairwise(coeffs):
+        return np.linalg.norm(coeffs[:, None] - coeffs[None], axis=2)
+
+    np.testing.assert_allclose(pairwise(batched.coeffMatrix), pairwise(full.coeffMatrix), rtol=1e-6, atol=1e-3)
+    np.testing.assert_allclose(batched.u, full.u, rtol=1e-10)
+
+
+def test_incremental_update_adds_new_covers(covers, tmp_path):
+    data_dir, books = covers
+    mapper = {book['id']: {'title': f'Book {book["id"]}', 'cover': book['cover'], 'txt': ''} for book in books}
+    path = os.path.join(data_dir, 'mapper.json')
+
+    def write_mapper(count, bump_ns):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(list(mapper.items())[:count]), f)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump_ns))
+
+    cache_dir = str(tmp_path / 'cache_pca')
+    write_mapper(9, 0)
+    PCAPreprocessing(data_dir=data_dir, cache_dir=cache_dir, k=4, workers=1, batch_size=4).initialize()
+
+    write_mapper(12, 10 ** 9)
+    pipeline = PCAPreprocessing(data_dir=data_dir, cache_dir=cache_dir, k=4, workers=1, batch_size=4)
+    assert not pipeline.cache_exists() and pipeline.can_update_incrementally()
+    pipeline.initialize()
+
+    assert pipeline.pca_model.n_samples_seen == 12
+    assert pipeline.pca_model.coeffMatrix.shape == (12, 4)
+    assert [book['id'] for book in pipeline.books] == [book['id'] for book in books]
+    assert pipeline.cache_exists()
+    # cover baru ditemukan lewat pencarian gambar
+    result = pipeline.get_similar_books_by_uploaded_image(os.path.join(data_dir, '10.png'), 1)
+    assert result[0]['id'] == '10'
+    assert CacheManifest(cache_dir, 'pca').fingerprint() == pipeline.model_version
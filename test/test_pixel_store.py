@@ -0,0 +1,43 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.backend.pca.pixel_store import PixelStore, decode_query_image, open_image
+
+
+def write_cover(path, size=(1600, 2400)):
+    rng = np.random.default_rng(0)
+    # gradien + noise supaya hasil draft dan decode penuh memang berbeda
+    base = np.linspace(0, 255, size[0])[None, :, None] * np.ones((size[1], 1, 3))
+    pixels = np.clip(base + rng.normal(0, 40, base.shape), 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path, quality=90)
+
+
+def test_uploaded_cover_matches_stored_cover(tmp_path):
+    write_cover(tmp_path / 'cover.jpg')
+    store = PixelStore(str(tmp_path / 'store'), 200, 300, workers=1)
+    stored = store.build([{'id': '1', 'cover': 'cover.jpg'}], str(tmp_path))[0]
+
+    with open(tmp_path / 'cover.jpg', 'rb') as f:
+        uploaded = decode_query_image(f.read(), 200, 300)
+    np.testing.assert_allclose(uploaded, stored, atol=1e-3)
+
+
+def test_open_image_rejects_oversized_header():
+    buffer = io.BytesIO()
+    Image.new('RGB', (300, 200)).save(buffer, format='PNG')
+    with pytest.raises(ValueError):
+        open_image(buffer.getvalue(), max_pixels=1000)
+
+
+def test_parallel_decode_matches_serial(tmp_path):
+    books = []
+    for i in range(4):
+        write_cover(tmp_path / f'{i}.jpg', size=(400 + 40 * i, 600))
+        books.append({'id': str(i), 'cover': f'{i}.jpg'})
+
+    serial = PixelStore(None, 20, 30, workers=1).build(books, str(tmp_path))
+    parallel = PixelStore(None, 20, 30, workers=2, chunk_size=1).build(books, str(tmp_path))
+    np.testing.assert_array_equal(parallel, serial)
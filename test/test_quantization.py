@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from src.backend.algorithms.quantization import QuantizedIndex, ScalarQuantizer
+
+
+def make_data(metric, n=2000, dim=32, n_queries=50, seed=0):
+    rng = np.random.default_rng(seed)
+    # data bercluster, seperti embedding LSA / koefisien PCA
+    centers = rng.standard_normal((20, dim))
+    vectors = (centers[rng.integers(0, 20, n)] + 0.3 * rng.standard_normal((n, dim))).astype(np.float32)
+    queries = (vectors[rng.choice(n, n_queries, replace=False)]
+               + 0.1 * rng.standard_normal((n_queries, dim))).astype(np.float32)
+    if metric == "cosine":
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def exact_scores(metric, vectors, query):
+    if metric == "cosine":
+        return vectors @ query
+    return np.linalg.norm(vectors - query, axis=1)
+
+
+def exact_top_k(metric, vectors, query, k, exclude=None):
+    scores = exact_scores(metric, vectors, query).astype(np.float64)
+    if exclude is not None:
+        scores[exclude] = -np.inf if metric == "cosine" else np.inf
+    order = np.argsort(-scores if metric == "cosine" else scores, kind='stable')[:k]
+    return order, scores[order]
+
+
+def recall(results, expected):
+    return np.mean([len({idx for idx, _ in res} & set(exp.tolist())) / len(exp)
+                    for res, exp in zip(results, expected)])
+
+
+def test_scalar_quantizer_inner_products_match_decoded():
+    vectors, queries = make_data("l2", n=300)
+    quantizer = ScalarQuantizer().fit(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.dtype == np.uint8
+    np.testing.assert_allclose(quantizer.inner_products(codes, queries, block_size=64),
+                               queries @ quantizer.decode(codes).T, rtol=1e-4, atol=1e-3)
+    # error rekonstruksi <= setengah langkah kuantisasi per dimensi
+    assert np.all(np.abs(quantizer.decode(codes) - vectors) <= quantizer.scale / 2 + 1e-5)
+
+
+@pytest.mark.parametrize("metric", ["cosine", "l2"])
+def test_recall_without_and_with_rerank(metric):
+    vectors, queries = make_data(metric)
+    expected = [exact_top_k(metric, vectors, q, 10)[0] for q in queries]
+
+    approximate = QuantizedIndex(metric, rerank_factor=0).build(vectors).search_batch(queries, 10)
+    assert recall(approximate, expected) >= 0.9
+
+    reranked = QuantizedIndex(metric, rerank_factor=4).build(vectors).search_batch(queries, 10)
+    assert recall(reranked, expected) == 1.0
+    # setelah rerank skor = skor exact (inner product / jarak euclidean) dengan urutan yang benar
+    for res, query in zip(reranked, queries):
+        indices = np.array([idx for idx, _ in res])
+        scores = np.array([score for _, score in res])
+        np.testing.assert_allclose(scores, exact_scores(metric, vectors, query)[indices], rtol=1e-5, atol=1e-5)
+        assert np.all(np.diff(scores) <= 1e-7) if metric == "cosine" else np.all(np.diff(scores) >= -1e-7)
+
+
+@pytest.mark.parametrize("metric", ["cosine", "l2"])
+@pytest.mark.parametrize("rerank_factor", [0, 4])
+def test_exclude(metric, rerank_factor):
+    vectors, _ = make_data(metric, n=500)
+    index = QuantizedIndex(metric, rerank_factor=rerank_factor).build(vectors)
+
+    for idx in (0, 17, 499):
+        results = index.search(vectors[idx], 5, exclude=idx)
+        assert len(results) == 5
+        assert idx not in [i for i, _ in results]
+
+    excluded = np.array([3, 4])
+    results = index.search_batch(vectors[excluded], 5, exclude=excluded)
+    for idx, res in zip(excluded, results):
+        assert idx not in [i for i, _ in res]
+
+    # tanpa exclude, vektor itu sendiri yang paling mirip
+    assert index.search(vectors[17], 1)[0][0] == 17
+
+
+def test_k_larger_than_index():
+    vectors, queries = make_data("l2", n=6, n_queries=1)
+    results = QuantizedIndex("l2").build(vectors).search(queries[0], 10, exclude=2)
+    assert sorted(i for i, _ in results) == [0, 1, 3, 4, 5]
+
+
+@pytest.mark.parametrize("metric", ["cosine", "l2"])
+def test_save_load_round_trip(metric, tmp_path):
+    vectors, queries = make_data(metric, n=400)
+    index = QuantizedIndex(metric).build(vectors)
+    index.save(str(tmp_path))
+    assert QuantizedIndex.exists(str(tmp_path))
+
+    loaded = QuantizedIndex(metric).load(str(tmp_path), mmap_mode='r').attach(vectors)
+    assert loaded.search_batch(queries, 5) == index.search_batch(queries, 5)
+
+    QuantizedIndex.remove(str(tmp_path))
+    assert not QuantizedIndex.exists(str(tmp_path))
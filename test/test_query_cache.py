@@ -0,0 +1,67 @@
+from src.backend.query_cache import QueryCache
+
+
+def test_old_version_lookup_does_not_roll_back_namespace():
+    cache = QueryCache()
+    cache.set_version('document', 'v1')
+    key_v1 = cache.make_key('document', 'v1', b'text')
+    cache.set('document', 'v1', key_v1, 'old')
+
+    cache.set_version('document', 'v2')
+    assert cache.stats()['invalidations'] == 1
+    key_v2 = cache.make_key('document', 'v2', b'text')
+    cache.set('document', 'v2', key_v2, 'new')
+
+    # request yang masih memegang model lama: miss, dan tidak menyimpan apa-apa
+    assert cache.get('document', 'v1', key_v1) == (False, None)
+    assert cache.get_or_compute('document', 'v1', b'text', lambda: 'old again') == 'old again'
+    cache.set('document', 'v1', key_v1, 'old')
+
+    # entry versi aktif tetap ada
+    assert cache.get('document', 'v2', key_v2) == (True, 'new')
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['invalidations'] == 1
+
+
+def test_set_version_only_invalidates_its_namespace():
+    cache = QueryCache()
+    cache.set_version('document', 'v1')
+    cache.set_version('image', 'p1')
+    cache.get_or_compute('document', 'v1', b'text', lambda: 1)
+    cache.get_or_compute('image', 'p1', b'img', lambda: 2)
+
+    cache.set_version('document', 'v1')
+    assert cache.stats()['entries'] == 2
+    cache.set_version('document', 'v2')
+    assert cache.stats()['entries'] == 1
+    assert cache.get_or_compute('image', 'p1', b'img', lambda: 3) == 2
+
+
+def test_get_or_compute_batch_only_computes_misses():
+    cache = QueryCache()
+    cache.set_version('document', 'v1')
+    cache.get_or_compute('document', 'v1', b'b', lambda: 'B')
+
+    computed = []
+
+    def compute(missing):
+        computed.extend(missing)
+        return [f'r{i}' for i in missing]
+
+    assert cache.get_or_compute_batch('document', 'v1', [b'a', b'b', b'c'], compute) == ['r0', 'B', 'r2']
+    assert computed == [0, 2]
+
+
+def test_disk_tier_shared_between_instances(tmp_path):
+    first = QueryCache(disk_dir=str(tmp_path))
+    second = QueryCache(disk_dir=str(tmp_path))
+    first.get_or_compute('image', 'p1', b'img', lambda: {'ids': [1, 2]})
+    assert second.get_or_compute('image', 'p1', b'img', lambda: None) == {'ids': [1, 2]}
+    assert second.stats()['disk_hits'] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = QueryCache(ttl=-1)
+    assert cache.get_or_compute('document', 'v1', b'text', lambda: 1) == 1
+    assert cache.get_or_compute('document', 'v1', b'text', lambda: 2) == 2
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from src.backend.algorithms.svd import truncated_svd, SVD_METHODS
+
+
+def low_rank_matrix(rank, m=60, n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    # nilai singular berjauhan supaya urutannya jelas
+    return (rng.standard_normal((m, rank)) * np.linspace(20, 5, rank)) @ rng.standard_normal((rank, n))
+
+
+def check_factorization(A, U, sigma, VT, k):
+    expected = np.linalg.svd(A, compute_uv=False)[:k]
+    np.testing.assert_allclose(np.diag(sigma), expected, rtol=1e-6)
+    # U dan V orthonormal, dan U * Sigma * V^T = proyeksi rank-k dari A
+    np.testing.assert_allclose(U.T @ U, np.eye(k), atol=1e-6)
+    np.testing.assert_allclose(VT @ VT.T, np.eye(k), atol=1e-6)
+    np.testing.assert_allclose(U.T @ A @ VT.T, sigma, atol=1e-6 * expected[0])
+
+
+@pytest.mark.parametrize("method", ["randomized", "lanczos"])
+@pytest.mark.parametrize("rank", [1, 3])
+def test_rank_deficient_matches_numpy(method, rank):
+    A = low_rank_matrix(rank)
+    U, sigma, VT = truncated_svd(A, 5, method=method)
+    # komponen dengan nilai singular nol dibuang
+    assert sigma.shape == (rank, rank)
+    check_factorization(A, U, sigma, VT, rank)
+
+
+@pytest.mark.parametrize("method", SVD_METHODS)
+def test_full_rank_top_k(method):
+    rng = np.random.default_rng(1)
+    A = rng.standard_normal((50, 30)) @ np.diag(np.geomspace(100, 1, 30)) @ np.linalg.qr(rng.standard_normal((30, 30)))[0]
+    U, sigma, VT = truncated_svd(A, 4, method=method)
+    check_factorization(A, U, sigma, VT, 4)
+
+
+@pytest.mark.parametrize("method", ["randomized", "lanczos"])
+def test_sparse_input(method):
+    A = low_rank_matrix(3)
+    A[np.abs(A) < 20] = 0
+    U, sigma, VT = truncated_svd(csr_matrix(A), 2, method=method)
+    check_factorization(A, U, sigma, VT, 2)
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        truncated_svd(np.eye(3), 2, method="power")
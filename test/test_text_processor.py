@@ -0,0 +1,45 @@
+import pytest
+
+from src.backend.textPreprocessor.text_processor import TextPreprocessor, preprocess_files
+
+
+def test_regex_tokenizer_splits_on_every_non_letter():
+    preprocessor = TextPreprocessor(tokenizer='regex')
+    assert preprocessor.tokenize("word--word end.Next it's 3rd e-mail") == \
+        ['word', 'word', 'end', 'next', 'it', 's', 'rd', 'e', 'mail']
+
+
+def test_regex_preprocess_stems_and_drops_stopwords():
+    preprocessor = TextPreprocessor(tokenizer='regex')
+    assert preprocessor.preprocess("The dragons--flying over the forests.Castles") == \
+        ['dragon', 'fli', 'forest', 'castl']
+
+
+def test_unknown_tokenizer():
+    with pytest.raises(ValueError):
+        TextPreprocessor(tokenizer='whitespace')
+
+
+def test_preprocess_files_keeps_order_and_marks_missing(tmp_path):
+    paths = []
+    for i, text in enumerate(['forest forest dragon', 'castle--robot']):
+        path = tmp_path / f'{i}.txt'
+        path.write_text(text, encoding='utf-8')
+        paths.append(str(path))
+    paths.insert(1, str(tmp_path / 'missing.txt'))
+
+    results = list(preprocess_files(paths, workers=1, tokenizer='regex'))
+    assert results[0] == {'forest': 2, 'dragon': 1}
+    assert results[1] is None
+    assert results[2] == {'castl': 1, 'robot': 1}
+
+
+def test_preprocess_files_with_worker_pool_matches_serial(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f'{i}.txt'
+        path.write_text(' '.join(['forest', 'dragon--castle', 'robot'][:i % 3 + 1] * (i + 1)), encoding='utf-8')
+        paths.append(str(path))
+
+    serial = list(preprocess_files(paths, workers=1, tokenizer='regex'))
+    assert list(preprocess_files(paths, workers=2, chunk_size=2, tokenizer='regex')) == serial
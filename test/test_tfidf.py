@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from src.backend.lsa.lsa_model import LSAModel
+from src.backend.textPreprocessor import tfidf as tfidf_module
+from src.backend.textPreprocessor.tfidf import Tfidf
+
+SCHEMES = [(scheme, norm) for scheme in ("frequency", "sublinear", "bm25") for norm in (None, "l2")]
+
+
+def term_doc_counts(n_terms=150, n_docs=40, seed=0):
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(1, 6, (n_terms, n_docs)) * (rng.random((n_terms, n_docs)) < 0.15)
+    counts[:, 5] = 0  # dokumen kosong
+    counts[7] = 0     # term tanpa dokumen
+    return counts.astype(np.float64)
+
+
+def reference_tfidf(counts, tf_scheme, norm, k1=1.2, b=0.75):
+    # versi dense langsung dari definisi
+    n_docs = counts.shape[1]
+    idf = np.log10(n_docs / (1 + (counts > 0).sum(axis=1)))
+    lengths = counts.sum(axis=0)
+    if tf_scheme == "frequency":
+        tf = counts / np.where(lengths == 0, 1, lengths)
+    elif tf_scheme == "sublinear":
+        tf = np.where(counts > 0, 1 + np.log(np.maximum(counts, 1)), 0)
+    else:
+        tf = counts * (k1 + 1) / (counts + k1 * (1 - b + b * lengths / lengths.mean()))
+    tfidf = tf * idf[:, None]
+    if norm == "l2":
+        norms = np.linalg.norm(tfidf, axis=0)
+        tfidf = tfidf / np.where(norms == 0, 1, norms)
+    return tfidf
+
+
+@pytest.mark.parametrize("tf_scheme,norm", SCHEMES)
+def test_transform_matches_reference(tf_scheme, norm):
+    counts = term_doc_counts()
+    tfidf = Tfidf(tf_scheme, norm).fit(csr_matrix(counts))
+    np.testing.assert_allclose(tfidf.transform(csr_matrix(counts)).toarray(), reference_tfidf(counts, tf_scheme, norm),
+                               atol=1e-12)
+
+
+@pytest.mark.parametrize("tf_scheme,norm", SCHEMES)
+def test_query_paths_agree_with_document_transform(tf_scheme, norm):
+    # dokumen corpus yang dipakai sebagai query harus mendapat bobot yang sama persis
+    counts = term_doc_counts()
+    tfidf = Tfidf(tf_scheme, norm).fit(csr_matrix(counts))
+    documents = tfidf.transform(csr_matrix(counts)).toarray().T
+    queries = csr_matrix(counts.T)
+
+    np.testing.assert_allclose(tfidf.transform_queries(queries).toarray(), documents, atol=1e-12)
+    np.testing.assert_allclose(tfidf.query_tf(queries).toarray() * tfidf.idf_vector, documents, atol=1e-12)
+    for doc in range(counts.shape[1]):
+        np.testing.assert_allclose(tfidf.transform_query(counts[:, doc]), documents[doc], atol=1e-12)
+        term_indices = np.flatnonzero(counts[:, doc])
+        weights = tfidf.query_term_weights(counts[term_indices, doc], term_indices)
+        np.testing.assert_allclose(weights * tfidf.idf_vector[term_indices], documents[doc, term_indices], atol=1e-12)
+
+
+@pytest.mark.parametrize("tf_scheme,norm", SCHEMES)
+def test_fused_query_projection_matches_explicit_tfidf(tf_scheme, norm):
+    counts = term_doc_counts()
+    tfidf = Tfidf(tf_scheme, norm)
+    model = LSAModel(k=6, precision="float64").fit(tfidf.fit_transform(csr_matrix(counts)))
+    model.build_query_projection(tfidf.idf_vector)
+
+    queries = csr_matrix(counts.T[:10])
+    explicit = model.find_query_embeddings(tfidf.transform_queries(queries))
+    np.testing.assert_allclose(model.project_query_tf(tfidf.query_tf(queries)), explicit, atol=1e-10)
+
+    for doc in range(10):
+        term_indices = np.flatnonzero(counts[:, doc])
+        weights = tfidf.query_term_weights(counts[term_indices, doc], term_indices)
+        np.testing.assert_allclose(model.project_term_weights(term_indices, weights), explicit[doc], atol=1e-10)
+
+
+def test_save_load_round_trip(tmp_path):
+    counts = term_doc_counts()
+    tfidf = Tfidf("bm25", "l2", k1=1.5, b=0.5).fit(csr_matrix(counts))
+    tfidf.save(str(tmp_path))
+    loaded = Tfidf.load(str(tmp_path))
+    assert loaded.params() == tfidf.params()
+    assert loaded.avg_document_length == tfidf.avg_document_length
+    queries = csr_matrix(counts.T)
+    # idf disimpan float32
+    np.testing.assert_allclose(loaded.transform_queries(queries).toarray(), tfidf.transform_queries(queries).toarray(),
+                               rtol=1e-5, atol=1e-7)
+
+
+
+def test_interrupted_save_keeps_previous_params(tmp_path, monkeypatch):
+    counts = term_doc_counts()
+    Tfidf("bm25", "l2").fit(csr_matrix(counts)).save(str(tmp_path))
+    with open(tmp_path / Tfidf.PARAMS_FILE) as f:
+        saved = f.read()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(tfidf_module.json, "dump", fail)
+    with pytest.raises(OSError):
+        Tfidf("sublinear").fit(csr_matrix(counts)).save(str(tmp_path))
+
+    # file lama utuh, file sementara dibersihkan
+    with open(tmp_path / Tfidf.PARAMS_FILE) as f:
+        assert f.read() == saved
+    assert sorted(os.listdir(tmp_path)) == sorted([Tfidf.IDF_FILE, Tfidf.PARAMS_FILE])
+
+def test_rejects_unknown_scheme():
+    with pytest.raises(ValueError):
+        Tfidf("log")
+    with pytest.raises(ValueError):
+        Tfidf(norm="l1")
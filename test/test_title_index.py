@@ -0,0 +1,37 @@
+import pytest
+
+from src.backend.textPreprocessor.title_index import TitleIndex
+
+TITLES = ['Pride and Prejudice', 'The Adventures of Sherlock Holmes', 'Alice in Wonderland', 'Moby Dick',
+          'The Time Machine', 'Dracula', 'A Tale of Two Cities', 'Frankenstein', 'ALICE again', '']
+
+
+def brute_force(query):
+    return [idx for idx, title in enumerate(TITLES) if query.lower() in title.lower()]
+
+
+@pytest.mark.parametrize("query", ['a', 'A', 'al', 'ali', 'the', ' ', 'ice', 'alice', 'Sherlock Holmes',
+                                   'adventures of', 'he t', 'prejudice', 'moby dick', 'xyz', 'dickens',
+                                   'tale of two cities!', 'of'])
+def test_search_matches_substring_scan(query):
+    assert TitleIndex(TITLES).search(query) == brute_force(query)
+
+
+@pytest.mark.parametrize("max_n", [1, 2, 4])
+def test_search_with_other_gram_sizes(max_n):
+    index = TitleIndex(TITLES, max_n=max_n)
+    for query in ['a', 'ic', 'alice', 'the time', 'kula']:
+        assert index.search(query) == brute_force(query)
+
+
+def test_empty_query_returns_everything():
+    index = TitleIndex(TITLES)
+    assert len(index) == len(TITLES)
+    assert index.search('') == list(range(len(TITLES)))
+
+
+def test_short_query_lookup_does_not_expose_postings():
+    index = TitleIndex(TITLES)
+    results = index.search('a')
+    results.append(-1)
+    assert -1 not in index.search('a')
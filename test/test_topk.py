@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src.backend.algorithms.similarity import build_neighbor_table, find_top_k_similar, find_top_k_similar_batch
+from src.backend.algorithms.topk import batch_top_k, top_k
+
+
+def reference_top_k(scores, k, largest=True):
+    # urutan penuh (stabil) sebagai pembanding
+    order = np.argsort(-scores if largest else scores, kind='stable')[:k]
+    return order, scores[order]
+
+
+@pytest.mark.parametrize("largest", [True, False])
+@pytest.mark.parametrize("k", [1, 5, 99, 100, 500])
+def test_top_k_matches_full_sort(largest, k):
+    scores = np.random.default_rng(k).standard_normal(100)
+    indices, values = top_k(scores, k, largest=largest)
+    expected_indices, expected_values = reference_top_k(scores, k, largest)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_array_equal(values, expected_values)
+
+
+def test_top_k_ties_keep_index_order():
+    scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0])
+    indices, _ = top_k(scores, 3)
+    assert indices.tolist() == [1, 2, 4]
+
+
+def test_top_k_exclude_and_threshold():
+    scores = np.array([0.9, 0.1, 0.8, 0.5, 0.7], dtype=np.float32)
+    assert top_k(scores, 2, exclude=0)[0].tolist() == [2, 4]
+    assert top_k(scores, 2, exclude=np.array([0, 2]))[0].tolist() == [4, 3]
+    assert top_k(scores, 5, exclude=scores > 0.75)[0].tolist() == [4, 3, 1]
+    # yang tidak lolos threshold dibuang, hasil bisa < k
+    indices, values = top_k(scores, 5, threshold=0.6)
+    assert indices.tolist() == [0, 2, 4]
+    assert values.dtype == np.float32
+    assert top_k(scores, 5, largest=False, threshold=0.5)[0].tolist() == [1, 3]
+    # input tidak diubah
+    assert scores[0] == np.float32(0.9)
+
+
+def test_top_k_empty():
+    indices, values = top_k(np.array([1.0, 2.0]), 0)
+    assert indices.size == 0 and values.size == 0
+
+
+@pytest.mark.parametrize("largest", [True, False])
+def test_batch_top_k_matches_per_row(largest):
+    scores = np.random.default_rng(0).standard_normal((7, 50)).astype(np.float32)
+    exclude = np.arange(7)
+    indices, values = batch_top_k(scores, 6, largest=largest, exclude=exclude)
+    assert values.dtype == np.float32
+    for row in range(7):
+        expected_indices, expected_values = top_k(scores[row], 6, largest=largest, exclude=row)
+        np.testing.assert_array_equal(indices[row], expected_indices)
+        np.testing.assert_array_equal(values[row], expected_values)
+
+
+def test_batch_top_k_pads_short_rows():
+    scores = np.array([[0.9, 0.2, 0.4], [0.1, 0.3, 0.2]])
+    indices, _ = batch_top_k(scores, 3, threshold=0.25)
+    assert indices.tolist() == [[0, 2, -1], [1, -1, -1]]
+
+
+def test_similarity_helpers_match_brute_force():
+    embeddings = np.random.default_rng(2).standard_normal((60, 8)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    similarities = embeddings @ embeddings.T
+
+    expected = reference_top_k(np.where(np.arange(60) == 5, -np.inf, similarities[5]), 4)[0]
+    assert [idx for idx, _ in find_top_k_similar(5, embeddings, 4)] == expected.tolist()
+
+    batch = find_top_k_similar_batch(embeddings[:3], embeddings, 4, exclude=np.arange(3))
+    assert [[idx for idx, _ in row] for row in batch] == \
+        [[idx for idx, _ in find_top_k_similar(q, embeddings, 4)] for q in range(3)]
+
+    # blok kecil: hasil sama dengan satu matmul penuh
+    neighbor_indices, neighbor_scores = build_neighbor_table(embeddings, m=4, block_size=7)
+    full_indices, full_scores = batch_top_k(similarities, 4, exclude=np.arange(60))
+    np.testing.assert_array_equal(neighbor_indices, full_indices)
+    np.testing.assert_allclose(neighbor_scores, full_scores)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.backend.textPreprocessor.vocabulary import HashingVocabulary, Vocabulary, hash_terms
+
+
+def test_hash_terms_does_not_depend_on_batch():
+    terms = ['forest', 'a', 'dragonfly', 'é', 'x' * 5000, '']
+    batch = hash_terms(terms, 2 ** 20)
+    single = [int(hash_terms([term], 2 ** 20)[0]) for term in terms]
+    assert batch.tolist() == single
+    assert batch.dtype == np.int64
+    assert np.all((batch >= 0) & (batch < 2 ** 20))
+
+
+def test_hash_terms_is_stable():
+    # nilai tersimpan di cache (HashingVocabulary), tidak boleh berubah antar versi / proses
+    assert hash_terms(['forest', 'a', 'dragonfly', ''], 2 ** 20).tolist() == [637625, 270584, 209974, 387227]
+
+
+def test_hashing_vocabulary_lookup(tmp_path):
+    buckets = np.unique(hash_terms(['forest', 'dragon', 'castle'], 64))
+    vocabulary = HashingVocabulary(64, buckets)
+    indices = vocabulary.lookup_many(['forest', 'dragon', 'castle'])
+    assert np.all(indices >= 0)
+    assert vocabulary.get('forest') == int(indices[0])
+
+    vocabulary.save(str(tmp_path))
+    loaded = HashingVocabulary.load(str(tmp_path))
+    assert loaded.n_features == 64
+    assert loaded.lookup_many(['forest', 'dragon', 'castle']).tolist() == indices.tolist()
+
+
+def test_vocabulary_lookup_many():
+    vocabulary = Vocabulary.from_terms(['forest', 'dragon', 'castle'])
+    assert vocabulary.lookup_many(['dragon', 'missing', 'forest']).tolist() == [1, -1, 0]
+    assert 'castle' in vocabulary and 'missing' not in vocabulary
@@ -0,0 +1,24 @@
+from src.backend.worker_pool import MAX_DEFAULT_WORKERS, resolve_workers, worker_pool
+
+# diisi di process test; process hasil fork ikut melihat nilainya, process spawn tidak
+_marker = None
+
+
+def read_marker(_):
+    return _marker
+
+
+def test_resolve_workers_default_is_bounded():
+    assert 1 <= resolve_workers() <= MAX_DEFAULT_WORKERS
+    assert resolve_workers(3) == 3
+    assert resolve_workers(0) == 1
+
+
+def test_pool_does_not_fork_the_server_process():
+    global _marker
+    _marker = 'server'
+    try:
+        with worker_pool(2) as pool:
+            assert pool.map(read_marker, range(2)) == [None, None]
+    finally:
+        _marker = None